@@ -1,15 +1,21 @@
-import json
 import pandas as pd
 import os
-from typing import Dict, Optional, Tuple, List, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import treatment
+import team_features
 import nextGame
 import prediction
+from job_store import create_job_store
+from job_workspace import JobWorkspace, default_workspace
 import uuid
 import logging
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import datetime
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -21,26 +27,164 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# In-memory storage for job status
-jobs = {}
+def release_workspace(job_id: str) -> None:
+    """
+    Drop a job's workspace when its status record is evicted
+    """
+    workspace = workspaces.pop(job_id, None)
+    if workspace is not None:
+        workspace.cleanup()
+
+# Job status storage (memory by default, JOB_STORE_BACKEND=sqlite to share across workers)
+jobs = create_job_store(on_evict=release_workspace)
+
+# Per-job workspaces, held in memory by the worker that ran the job. With a shared job
+# store the frames are also written to JOB_WORKSPACE_DIR (SAVE_JOB_ARTIFACTS defaults
+# to on), so other workers can serve them from the directory kept in the job record.
+JOB_WORKSPACE_DIR = os.environ.get('JOB_WORKSPACE_DIR', 'job_workspaces')
+SAVE_JOB_ARTIFACTS = os.environ.get('SAVE_JOB_ARTIFACTS', '1' if jobs.shared else '0') == '1'
+workspaces: Dict[str, JobWorkspace] = {}
+# Eviction callbacks only run in the worker that evicts, so every worker also
+# periodically drops workspaces whose job records are gone
+WORKSPACE_PRUNE_INTERVAL = float(os.environ.get('JOB_WORKSPACE_PRUNE_SECONDS', 60))
+last_workspace_prune = 0.0
+
+# Background job runner
+MAX_WORKERS = int(os.environ.get('PREDICT_MAX_WORKERS', 2))
+MAX_QUEUE_DEPTH = int(os.environ.get('PREDICT_MAX_QUEUE_DEPTH', 16))
+executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='predict-job')
+queue_lock = threading.Lock()
+# Identifies jobs queued by this process; the pid alone can be reused after a restart
+WORKER_TOKEN = uuid.uuid4().hex
+MAX_BATCH_FIXTURES = int(os.environ.get('PREDICT_MAX_BATCH_FIXTURES', 20))
+
+def run_job(job_id: str, data: Dict[str, Any], process: Optional[Callable] = None) -> None:
+    """
+    Run a prediction job on a worker thread and release its queue slot
+    """
+    process = process or process_game_data
+    prune_workspaces()
+    workspace = JobWorkspace(os.path.join(JOB_WORKSPACE_DIR, job_id), save_artifacts=SAVE_JOB_ARTIFACTS)
+    workspaces[job_id] = workspace
+    jobs.update(job_id, started_at=datetime.datetime.now().isoformat(),
+                workspace_dir=workspace.directory if SAVE_JOB_ARTIFACTS else None)
+    try:
+        process(job_id, data, workspace)
+    except Exception as e:
+        logger.error(f"Error processing data: {str(e)}")
+        jobs.update(job_id, status='error', error=str(e))
+    finally:
+        jobs.update(job_id, finished_at=datetime.datetime.now().isoformat())
+
+def worker_alive(job: Dict[str, Any]) -> bool:
+    """
+    Check whether the process that queued a job is still running
+    """
+    if job.get('worker_token') == WORKER_TOKEN:
+        return True
+    pid = job.get('worker_pid')
+    if not pid or pid == os.getpid():
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def recover_jobs() -> None:
+    """
+    Fail unfinished jobs whose worker process is gone (crash or restart),
+    so they stop holding queue slots
+    """
+    for job_id in jobs.find(finished_at=None):
+        job = jobs.get(job_id)
+        if job is not None and not worker_alive(job):
+            logger.warning(f"Job {job_id} was left {job.get('status')} by a stopped worker, marking it failed")
+            jobs.update(job_id, status='error', error='Worker stopped before the job finished',
+                        finished_at=datetime.datetime.now().isoformat())
+
+def prune_workspaces(force: bool = False) -> None:
+    """
+    Fail jobs orphaned by stopped workers and release workspaces (in memory
+    and on disk) of jobs no longer in the store, at most once per
+    WORKSPACE_PRUNE_INTERVAL
+    """
+    global last_workspace_prune
+    with queue_lock:
+        if not force and time.time() - last_workspace_prune < WORKSPACE_PRUNE_INTERVAL:
+            return
+        last_workspace_prune = time.time()
+    recover_jobs()
+    for job_id in list(workspaces):
+        if job_id not in jobs:
+            release_workspace(job_id)
+    if jobs.shared and os.path.isdir(JOB_WORKSPACE_DIR):
+        for job_id in os.listdir(JOB_WORKSPACE_DIR):
+            if job_id not in workspaces and job_id not in jobs:
+                shutil.rmtree(os.path.join(JOB_WORKSPACE_DIR, job_id), ignore_errors=True)
+
+def get_job_frame(name: str, job_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Look up a DataFrame from a job's workspace, defaulting to the latest
+    completed job and then to artifacts in the working directory.
+    Jobs run by another worker are read from their workspace directory.
+    Internal team key columns are not served.
+    """
+    # Only single-match jobs produce the frames served by the /api/data endpoints
+    lookup_id = job_id or jobs.latest(status='completed', kind='match')
+    workspace = workspaces.get(lookup_id) if lookup_id else None
+    if workspace is None and lookup_id:
+        job = jobs.get(lookup_id)
+        workspace_dir = job.get('workspace_dir') if job else None
+        if workspace_dir and os.path.isdir(workspace_dir):
+            workspace = JobWorkspace(workspace_dir, save_artifacts=False)
+    if workspace is not None:
+        df = workspace.get(name)
+        if df is not None:
+            return team_features.drop_team_keys(df)
+    if job_id:
+        return None
+    df = default_workspace().get(name)
+    return team_features.drop_team_keys(df) if df is not None else None
+
+def frame_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame to JSON-safe records, with missing values (NaN, NA, NaT) as null
+    """
+    return df.astype(object).where(df.notna(), None).to_dict(orient='records')
+
+@app.route('/api/jobs', methods=['GET'])
+def get_job_store_stats():
+    """
+    Endpoint to report job store size and queue usage
+    """
+    return jsonify({
+        'status': 'success',
+        'store': jobs.stats(),
+        'active_jobs': jobs.count(finished_at=None),
+        'max_queue_depth': MAX_QUEUE_DEPTH
+    })
 
 @app.route('/api/jobs/<job_id>', methods=['GET'])
 def get_job_status(job_id):
     """
     Endpoint to check the status of a job
     """
-    if job_id not in jobs:
+    job = jobs.get(job_id)
+    if job is None:
         return jsonify({
             'status': 'error',
             'message': f'Job ID {job_id} not found'
         }), 404
     
-    return jsonify(jobs[job_id])
+    return jsonify(job)
 
 @app.route('/api/predict', methods=['POST'])
 def predict_game():
     """
-    Endpoint to start a game data processing job
+    Endpoint to queue a game data processing job
     """
     data = request.json
     
@@ -50,28 +194,83 @@ def predict_game():
             'status': 'error', 
             'message': f'Missing required fields: {", ".join(required_fields)}'
         }), 400
+    if data.get('predictor', prediction.DEFAULT_PREDICTOR) not in prediction.PREDICTORS:
+        return jsonify({
+            'status': 'error',
+            'message': f'predictor must be one of: {", ".join(prediction.PREDICTORS)}'
+        }), 400
     
-    job_id = str(uuid.uuid4())
+    return queue_job(data)
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Endpoint to queue a batch job predicting several fixtures of one league
+    """
+    data = request.json or {}
+    fixtures = data.get('fixtures')
+    if 'league' not in data or not isinstance(fixtures, list) or not fixtures:
+        return jsonify({
+            'status': 'error',
+            'message': 'Missing required fields: league, fixtures (non-empty list)'
+        }), 400
+    if any(not isinstance(f, dict) or 'team1' not in f or 'team2' not in f for f in fixtures):
+        return jsonify({
+            'status': 'error',
+            'message': 'Each fixture needs team1 (home) and team2 (away)'
+        }), 400
+    if len(fixtures) > MAX_BATCH_FIXTURES:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {MAX_BATCH_FIXTURES} fixtures per batch'
+        }), 400
+    if data.get('predictor', prediction.DEFAULT_PREDICTOR) not in prediction.PREDICTORS:
+        return jsonify({
+            'status': 'error',
+            'message': f'predictor must be one of: {", ".join(prediction.PREDICTORS)}'
+        }), 400
     
-    jobs[job_id] = {
+    return queue_job(data, process_batch_data)
+
+def queue_job(data: Dict[str, Any], process: Optional[Callable] = None):
+    """
+    Create a job record and queue it on the worker pool; 503 when the queue is full.
+    Unfinished jobs are counted and the record created in one job store
+    transaction, so with a shared store MAX_QUEUE_DEPTH applies across all workers.
+    """
+    process = process or process_game_data
+    job_id = str(uuid.uuid4())
+    created = jobs.try_create(job_id, {
         'status': 'pending',
+        'kind': 'match' if process is process_game_data else 'batch',
         'params': data,
         'result': None,
-        'error': None
-    }
+        'error': None,
+        'created_at': datetime.datetime.now().isoformat(),
+        'finished_at': None,
+        'worker_pid': os.getpid(),
+        'worker_token': WORKER_TOKEN
+    }, MAX_QUEUE_DEPTH, finished_at=None)
+    if not created:
+        return jsonify({
+            'status': 'error',
+            'message': f'Job queue is full ({MAX_QUEUE_DEPTH} jobs), try again later'
+        }), 503
     
     try:
-        process_game_data(job_id, data)
-    except Exception as e:
-        logger.error(f"Error processing data: {str(e)}")
-        jobs[job_id]['status'] = 'error'
-        jobs[job_id]['error'] = str(e)
+        executor.submit(run_job, job_id, data, process)
+    except RuntimeError as e:
+        jobs.update(job_id, finished_at=datetime.datetime.now().isoformat())
+        logger.error(f"Error queueing job {job_id}: {str(e)}")
+        jobs.update(job_id, status='error', error=str(e))
+        return jsonify({'status': 'error', 'job_id': job_id, 'message': str(e)}), 503
     
     return jsonify({
         'status': 'accepted',
         'job_id': job_id,
-        'message': 'Data processing job started'
-    })
+        'status_url': f'/api/jobs/{job_id}',
+        'message': 'Data processing job queued'
+    }), 202
 
 @app.route('/api/data/team', methods=['GET'])
 def get_team_data():
@@ -84,16 +283,15 @@ def get_team_data():
         return jsonify({'status': 'error', 'message': 'Team parameter is required'}), 400
     
     try:
-        file_path = "TeamGamesTreated.csv" if team_param == "team1" else "OppGamesTreated.csv"
-        
-        if not os.path.exists(file_path):
-            return jsonify({'status': 'error', 'message': f'Data file {file_path} not found'}), 404
+        name = "TeamGamesTreated" if team_param == "team1" else "OppGamesTreated"
+        df = get_job_frame(name, request.args.get('job_id'))
         
-        df = pd.read_csv(file_path)
+        if df is None:
+            return jsonify({'status': 'error', 'message': f'Data {name} not found'}), 404
         
         result = {
             'status': 'success',
-            'data': df.to_dict(orient='records'),
+            'data': frame_records(df),
             'shape': df.shape,
             'columns': df.columns.tolist()
         }
@@ -110,16 +308,14 @@ def get_next_game():
     Endpoint to get next game data
     """
     try:
-        file_path = "NextGame.csv"
+        df = get_job_frame("NextGame", request.args.get('job_id'))
         
-        if not os.path.exists(file_path):
+        if df is None:
             return jsonify({'status': 'error', 'message': 'Next game data not found'}), 404
         
-        df = pd.read_csv(file_path)
-        
         result = {
             'status': 'success',
-            'data': df.to_dict(orient='records'),
+            'data': frame_records(df),
             'shape': df.shape,
             'columns': df.columns.tolist()
         }
@@ -167,10 +363,11 @@ def get_teams():
         'teams': teams
     })
 
-def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
+def process_game_data(job_id: str, data: Dict[str, Any], workspace: Optional[JobWorkspace] = None) -> None:
     """
-    Process game data (create and save dataframes) and update job status
+    Process game data (create dataframes in the job workspace) and update job status
     """
+    workspace = workspace or default_workspace()
     try:
         season = int(data['season'])
         league = data['league']
@@ -230,18 +427,17 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
         team2_url = opp_club.lower().replace(' ', '-')
         odds_url = f"https://www.oddsportal.com/football/{league_url_segment}/{team1_url}-{team2_url}"
         
-        jobs[job_id]['status'] = 'processing'
+        jobs.update(job_id, status='processing')
         
         logger.info(f"Processing historical data for {star_club} vs {opp_club} in {league}...")
-        error = treatment.handler(season, league, star_club, opp_club)
+        error = treatment.handler(season, league, star_club, opp_club, workspace=workspace)
         if error:
             logger.error(f"treatment.handler failed: {error}")
-            jobs[job_id]['status'] = 'error'
-            jobs[job_id]['error'] = error
+            jobs.update(job_id, status='error', error=error)
             return
         
-        team_games = pd.read_csv("TeamGames.csv")
-        opp_games = pd.read_csv("OppGames.csv")
+        team_games = workspace.get("TeamGames")
+        opp_games = workspace.get("OppGames")
         
         logger.info("Adding TotalGoals column...")
         team_games = treatment.add_total_goals_column(team_games)
@@ -256,8 +452,7 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
         opp_games = treatment.add_Goalsodds_feedback(opp_games)
         
         logger.info("Processing dates...")
-        team_games = treatment.treatment_of_date(team_games)
-        opp_games = treatment.treatment_of_date(opp_games)
+        team_games, opp_games = treatment.treatment_of_dates(team_games, opp_games)
         
         logger.info("Dropping Date column if it exists...")
         if 'Date' in team_games.columns:
@@ -271,9 +466,9 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
         if 'WeekDay' in opp_games.columns:
             opp_games = opp_games.drop('WeekDay', axis=1)
         
-        logger.info("Saving treated files: TeamGamesTreated.csv, OppGamesTreated.csv")
-        team_games.to_csv("TeamGamesTreated.csv", index=False)
-        opp_games.to_csv("OppGamesTreated.csv", index=False)
+        logger.info("Storing treated frames: TeamGamesTreated, OppGamesTreated")
+        workspace.put("TeamGamesTreated", team_games)
+        workspace.put("OppGamesTreated", opp_games)
         
         logger.info(f"Fetching odds for upcoming game: {odds_url}")
         
@@ -391,10 +586,10 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
                         odds_data["BWD"] = team_outcomes.get("Draw", 0)
                         odds_data["BWA"] = team_outcomes.get(opp_club, 0)
             
-            # Save to NextGame.csv
+            # Save to NextGame
             df = pd.DataFrame([odds_data])
-            df.to_csv("NextGame.csv", index=False)
-            logger.info(f"Successfully saved match data to NextGame.csv with columns: {list(df.columns)}")
+            workspace.put("NextGame", df)
+            logger.info(f"Successfully saved match data to NextGame with columns: {list(df.columns)}")
             
             # Process goals odds for the same event
             goals_data = {}
@@ -443,13 +638,13 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
                     goals_data["B365>2.5"] = 0
                     goals_data["B365<2.5"] = 0
             
-            # Update NextGame.csv with goals odds
-            df = pd.read_csv("NextGame.csv")
+            # Update NextGame with goals odds
+            df = workspace.get("NextGame")
             for key, value in goals_data.items():
                 if key in ["B365>2.5", "B365<2.5", "Max>2.5", "Max<2.5", "Avg>2.5", "Avg<2.5"]:
                     df[key] = value
-            df.to_csv("NextGame.csv", index=False)
-            logger.info(f"Updated NextGame.csv with goals odds")
+            workspace.put("NextGame", df)
+            logger.info(f"Updated NextGame with goals odds")
         else:
             # Try to get odds data normally - will return upcoming games if no match
             odds_data = nextGame.get_next_game_data(
@@ -467,12 +662,12 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
                     'team1': {
                         'name': star_club,
                         'games_count': len(team_games),
-                        'columns': team_games.columns.tolist()
+                        'columns': team_features.drop_team_keys(team_games).columns.tolist()
                     },
                     'team2': {
                         'name': opp_club,
                         'games_count': len(opp_games),
-                        'columns': opp_games.columns.tolist()
+                        'columns': team_features.drop_team_keys(opp_games).columns.tolist()
                     },
                     'next_game': {
                         'odds_error': odds_data['error'],
@@ -480,8 +675,7 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
                         'events': odds_data.get('events', [])
                     }
                 }
-                jobs[job_id]['status'] = 'pending_game_selection'
-                jobs[job_id]['result'] = result
+                jobs.update(job_id, status='pending_game_selection', result=result)
                 return
             
             # If we get here, odds data was found successfully
@@ -507,34 +701,89 @@ def process_game_data(job_id: str, data: Dict[str, Any]) -> None:
         
         # Run prediction
         logger.info("Running prediction...")
-        next_game_df = pd.read_csv("NextGame.csv")
-        prediction_result = prediction.predict(team_games, opp_games, next_game_df)
+        next_game_df = workspace.get("NextGame")
+        prediction_result = prediction.predict(
+            team_games, opp_games, next_game_df, league=league,
+            seasons=range(treatment.HISTORY_SEASON_START, treatment.HISTORY_SEASON_END + 1),
+            on_progress=lambda progress: jobs.update(job_id, progress=progress),
+            predictor=data.get('predictor')
+        )
         
         result = {
             'team1': {
                 'name': star_club,
                 'games_count': len(team_games),
-                'columns': team_games.columns.tolist()
+                'columns': team_features.drop_team_keys(team_games).columns.tolist()
             },
             'team2': {
                 'name': opp_club,
                 'games_count': len(opp_games),
-                'columns': opp_games.columns.tolist()
+                'columns': team_features.drop_team_keys(opp_games).columns.tolist()
             },
             'next_game': {
-                'odds': odds_data if not selected_event else pd.read_csv("NextGame.csv").iloc[0].to_dict(),
+                'odds': odds_data if not selected_event else next_game_df.iloc[0].to_dict(),
                 'goals_odds': goals_data,
                 'prediction': prediction_result
             }
         }
         
-        jobs[job_id]['status'] = 'completed'
-        jobs[job_id]['result'] = result
+        jobs.update(job_id, status='completed', result=result)
         
     except Exception as e:
         logger.error(f"Error processing game data: {str(e)}")
-        jobs[job_id]['status'] = 'error'
-        jobs[job_id]['error'] = str(e)
+        jobs.update(job_id, status='error', error=str(e))
+
+def process_batch_data(job_id: str, data: Dict[str, Any], workspace: Optional[JobWorkspace] = None) -> None:
+    """
+    Predict a list of fixtures for one league from a single load of its history
+    """
+    workspace = workspace or default_workspace()
+    try:
+        league = data['league']
+        fixtures = data['fixtures']
+        jobs.update(job_id, status='processing')
         
+        logger.info(f"Loading {league} history for a batch of {len(fixtures)} fixtures...")
+        all_games = treatment.process_all_games(
+            treatment.HISTORY_SEASON_START, treatment.HISTORY_SEASON_END, league,
+            return_frame=True, workspace=workspace
+        )
+        if isinstance(all_games, str):
+            jobs.update(job_id, status='error', error=all_games)
+            return
+        
+        valid = []
+        invalid = {}
+        for i, fixture in enumerate(fixtures):
+            unknown = [team for team in (fixture['team1'], fixture['team2']) if not treatment.validate_club(team, league)]
+            if unknown:
+                invalid[i] = f"Error: {', '.join(unknown)} not found in {league}"
+            else:
+                valid.append(fixture)
+        
+        predictions = iter(prediction.predict_fixtures(
+            all_games, valid, league=league,
+            seasons=range(treatment.HISTORY_SEASON_START, treatment.HISTORY_SEASON_END + 1),
+            predictor=data.get('predictor')
+        ))
+        results = []
+        for i, fixture in enumerate(fixtures):
+            if i in invalid:
+                results.append({
+                    'match': f"{fixture['team1']} vs {fixture['team2']}",
+                    'prediction': {'error': invalid[i]}
+                })
+            else:
+                results.append(next(predictions))
+        
+        jobs.update(job_id, status='completed', result={'league': league, 'fixtures': results})
+    
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        jobs.update(job_id, status='error', error=str(e))
+
+# Jobs left unfinished by a previous run of this service would otherwise hold queue slots
+recover_jobs()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
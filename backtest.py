@@ -0,0 +1,342 @@
+# backtest.py
+# Backtesting: replay historical matches chronologically through a predictor using point-in-time features
+import pandas as pd
+import numpy as np
+import prediction
+import goals_model
+import game_store
+import team_features
+from job_workspace import default_workspace
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.FileHandler('backtest.log'), logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+# 'favourite' bets the bookmaker's shortest odds, 'poisson' uses venue averages,
+# 'dixon-coles' refits league strengths before every match date, 'llm' queries LM Studio
+BACKTEST_PREDICTORS = ('favourite', 'poisson', 'dixon-coles', 'llm')
+# Matches are only scored once both teams have this many earlier games at the venue
+MIN_HISTORY_GAMES = 3
+BACKTEST_WORKERS = os.cpu_count() or 1
+# Chunks per worker; contiguous date ranges keep dixon-coles refits local to one process
+CHUNKS_PER_WORKER = 4
+RESULT_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR',
+                  'B365H', 'B365D', 'B365A', 'B365>2.5', 'B365<2.5']
+PROBABILITY_FLOOR = 1e-15
+
+def load_games(league: Optional[str] = None, seasons: Optional[List[int]] = None) -> pd.DataFrame:
+    """
+    Finished matches in chronological order, from the game store when a league
+    is given, otherwise from the job workspace's AllGames.
+    """
+    if league:
+        games = game_store.read_seasons(league, seasons or [])
+    else:
+        games = default_workspace().get('AllGames')
+    if games is None or games.empty:
+        raise ValueError(f"No games available for {league or 'AllGames'}")
+    games = games.dropna(subset=['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'])
+    games = games[[column for column in RESULT_COLUMNS if column in games.columns]]
+    return chronological(games)
+
+def chronological(games: pd.DataFrame) -> pd.DataFrame:
+    """Games with a parsed MatchDate, stably sorted by it and renumbered; undated rows are dropped."""
+    dates = games['MatchDate'] if 'MatchDate' in games.columns else games['Date']
+    games = games.assign(MatchDate=game_store.parse_date_column(dates)).dropna(subset=['MatchDate'])
+    return games.sort_values('MatchDate', kind='stable').reset_index(drop=True)
+
+def venue_history(games: pd.DataFrame, venue: str) -> pd.DataFrame:
+    """
+    Each team's record at the venue from strictly earlier matches, one row per match.
+
+    Counts are cumulative sums per team excluding the match itself; a team
+    plays at most once per date, so no same-day result leaks in.
+    """
+    team, goals_for, goals_against, win, loss = (
+        ('HomeTeam', 'FTHG', 'FTAG', 'H', 'A') if venue == 'home' else ('AwayTeam', 'FTAG', 'FTHG', 'A', 'H'))
+    keys = games[team].map(team_features.team_key_map(games[team]))
+    rows = pd.DataFrame({
+        'Games': 1.0,
+        'GoalsFor': games[goals_for].astype(float),
+        'GoalsAgainst': games[goals_against].astype(float),
+        'Wins': (games['FTR'] == win).astype(float),
+        'Draws': (games['FTR'] == 'D').astype(float),
+        'Losses': (games['FTR'] == loss).astype(float),
+    })
+    history = rows.groupby(keys).cumsum() - rows
+    results = games['FTR'].map({win: 'W', 'D': 'D', loss: 'L'}).astype(object).groupby(keys)
+    form = pd.Series('', index=games.index)
+    for lag in range(team_features.FORM_LENGTH, 0, -1):
+        form = form + results.shift(lag).fillna('')
+    history['Form'] = form
+    return history
+
+def point_in_time_features(games: pd.DataFrame) -> pd.DataFrame:
+    """Games with Home*/Away* history columns describing both teams as of each match."""
+    home = venue_history(games, 'home').add_prefix('Home')
+    away = venue_history(games, 'away').add_prefix('Away')
+    return pd.concat([games, home, away], axis=1)
+
+def history_stats(row: pd.Series, prefix: str) -> Dict[str, Any]:
+    """compute_team_stats-style dict from a match row's Home/Away history columns."""
+    games = int(row[f"{prefix}Games"])
+    scored = row[f"{prefix}GoalsFor"] / games if games else 0
+    conceded = row[f"{prefix}GoalsAgainst"] / games if games else 0
+    return {
+        'context': prefix.lower(),
+        'goals_scored_avg': float(scored),
+        'goals_conceded_avg': float(conceded),
+        'win_rate': float(row[f"{prefix}Wins"] / games) if games else 0,
+        'draw_rate': float(row[f"{prefix}Draws"] / games) if games else 0,
+        'loss_rate': float(row[f"{prefix}Losses"] / games) if games else 0,
+        'total_games': games,
+        'avg_total_goals': float(scored + conceded) if games else 0,
+        'form': row[f"{prefix}Form"]
+    }
+
+def odds_row(row: pd.Series) -> pd.DataFrame:
+    """One-row NextGame-style frame with the match's odds for compute_odds_stats."""
+    return pd.DataFrame([{column: row[column] for column in RESULT_COLUMNS[6:] if column in row.index}])
+
+def favourite_prediction(row: pd.Series) -> Optional[Dict[str, Any]]:
+    """Bookmaker baseline: probabilities implied by the B365 odds, overround removed."""
+    odds = np.array([row.get('B365H', np.nan), row.get('B365D', np.nan), row.get('B365A', np.nan)], dtype=float)
+    if not np.all(odds > 1):
+        return None
+    implied = (1 / odds) / (1 / odds).sum()
+    probabilities = dict(zip(('home', 'draw', 'away'), implied.tolist()))
+    goals_odds = np.array([row.get('B365>2.5', np.nan), row.get('B365<2.5', np.nan)], dtype=float)
+    if np.all(goals_odds > 1):
+        over = (1 / goals_odds[0]) / (1 / goals_odds).sum()
+        probabilities.update({'over_2_5': float(over), 'under_2_5': float(1 - over)})
+    return {'probabilities': probabilities}
+
+def outcome_label(text: str, home_team: str, away_team: str) -> Optional[str]:
+    """H/D/A from a predicted outcome sentence such as "Roma win because ..."."""
+    text = team_features.normalize_team_name(text)
+    if text.startswith('draw'):
+        return 'D'
+    # Longer name first, so a name that prefixes the other one can't shadow it
+    for name, label in sorted(((home_team, 'H'), (away_team, 'A')), key=lambda item: -len(item[0])):
+        if text.startswith(team_features.normalize_team_name(name)):
+            return label
+    return None
+
+def goals_label(text: str) -> Optional[str]:
+    """'over'/'under' from a predicted goals sentence."""
+    text = text.strip().lower()
+    if text.startswith('over'):
+        return 'over'
+    if text.startswith('under'):
+        return 'under'
+    return None
+
+def missing_prediction() -> Dict[str, Any]:
+    """Per-match record for a match the predictor couldn't predict."""
+    return {'outcome': None, 'goals': None, 'p_home': np.nan, 'p_draw': np.nan,
+            'p_away': np.nan, 'p_over': np.nan, 'model': None}
+
+def predict_row(row: pd.Series, predictor: str, model: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Predict one historical match from its point-in-time features.
+
+    Returns the predicted outcome (H/D/A), goals ('over'/'under'), the model
+    that produced them and, when the predictor gives them, probabilities;
+    None values when it can't predict.
+    """
+    home_team, away_team = row['HomeTeam'], row['AwayTeam']
+    team_stats, opp_stats = history_stats(row, 'Home'), history_stats(row, 'Away')
+    expected = goals_model.model_expected_goals(model, home_team, away_team) if model is not None else None
+    if predictor == 'favourite':
+        result = favourite_prediction(row)
+    elif predictor == 'dixon-coles' and expected is not None:
+        result = goals_model.predict_match(expected[0], expected[1], home_team, away_team, model['rho'])
+        result['model'] = 'dixon-coles'
+    elif predictor in ('poisson', 'dixon-coles'):
+        result = goals_model.predict_from_team_stats(team_stats, opp_stats, home_team, away_team)
+    else:
+        odds_stats = prediction.compute_odds_stats(odds_row(row))
+        # No goals-model fallback: an LM Studio failure must count as a missing llm prediction
+        result = prediction.predict_from_stats(team_stats, opp_stats, odds_stats, home_team, away_team,
+                                               predictor='llm', fallback=False)
+
+    prediction_result = missing_prediction()
+    if not result:
+        return prediction_result
+    # Which model actually produced the row, e.g. 'poisson' for a dixon-coles row the model can't cover
+    prediction_result['model'] = result.get('model', predictor)
+    probabilities = result.get('probabilities')
+    if probabilities:
+        prediction_result.update({
+            'outcome': 'HDA'[int(np.argmax([probabilities['home'], probabilities['draw'], probabilities['away']]))],
+            'p_home': probabilities['home'],
+            'p_draw': probabilities['draw'],
+            'p_away': probabilities['away'],
+        })
+        if 'over_2_5' in probabilities:
+            prediction_result['p_over'] = probabilities['over_2_5']
+            prediction_result['goals'] = 'over' if probabilities['over_2_5'] >= 0.5 else 'under'
+    else:
+        prediction_result['outcome'] = outcome_label(result.get('outcome', ''), home_team, away_team)
+        prediction_result['goals'] = goals_label(result.get('goals', ''))
+    return prediction_result
+
+def run_chunk(games: pd.DataFrame, start: int, stop: int, predictor: str) -> pd.DataFrame:
+    """
+    Predict matches start..stop-1 of the chronologically sorted feature frame.
+
+    Runs in a worker process; games holds every match up to stop so the
+    dixon-coles predictor can refit on the results before each match date.
+    """
+    records = []
+    model, model_date = None, None
+    for index in range(start, stop):
+        row = games.iloc[index]
+        if predictor == 'dixon-coles' and row['MatchDate'] != model_date:
+            earlier = games.iloc[:index]
+            earlier = earlier[earlier['MatchDate'] < row['MatchDate']]
+            model = goals_model.fit_league_model(earlier) if len(earlier) else None
+            model_date = row['MatchDate']
+        started = time.perf_counter()
+        try:
+            record = predict_row(row, predictor, model)
+        except Exception as e:
+            logger.error(f"Backtest prediction failed for {row['HomeTeam']} vs {row['AwayTeam']}: {str(e)}")
+            record = missing_prediction()
+        record.update({'index': index, 'seconds': time.perf_counter() - started})
+        records.append(record)
+    return pd.DataFrame(records)
+
+def score_results(results: pd.DataFrame, elapsed: float) -> Dict[str, Any]:
+    """
+    Accuracy, log-loss and flat-stake ROI of backtest predictions.
+
+    ROI stakes one unit on every predicted outcome (and goals line) at the
+    B365 odds; log-loss covers only predictions that carry probabilities.
+    """
+    outcomes = results.dropna(subset=['outcome'])
+    correct = outcomes['outcome'] == outcomes['FTR']
+    total_goals = results['FTHG'] + results['FTAG']
+    actual_goals = np.where(total_goals > 2.5, 'over', 'under')
+    goals = results['goals'].notna()
+    goals_correct = results.loc[goals, 'goals'] == actual_goals[goals.to_numpy()]
+
+    summary: Dict[str, Any] = {
+        'matches': int(len(results)),
+        'predicted': int(len(outcomes)),
+        'models': {str(model): int(count) for model, count in results['model'].value_counts().items()},
+        'outcome_accuracy': float(correct.mean()) if len(outcomes) else None,
+        'goals_accuracy': float(goals_correct.mean()) if goals.any() else None,
+        'log_loss': None,
+        'outcome_roi': None,
+        'goals_roi': None,
+        'seconds': round(elapsed, 3),
+        'matches_per_second': round(len(results) / elapsed, 2) if elapsed > 0 else None,
+        'mean_prediction_ms': round(float(results['seconds'].mean()) * 1000, 3) if len(results) else None
+    }
+
+    probabilities = results.dropna(subset=['p_home', 'p_draw', 'p_away'])
+    if len(probabilities):
+        actual = probabilities[['p_home', 'p_draw', 'p_away']].to_numpy()[
+            np.arange(len(probabilities)), probabilities['FTR'].map({'H': 0, 'D': 1, 'A': 2}).to_numpy()]
+        summary['log_loss'] = float(-np.log(np.clip(actual, PROBABILITY_FLOOR, 1)).mean())
+
+    if {'B365H', 'B365D', 'B365A'}.issubset(results.columns) and len(outcomes):
+        odds = outcomes[['B365H', 'B365D', 'B365A']].to_numpy(dtype=float)[
+            np.arange(len(outcomes)), outcomes['outcome'].map({'H': 0, 'D': 1, 'A': 2}).to_numpy()]
+        valid = odds > 1
+        if valid.any():
+            profit = np.where(correct.to_numpy(), odds - 1, -1.0)[valid]
+            summary['outcome_roi'] = float(profit.sum() / valid.sum())
+
+    if {'B365>2.5', 'B365<2.5'}.issubset(results.columns) and goals.any():
+        picks = results[goals]
+        odds = np.where(picks['goals'] == 'over', picks['B365>2.5'], picks['B365<2.5']).astype(float)
+        valid = odds > 1
+        if valid.any():
+            profit = np.where(goals_correct.to_numpy(), odds - 1, -1.0)[valid]
+            summary['goals_roi'] = float(profit.sum() / valid.sum())
+    return summary
+
+def run_backtest(games: pd.DataFrame, predictor: str, min_history: int = MIN_HISTORY_GAMES,
+                 max_workers: int = BACKTEST_WORKERS, since: Optional[str] = None) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    Replay games (see load_games) in date order through a predictor in parallel worker processes.
+
+    Only matches where both teams have min_history earlier games at the venue
+    (and, if given, dated on or after since) are predicted. Returns the
+    score_results summary and the per-match predictions.
+    """
+    if predictor not in BACKTEST_PREDICTORS:
+        raise ValueError(f"Unknown predictor '{predictor}'. Choose from {BACKTEST_PREDICTORS}")
+    if predictor == 'llm':
+        # Every process has its own HTTP client, so keep the total within LM Studio's slots
+        max_workers = min(max_workers, prediction.lm_studio_slots())
+
+    # History columns and chunk boundaries assume chronological rows, so don't rely on the caller's order
+    features = point_in_time_features(chronological(games))
+    eligible = (features['HomeGames'] >= min_history) & (features['AwayGames'] >= min_history)
+    if since:
+        eligible &= features['MatchDate'] >= pd.Timestamp(since)
+    indices = np.flatnonzero(eligible.to_numpy())
+    if not len(indices):
+        raise ValueError("No matches with enough history to backtest")
+
+    chunks = [chunk for chunk in np.array_split(indices, max(1, max_workers * CHUNKS_PER_WORKER)) if len(chunk)]
+    started = time.time()
+    frames = []
+    if max_workers <= 1:
+        for chunk in chunks:
+            frames.append(run_chunk(features, int(chunk[0]), int(chunk[-1]) + 1, predictor))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(run_chunk, features.iloc[:int(chunk[-1]) + 1], int(chunk[0]),
+                                       int(chunk[-1]) + 1, predictor) for chunk in chunks]
+            frames = [future.result() for future in futures]
+    elapsed = time.time() - started
+
+    predictions = pd.concat(frames, ignore_index=True).set_index('index')
+    results = features.loc[indices].join(predictions, how='inner')
+    summary = score_results(results, elapsed)
+    summary['predictor'] = predictor
+    logger.info(f"Backtest {predictor}: {json.dumps(summary)}")
+    return summary, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest predictors on historical matches")
+    parser.add_argument('--league', help="League to read from the game store (default: AllGames in the job workspace)")
+    parser.add_argument('--start', type=int, default=2020, help="First season start year (with --league)")
+    parser.add_argument('--end', type=int, default=2024, help="Last season start year (with --league)")
+    parser.add_argument('--predictor', action='append', dest='predictors', choices=BACKTEST_PREDICTORS,
+                        help="Predictor to backtest (repeatable, default favourite and poisson)")
+    parser.add_argument('--since', help="Only score matches on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--min-history', type=int, default=MIN_HISTORY_GAMES,
+                        help="Earlier games at the venue both teams need before a match is scored")
+    parser.add_argument('--workers', type=int, default=BACKTEST_WORKERS, help="Worker processes")
+    parser.add_argument('--output', help="Write per-match predictions to this CSV (predictor column added)")
+    args = parser.parse_args()
+
+    games = load_games(args.league, list(range(args.start, args.end + 1)))
+    logger.info(f"Backtesting {len(games)} matches")
+    summaries, frames = [], []
+    for predictor in args.predictors or ['favourite', 'poisson']:
+        summary, results = run_backtest(games, predictor, args.min_history, args.workers, args.since)
+        summaries.append(summary)
+        frames.append(results.assign(predictor=predictor))
+    print(json.dumps(summaries, indent=2))
+    if args.output:
+        pd.concat(frames, ignore_index=True).to_csv(args.output, index=False)
+
+if __name__ == "__main__":
+    main()
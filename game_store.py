@@ -0,0 +1,159 @@
+# game_store.py
+# Columnar on-disk store of cleaned match data, partitioned by league and season
+import pandas as pd
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+GAME_STORE_DIR = os.environ.get('GAME_STORE_DIR', 'game_store')
+
+# Parquet needs pyarrow; without it partitions are written as CSV so the store still works
+try:
+    import pyarrow  # noqa: F401
+    STORE_FORMAT = 'parquet'
+except ImportError:
+    STORE_FORMAT = 'csv'
+    logger.warning("pyarrow not installed, game store falls back to CSV partitions")
+
+# Date formats seen in football-data.co.uk files. Dates are parsed once when a season is
+# cleaned and stored as datetime64; CSV files keep football-data's day-first format.
+DATE_FORMATS = ['%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d']
+CSV_DATE_FORMAT = '%d/%m/%Y'
+
+def detect_date_format(dates: pd.Series, sample_size: int = 50) -> str:
+    """Pick the DATE_FORMATS entry that parses most of a sample; football-data uses one per file."""
+    sample = dates.head(sample_size)
+    return max(DATE_FORMATS, key=lambda fmt: pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+
+def parse_match_dates(dates: pd.Series) -> pd.Series:
+    """Parse a Date column with one vectorized call for the detected format; NaT where nothing matches.
+
+    Rows the detected format misses are retried with the other formats, so
+    files that mix two- and four-digit years still parse.
+    """
+    text = dates.astype(str).str.strip()
+    fmt = detect_date_format(text)
+    parsed = pd.to_datetime(text, format=fmt, errors='coerce')
+    for other in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        if other != fmt:
+            parsed[missing] = pd.to_datetime(text[missing], format=other, errors='coerce')
+    return parsed
+
+def parse_date_column(dates: pd.Series) -> pd.Series:
+    """Parse a Date column that may already be datetime, in a football-data format, or any day-first string."""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = parse_match_dates(dates)
+    missing = parsed.isna() & dates.notna()
+    if missing.any():
+        parsed[missing] = pd.to_datetime(dates[missing], dayfirst=True, errors='coerce')
+    return parsed
+
+def league_slug(league: str) -> str:
+    """Directory-safe form of a league name (e.g. "Serie A" -> "Serie_A")."""
+    return league.replace(' ', '_')
+
+def partition_path(league: str, season: int, dataset: str = 'games', fmt: Optional[str] = None) -> str:
+    """Return the file path for one league/season partition of a dataset."""
+    fmt = fmt or STORE_FORMAT
+    return os.path.join(GAME_STORE_DIR, dataset, f"league={league_slug(league)}", f"season={season}", f"part.{fmt}")
+
+def find_partition(league: str, season: int, dataset: str = 'games') -> Optional[str]:
+    """Return the path of an existing partition in any supported format, or None."""
+    formats = ('parquet', 'csv') if STORE_FORMAT == 'parquet' else ('csv',)
+    for fmt in formats:
+        path = partition_path(league, season, dataset, fmt)
+        if os.path.exists(path):
+            return path
+    return None
+
+def partition_age(league: str, season: int, dataset: str = 'games') -> Optional[float]:
+    """Seconds since a partition was last written, or None if it does not exist."""
+    path = find_partition(league, season, dataset)
+    if path is None:
+        return None
+    return time.time() - os.path.getmtime(path)
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """
+    Yield a unique temp path next to path and move it into place once the block succeeds.
+
+    Readers never see a partial file, and concurrent writers of the same
+    target each get their own temp file. On error the temp file is removed.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_frame(df: pd.DataFrame, path: str) -> None:
+    """Atomically write a DataFrame in the format given by the path's extension (parquet, feather or csv)."""
+    with atomic_path(path) as tmp_path:
+        if path.endswith('.parquet'):
+            df.to_parquet(tmp_path, index=False)
+        elif path.endswith('.feather'):
+            df.reset_index(drop=True).to_feather(tmp_path)
+        else:
+            df.to_csv(tmp_path, index=False, date_format=CSV_DATE_FORMAT)
+
+def read_frame(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a DataFrame written by write_frame, loading only the requested columns.
+
+    Date comes back as datetime64, also from CSV files and from partitions
+    written before dates were stored parsed.
+    """
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=columns)
+    elif path.endswith('.feather'):
+        df = pd.read_feather(path, columns=columns)
+    else:
+        df = pd.read_csv(path, usecols=columns)
+    if 'Date' in df.columns:
+        df['Date'] = parse_date_column(df['Date'])
+    return df
+
+def write_partition(df: pd.DataFrame, league: str, season: int, dataset: str = 'games') -> str:
+    """Atomically write (replace) one league/season partition and return its path."""
+    path = partition_path(league, season, dataset)
+    write_frame(df, path)
+    logger.info(f"Stored {len(df)} rows in {path}")
+    return path
+
+def read_partition(league: str, season: int, dataset: str = 'games',
+                   columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Read one partition, optionally only some columns; None if it is missing or unreadable."""
+    path = find_partition(league, season, dataset)
+    if path is None:
+        return None
+    try:
+        return read_frame(path, columns)
+    except Exception as e:
+        logger.error(f"Error reading partition {path}: {str(e)}")
+        return None
+
+def read_seasons(league: str, seasons: List[int], dataset: str = 'games',
+                 columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+    """Concatenate the partitions available for the given seasons; None if there are none."""
+    frames = [df for df in (read_partition(league, season, dataset, columns) for season in seasons) if df is not None]
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
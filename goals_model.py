@@ -0,0 +1,285 @@
+# goals_model.py
+# Statistical goals model (Poisson with optional Dixon-Coles correction) as a fast baseline predictor
+import pandas as pd
+import numpy as np
+import game_store
+import team_features
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Scorelines up to MAX_GOALS per side; the remaining tail mass is negligible for football scores
+MAX_GOALS = 10
+# Typical top-flight goals per game, used when a team has no history at the venue
+DEFAULT_HOME_GOALS = 1.5
+DEFAULT_AWAY_GOALS = 1.15
+MIN_EXPECTED_GOALS = 0.1
+
+# Fitted per-league parameters. Artifacts are versioned by MODEL_VERSION and keyed by a hash
+# of the results they were fitted on, so a league is only refit when its results change.
+MODEL_VERSION = 1
+MODEL_DIR = os.path.join(game_store.GAME_STORE_DIR, 'models')
+# Artifacts kept per league; a few, so callers fitting different season ranges don't evict each other
+MODEL_KEEP = 3
+FIT_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']
+FIT_ITERATIONS = 200
+FIT_TOLERANCE = 1e-8
+# Older results count less: weight halves every DECAY_HALF_LIFE_DAYS (0 disables decay)
+DECAY_HALF_LIFE_DAYS = float(os.environ.get('GOALS_MODEL_HALF_LIFE_DAYS', 365))
+RHO_GRID = np.linspace(-0.2, 0.2, 81)
+
+_models: Dict[str, Tuple[Tuple, Dict[str, Any]]] = {}
+_models_lock = threading.Lock()
+
+_goal_counts = np.arange(MAX_GOALS + 1)
+_log_factorials = np.concatenate([[0.0], np.cumsum(np.log(np.arange(1, MAX_GOALS + 1)))])
+
+def poisson_pmf(expected: float) -> np.ndarray:
+    """P(k goals) for k = 0..MAX_GOALS under a Poisson with the given mean."""
+    return np.exp(_goal_counts * np.log(expected) - expected - _log_factorials)
+
+def score_matrix(home_expected: float, away_expected: float, rho: float = 0.0) -> np.ndarray:
+    """
+    Probability of each scoreline; entry [i, j] is P(home scores i, away scores j).
+
+    rho is the Dixon-Coles dependence parameter for the 0-0, 1-0, 0-1 and 1-1
+    scores; 0 gives independent Poisson goals.
+    """
+    matrix = np.outer(poisson_pmf(home_expected), poisson_pmf(away_expected))
+    if rho:
+        matrix[0, 0] *= 1 - home_expected * away_expected * rho
+        matrix[0, 1] *= 1 + home_expected * rho
+        matrix[1, 0] *= 1 + away_expected * rho
+        matrix[1, 1] *= 1 - rho
+    return matrix / matrix.sum()
+
+def outcome_probabilities(matrix: np.ndarray) -> Dict[str, float]:
+    """Home/draw/away and over/under 2.5 goals probabilities from a score matrix."""
+    total_goals = _goal_counts[:, None] + _goal_counts[None, :]
+    over = float(matrix[total_goals > 2].sum())
+    return {
+        'home': float(np.tril(matrix, -1).sum()),
+        'draw': float(np.trace(matrix)),
+        'away': float(np.triu(matrix, 1).sum()),
+        'over_2_5': over,
+        'under_2_5': 1.0 - over
+    }
+
+def expected_goals_from_stats(team_stats: Dict[str, Any], opp_stats: Dict[str, Any]) -> Tuple[float, float]:
+    """
+    Expected goals for the home and away side from compute_team_stats-style averages.
+
+    Each side's rate averages its own scoring rate with the opponent's
+    conceding rate at the respective venues.
+    """
+    if team_stats.get('total_games', 0) > 0:
+        home_scored, home_conceded = team_stats['goals_scored_avg'], team_stats['goals_conceded_avg']
+    else:
+        home_scored, home_conceded = DEFAULT_HOME_GOALS, DEFAULT_AWAY_GOALS
+    if opp_stats.get('total_games', 0) > 0:
+        away_scored, away_conceded = opp_stats['goals_scored_avg'], opp_stats['goals_conceded_avg']
+    else:
+        away_scored, away_conceded = DEFAULT_AWAY_GOALS, DEFAULT_HOME_GOALS
+    home_expected = max((home_scored + away_conceded) / 2, MIN_EXPECTED_GOALS)
+    away_expected = max((away_scored + home_conceded) / 2, MIN_EXPECTED_GOALS)
+    return float(home_expected), float(away_expected)
+
+def predict_match(home_expected: float, away_expected: float, home_team: str, away_team: str,
+                  rho: float = 0.0) -> Dict[str, Any]:
+    """Predictions in the same shape as the LLM path (outcome, goals), plus the model's probabilities."""
+    probabilities = outcome_probabilities(score_matrix(home_expected, away_expected, rho))
+    favourite = max(('home', 'draw', 'away'), key=probabilities.get)
+    outcome = {'home': f"{home_team} win", 'draw': "Draw", 'away': f"{away_team} win"}[favourite]
+    goals = "Over 2.5 goals" if probabilities['over_2_5'] >= 0.5 else "Under 2.5 goals"
+    return {
+        'outcome': (f"{outcome} because the goals model gives {probabilities[favourite]:.0%} "
+                    f"(home {probabilities['home']:.0%}, draw {probabilities['draw']:.0%}, away {probabilities['away']:.0%})"),
+        'goals': (f"{goals} because the goals model gives {max(probabilities['over_2_5'], probabilities['under_2_5']):.0%} "
+                  f"with expected goals {home_expected:.2f}-{away_expected:.2f}"),
+        'model': 'poisson',
+        'probabilities': probabilities,
+        'expected_goals': {'home': home_expected, 'away': away_expected}
+    }
+
+def predict_from_team_stats(team_stats: Dict[str, Any], opp_stats: Dict[str, Any],
+                            home_team: str, away_team: str) -> Dict[str, Any]:
+    """Baseline prediction for one fixture from home/away team stats."""
+    home_expected, away_expected = expected_goals_from_stats(team_stats, opp_stats)
+    return predict_match(home_expected, away_expected, home_team, away_team)
+
+def results_snapshot(games: pd.DataFrame) -> str:
+    """Short content hash of the results a model is fitted on."""
+    rows = games[FIT_COLUMNS].astype(str).sort_values(FIT_COLUMNS)
+    return hashlib.sha256(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+def dixon_coles_rho(home_goals: np.ndarray, away_goals: np.ndarray, home_expected: np.ndarray,
+                    away_expected: np.ndarray, weights: np.ndarray) -> float:
+    """Pick the rho on RHO_GRID maximizing the weighted Dixon-Coles correction log-likelihood."""
+    low = (home_goals <= 1) & (away_goals <= 1)
+    x, y = home_goals[low], away_goals[low]
+    lam, mu, w = home_expected[low][None, :], away_expected[low][None, :], weights[low][None, :]
+    rho = RHO_GRID[:, None]
+    tau = np.select(
+        [(x == 0) & (y == 0), (x == 0) & (y == 1), (x == 1) & (y == 0)],
+        [1 - lam * mu * rho, 1 + lam * rho, 1 + mu * rho],
+        default=1 - rho
+    )
+    loglik = np.where(tau > 0, w * np.log(np.clip(tau, 1e-12, None)), -np.inf).sum(axis=1)
+    return float(RHO_GRID[np.argmax(loglik)])
+
+def fit_league_model(games: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Fit attack/defence strengths, home advantage and Dixon-Coles rho for one league.
+
+    Goals are modelled as home ~ Poisson(base * home * attack[h] * defence[a]) and
+    away ~ Poisson(base * attack[a] * defence[h]). The weighted maximum likelihood
+    is found by vectorized coordinate updates (each parameter has a closed-form
+    update given the others), with attack and defence normalized to mean 1.
+    """
+    games = games.dropna(subset=FIT_COLUMNS[1:])
+    key_of = team_features.team_key_map(pd.concat([games['HomeTeam'], games['AwayTeam']]))
+    teams = sorted(set(key_of.values()))
+    index = {team: i for i, team in enumerate(teams)}
+    home = games['HomeTeam'].map(key_of).map(index).to_numpy()
+    away = games['AwayTeam'].map(key_of).map(index).to_numpy()
+    home_goals = games['FTHG'].to_numpy(dtype=float)
+    away_goals = games['FTAG'].to_numpy(dtype=float)
+    n = len(teams)
+
+    dates = game_store.parse_date_column(games['Date'])
+    if DECAY_HALF_LIFE_DAYS > 0 and dates.notna().any():
+        age_days = (dates.max() - dates).dt.days.fillna(0).to_numpy(dtype=float)
+        weights = 0.5 ** (age_days / DECAY_HALF_LIFE_DAYS)
+    else:
+        weights = np.ones(len(games))
+
+    def weighted_sum(idx: np.ndarray, values: np.ndarray) -> np.ndarray:
+        return np.bincount(idx, weights=weights * values, minlength=n)
+
+    scored = weighted_sum(home, home_goals) + weighted_sum(away, away_goals)
+    conceded = weighted_sum(home, away_goals) + weighted_sum(away, home_goals)
+    attack = np.ones(n)
+    defence = np.ones(n)
+    base = (weights @ (home_goals + away_goals)) / (2 * weights.sum())
+    home_advantage = 1.0
+    for iteration in range(FIT_ITERATIONS):
+        previous = np.concatenate([attack, defence, [base, home_advantage]])
+        # Expected goals divided by the parameter being updated
+        attack = scored / np.maximum(
+            weighted_sum(home, base * home_advantage * defence[away]) + weighted_sum(away, base * defence[home]), 1e-12)
+        attack /= attack.mean()
+        defence = conceded / np.maximum(
+            weighted_sum(away, base * home_advantage * attack[home]) + weighted_sum(home, base * attack[away]), 1e-12)
+        defence /= defence.mean()
+        home_advantage = (weights @ home_goals) / (weights @ (base * attack[home] * defence[away]))
+        base = (weights @ (home_goals + away_goals)) / (
+            weights @ (home_advantage * attack[home] * defence[away] + attack[away] * defence[home]))
+        current = np.concatenate([attack, defence, [base, home_advantage]])
+        if np.abs(current - previous).max() < FIT_TOLERANCE:
+            break
+
+    home_expected = base * home_advantage * attack[home] * defence[away]
+    away_expected = base * attack[away] * defence[home]
+    rho = dixon_coles_rho(home_goals, away_goals, home_expected, away_expected, weights)
+    return {
+        'version': MODEL_VERSION,
+        'snapshot': results_snapshot(games),
+        'fitted_at': datetime.now().isoformat(),
+        'matches': int(len(games)),
+        'iterations': iteration + 1,
+        'base': float(base),
+        'home_advantage': float(home_advantage),
+        'rho': rho,
+        'teams': {team: {'attack': float(attack[i]), 'defence': float(defence[i])} for i, team in enumerate(teams)}
+    }
+
+def model_path(league: str, snapshot: str) -> str:
+    """Artifact path for a league model fitted on a given results snapshot."""
+    return os.path.join(MODEL_DIR, f"league={game_store.league_slug(league)}", f"v{MODEL_VERSION}-{snapshot}.json")
+
+def load_or_fit_league_model(league: str, games: pd.DataFrame) -> Dict[str, Any]:
+    """Return the stored model for these results, fitting and saving one if none exists."""
+    path = model_path(league, results_snapshot(games))
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading goals model {path}: {str(e)}")
+    model = fit_league_model(games)
+    with game_store.atomic_path(path) as tmp_path:
+        with open(tmp_path, 'w') as f:
+            json.dump(model, f, indent=2)
+    logger.info(f"Fitted goals model for {league} on {model['matches']} matches in {model['iterations']} iterations")
+    prune_league_models(league)
+    return model
+
+def prune_league_models(league: str, keep: int = MODEL_KEEP) -> None:
+    """Delete all but the keep most recently written model artifacts of a league."""
+    directory = os.path.dirname(model_path(league, ''))
+    try:
+        artifacts = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith('.json')),
+            key=os.path.getmtime, reverse=True
+        )
+        for stale in artifacts[keep:]:
+            os.remove(stale)
+    except OSError as e:
+        logger.warning(f"Error pruning goals models for {league}: {str(e)}")
+
+def get_league_model(league: str, seasons: Iterable[int]) -> Optional[Dict[str, Any]]:
+    """
+    Model for a league's stored seasons, or None if the game store has none.
+
+    Stored partitions are only re-read (and the model only reloaded or
+    refit) when one of them has been rewritten since the last call.
+    """
+    seasons = list(seasons)
+    paths = [path for path in (game_store.find_partition(league, season) for season in seasons) if path]
+    if not paths:
+        return None
+    signature = tuple((path, os.path.getmtime(path)) for path in paths)
+    with _models_lock:
+        cached = _models.get(league)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    games = game_store.read_seasons(league, seasons, columns=FIT_COLUMNS)
+    if games is None or games.empty:
+        return None
+    model = load_or_fit_league_model(league, games)
+    with _models_lock:
+        _models[league] = (signature, model)
+    return model
+
+def model_expected_goals(model: Dict[str, Any], home_team: str, away_team: str) -> Optional[Tuple[float, float]]:
+    """Expected goals for a fixture from fitted parameters; None if either team is unknown to the model."""
+    home = model['teams'].get(team_features.normalize_team_name(home_team))
+    away = model['teams'].get(team_features.normalize_team_name(away_team))
+    if home is None or away is None:
+        return None
+    home_expected = max(model['base'] * model['home_advantage'] * home['attack'] * away['defence'], MIN_EXPECTED_GOALS)
+    away_expected = max(model['base'] * away['attack'] * home['defence'], MIN_EXPECTED_GOALS)
+    return float(home_expected), float(away_expected)
+
+def predict_fixture(team_stats: Dict[str, Any], opp_stats: Dict[str, Any], home_team: str, away_team: str,
+                    league: Optional[str] = None, seasons: Optional[Iterable[int]] = None) -> Dict[str, Any]:
+    """Baseline prediction from the fitted league model when available, else from venue averages."""
+    if league and seasons is not None:
+        try:
+            model = get_league_model(league, seasons)
+            expected = model_expected_goals(model, home_team, away_team) if model else None
+            if expected is not None:
+                prediction = predict_match(expected[0], expected[1], home_team, away_team, model['rho'])
+                prediction['model'] = f"dixon-coles-v{model['version']}-{model['snapshot']}"
+                return prediction
+        except Exception as e:
+            logger.error(f"Error using fitted goals model for {league}: {str(e)}")
+    return predict_from_team_stats(team_stats, opp_stats, home_team, away_team)
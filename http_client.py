@@ -0,0 +1,130 @@
+# http_client.py
+# Shared HTTP client: per-host keep-alive pools, timeouts, retry/backoff and concurrency limits
+import requests
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Browser-like User-Agent; football-data.co.uk and soccerstats reject the requests default
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Per-host policies. timeout is (connect, read) seconds; retries apply to idempotent
+# methods on connection errors and retryable status codes, with exponential backoff.
+DEFAULT_POLICY = {'timeout': (5, 30), 'retries': 3, 'backoff': 1.0, 'max_concurrency': 8}
+HOST_POLICIES: Dict[str, Dict] = {
+    'www.football-data.co.uk': {'timeout': (5, 20), 'retries': 3, 'backoff': 2.0, 'max_concurrency': 4},
+    'archive-api.open-meteo.com': {'timeout': (5, 30), 'retries': 3, 'backoff': 1.0, 'max_concurrency': 4},
+    'api.open-meteo.com': {'timeout': (5, 10), 'retries': 3, 'backoff': 1.0, 'max_concurrency': 4},
+    'www.soccerstats.com': {'timeout': (5, 10), 'retries': 2, 'backoff': 1.0, 'max_concurrency': 2},
+    'localhost:1234': {
+        'timeout': (5, float(os.environ.get('LM_STUDIO_TIMEOUT', 300))),
+        'retries': 0,
+        'backoff': 0.0,
+        'max_concurrency': int(os.environ.get('LM_STUDIO_MAX_CONCURRENCY', 4))
+    },
+}
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_mounted_hosts = set()
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+def get_policy(host: str) -> Dict:
+    """Return the policy for a host (netloc), falling back to DEFAULT_POLICY."""
+    return {**DEFAULT_POLICY, **HOST_POLICIES.get(host, {})}
+
+def configure_host(host: str, **policy) -> None:
+    """Override policy values for a host; takes effect for connections opened afterwards."""
+    with _lock:
+        HOST_POLICIES[host] = {**HOST_POLICIES.get(host, {}), **policy}
+        _mounted_hosts.discard(host)
+        _semaphores.pop(host, None)
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, recreating it after a fork."""
+    global _session, _session_pid
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = requests.Session()
+            _session.headers.update(DEFAULT_HEADERS)
+            _session_pid = os.getpid()
+            _mounted_hosts.clear()
+            _semaphores.clear()
+        return _session
+
+def _mount_host(session: requests.Session, scheme: str, host: str) -> None:
+    with _lock:
+        if host in _mounted_hosts:
+            return
+        policy = get_policy(host)
+        retry = Retry(
+            total=policy['retries'],
+            backoff_factor=policy['backoff'],
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=policy['max_concurrency'], max_retries=retry)
+        session.mount(f"{scheme}://{host}/", adapter)
+        _mounted_hosts.add(host)
+
+@contextmanager
+def host_slot(host: str) -> Iterator[None]:
+    """Hold one of the host's concurrency slots for the duration of the block."""
+    with _lock:
+        semaphore = _semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(get_policy(host)['max_concurrency'])
+            _semaphores[host] = semaphore
+    with semaphore:
+        yield
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session using the host's policy."""
+    parsed = urlparse(url)
+    host = parsed.netloc
+    session = get_session()
+    _mount_host(session, parsed.scheme, host)
+    kwargs.setdefault('timeout', get_policy(host)['timeout'])
+    with host_slot(host):
+        return session.request(method, url, **kwargs)
+
+@contextmanager
+def stream(method: str, url: str, **kwargs) -> Iterator[requests.Response]:
+    """
+    Send a streaming request, holding the host's concurrency slot until the block exits.
+
+    The response is closed on exit, which also tells the server to stop sending.
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc
+    session = get_session()
+    _mount_host(session, parsed.scheme, host)
+    kwargs.setdefault('timeout', get_policy(host)['timeout'])
+    with host_slot(host):
+        response = session.request(method, url, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
+
+def get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session."""
+    return request('GET', url, **kwargs)
+
+def post(url: str, **kwargs) -> requests.Response:
+    """POST through the shared session (never retried automatically)."""
+    return request('POST', url, **kwargs)
@@ -0,0 +1,101 @@
+# ingest.py
+# Bulk ingestion: fetch and clean every league x season into the game store, once or on a schedule
+import treatment
+import url
+import team_features
+import goals_model
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.FileHandler('ingest.log'), logging.StreamHandler()]
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_SEASON = 2020
+# Downloads are also capped per host by http_client, so extra workers mostly overlap parsing
+INGEST_WORKERS = 8
+
+def ingest_season(league: str, season: int) -> Tuple[str, int, int]:
+    """Fetch, clean and store one league/season partition. Returns (league, season, rows stored)."""
+    # load_season writes fetched seasons and their team features through to the game store
+    dfs = treatment.load_season(league, season, use_store=False)
+    if not dfs:
+        logger.warning(f"No data ingested for {league} {season}/{season + 1}")
+        return league, season, 0
+    return league, season, sum(len(df) for df in dfs)
+
+def ingest_all(leagues: Optional[List[str]] = None, season_start: int = DEFAULT_FIRST_SEASON,
+               season_end: Optional[int] = None, max_workers: int = INGEST_WORKERS) -> Dict[str, Dict[int, int]]:
+    """
+    Ingest every league x season in parallel.
+
+    Completed seasons are skipped once stored after they ended, so a partition
+    written mid-season is refreshed one last time; the live season is always refreshed.
+    Goals models of leagues whose results changed are refit afterwards.
+    Returns rows stored per league and season (0 for failures).
+    """
+    leagues = leagues or url.available_leagues
+    live_season = treatment.current_season_start()
+    season_end = season_end if season_end is not None else live_season
+
+    tasks = []
+    for league in leagues:
+        if league not in url.available_leagues:
+            logger.error(f"League {league} not supported, skipping")
+            continue
+        for season in range(season_start, season_end + 1):
+            if season < live_season and treatment.stored_season_is_final(league, season):
+                logger.info(f"{league} {season}/{season + 1} already ingested")
+                team_features.ensure_team_features(league, season)
+                continue
+            tasks.append((league, season))
+
+    summary: Dict[str, Dict[int, int]] = {league: {} for league in leagues}
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(ingest_season, league, season) for league, season in tasks]
+        for (league, season), future in zip(tasks, futures):
+            try:
+                _, _, rows = future.result()
+            except Exception as e:
+                logger.error(f"Ingestion failed for {league} {season}/{season + 1}: {str(e)}")
+                rows = 0
+            summary[league][season] = rows
+    logger.info(f"Ingested {len(tasks)} partitions in {time.time() - start:.1f}s")
+
+    # Refit goals models where results changed, so predictions only do a parameter lookup
+    for league in summary:
+        try:
+            goals_model.get_league_model(league, range(season_start, season_end + 1))
+        except Exception as e:
+            logger.error(f"Goals model fit failed for {league}: {str(e)}")
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest football-data.co.uk seasons into the game store")
+    parser.add_argument('--league', action='append', dest='leagues', help="League to ingest (repeatable, default all)")
+    parser.add_argument('--start', type=int, default=DEFAULT_FIRST_SEASON, help="First season start year")
+    parser.add_argument('--end', type=int, default=None, help="Last season start year (default current season)")
+    parser.add_argument('--workers', type=int, default=INGEST_WORKERS, help="Parallel ingestion workers")
+    parser.add_argument('--every', type=float, default=0,
+                        help="Repeat every N minutes instead of running once (0 = run once, e.g. from cron)")
+    args = parser.parse_args()
+
+    while True:
+        summary = ingest_all(args.leagues, args.start, args.end, args.workers)
+        for league, seasons in summary.items():
+            for season, rows in sorted(seasons.items()):
+                print(f"{league} {season}/{season + 1}: {rows} rows")
+        if args.every <= 0:
+            break
+        time.sleep(args.every * 60)
+
+if __name__ == "__main__":
+    main()
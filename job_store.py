@@ -0,0 +1,315 @@
+# job_store.py
+# Job status stores for the prediction API: in-memory with TTL/LRU eviction, or shared SQLite
+import json
+import logging
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Records of unfinished jobs are never evicted, so a running job keeps its workspace
+ACTIVE_SQL = "json_extract(record, '$.finished_at') IS NULL"
+
+def record_size(record: Dict[str, Any]) -> int:
+    """Approximate size of a job record in bytes, as serialized JSON."""
+    return len(json.dumps(record, default=str))
+
+def is_active(record: Dict[str, Any]) -> bool:
+    """Whether a record belongs to an unfinished job (finished_at missing or None)."""
+    return record.get('finished_at') is None
+
+class JobStore(ABC):
+    """
+    Interface for job status storage.
+
+    Records are plain dicts. Callers must go through update() rather than
+    mutating a record returned by get(), since backends may return copies.
+    Records without a finished_at value are active and exempt from TTL and
+    LRU eviction. shared is True for backends visible to every worker process.
+    """
+
+    shared = False
+
+    def __init__(self, ttl_seconds: float = 3600, max_jobs: int = 1000,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self.on_evict = on_evict
+
+    @abstractmethod
+    def create(self, job_id: str, record: Dict[str, Any]) -> None:
+        """Store a new job record."""
+
+    @abstractmethod
+    def try_create(self, job_id: str, record: Dict[str, Any], limit: int, **fields: Any) -> bool:
+        """Store a new job record only if fewer than limit live records match the fields; atomic."""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a live job record, or None if unknown or evicted."""
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Set fields on a job record."""
+
+    @abstractmethod
+    def count(self, **fields: Any) -> int:
+        """Number of live records whose fields equal the given values (None matches missing)."""
+
+    @abstractmethod
+    def find(self, **fields: Any) -> List[str]:
+        """IDs of live records whose fields equal the given values (None matches missing)."""
+
+    @abstractmethod
+    def latest(self, **fields: Any) -> Optional[str]:
+        """ID of the most recently updated live record matching the fields, or None."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Store size for the /api/jobs endpoint."""
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get(job_id) is not None
+
+    def _evicted(self, job_id: str) -> None:
+        if self.on_evict:
+            try:
+                self.on_evict(job_id)
+            except Exception as e:
+                logger.error(f"Error in eviction callback for job {job_id}: {str(e)}")
+
+class MemoryJobStore(JobStore):
+    """Process-local job store with TTL expiry, LRU eviction and a total size budget."""
+
+    def __init__(self, ttl_seconds: float = 3600, max_jobs: int = 1000, max_bytes: int = 64 * 1024 * 1024,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(ttl_seconds, max_jobs, on_evict)
+        self.max_bytes = max_bytes
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._touched: Dict[str, float] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+
+    def _remove(self, job_id: str) -> None:
+        self._records.pop(job_id, None)
+        self._total_bytes -= self._sizes.pop(job_id, 0)
+        self._touched.pop(job_id, None)
+        self._evicted(job_id)
+
+    def _evict(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [j for j, touched in self._touched.items() if touched < cutoff and not is_active(self._records[j])]
+        for job_id in expired:
+            self._remove(job_id)
+        for job_id in [j for j, record in self._records.items() if not is_active(record)]:
+            if len(self._records) <= self.max_jobs and self._total_bytes <= self.max_bytes:
+                break
+            self._remove(job_id)
+
+    def _store(self, job_id: str, record: Dict[str, Any]) -> None:
+        size = record_size(record)
+        self._total_bytes += size - self._sizes.get(job_id, 0)
+        self._sizes[job_id] = size
+        self._records[job_id] = record
+        self._records.move_to_end(job_id)
+        self._touched[job_id] = time.time()
+        self._evict()
+
+    def create(self, job_id: str, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._store(job_id, dict(record))
+
+    def try_create(self, job_id: str, record: Dict[str, Any], limit: int, **fields: Any) -> bool:
+        with self._lock:
+            self._evict()
+            if len(self._matching(fields)) >= limit:
+                return False
+            self._store(job_id, dict(record))
+            return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._evict()
+            record = self._records.get(job_id)
+            if record is None:
+                return None
+            self._records.move_to_end(job_id)
+            return dict(record)
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                logger.warning(f"Update for unknown or evicted job {job_id}")
+                return
+            record.update(fields)
+            self._store(job_id, record)
+
+    def _matching(self, fields: Dict[str, Any]) -> List[str]:
+        return [job_id for job_id, record in self._records.items()
+                if all(record.get(key) == value for key, value in fields.items())]
+
+    def count(self, **fields: Any) -> int:
+        with self._lock:
+            self._evict()
+            return len(self._matching(fields))
+
+    def find(self, **fields: Any) -> List[str]:
+        with self._lock:
+            self._evict()
+            return self._matching(fields)
+
+    def latest(self, **fields: Any) -> Optional[str]:
+        with self._lock:
+            self._evict()
+            return max(self._matching(fields), key=self._touched.get, default=None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': 'memory', 'jobs': len(self._records), 'bytes': self._total_bytes}
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite file, so status survives restarts and is shared across worker processes."""
+
+    shared = True
+
+    def __init__(self, path: str = "jobs.db", ttl_seconds: float = 3600, max_jobs: int = 1000,
+                 on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__(ttl_seconds, max_jobs, on_evict)
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _evict(self, conn: sqlite3.Connection) -> List[str]:
+        cutoff = time.time() - self.ttl_seconds
+        expired = [row[0] for row in conn.execute(
+            f"SELECT job_id FROM jobs WHERE updated_at < ? AND NOT {ACTIVE_SQL}", (cutoff,)
+        )]
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in expired])
+        excess = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] - self.max_jobs
+        overflow = [row[0] for row in conn.execute(
+            f"SELECT job_id FROM jobs WHERE NOT {ACTIVE_SQL} ORDER BY updated_at LIMIT ?", (max(excess, 0),)
+        )]
+        conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in overflow])
+        return expired + overflow
+
+    def _insert(self, conn: sqlite3.Connection, job_id: str, record: Dict[str, Any]) -> List[str]:
+        payload = json.dumps(record, default=str)
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, record, size, updated_at) VALUES (?, ?, ?, ?)",
+            (job_id, payload, len(payload), time.time())
+        )
+        return self._evict(conn)
+
+    def _report(self, evicted: List[str]) -> None:
+        for evicted_id in evicted:
+            self._evicted(evicted_id)
+
+    def _write(self, job_id: str, record: Dict[str, Any]) -> None:
+        conn = self._connect()
+        with conn:
+            evicted = self._insert(conn, job_id, record)
+        self._report(evicted)
+
+    def create(self, job_id: str, record: Dict[str, Any]) -> None:
+        self._write(job_id, record)
+
+    def try_create(self, job_id: str, record: Dict[str, Any], limit: int, **fields: Any) -> bool:
+        where, params = self._where(fields)
+        conn = self._connect()
+        with conn:
+            # Take the database write lock before counting, so two workers can't both pass the check
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute(f"SELECT COUNT(*) FROM jobs WHERE {where}", params).fetchone()[0] >= limit:
+                return False
+            evicted = self._insert(conn, job_id, record)
+        self._report(evicted)
+        return True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            f"SELECT record FROM jobs WHERE job_id = ? AND (updated_at >= ? OR {ACTIVE_SQL})",
+            (job_id, time.time() - self.ttl_seconds)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        # Serialize read-modify-write within this process; updates for one
+        # job only ever come from the worker that runs it
+        with self._lock:
+            record = self.get(job_id)
+            if record is None:
+                logger.warning(f"Update for unknown or evicted job {job_id}")
+                return
+            record.update(fields)
+            self._write(job_id, record)
+
+    def _where(self, fields: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses, params = [f"(updated_at >= ? OR {ACTIVE_SQL})"], [time.time() - self.ttl_seconds]
+        for key, value in fields.items():
+            if value is None:
+                clauses.append("json_extract(record, ?) IS NULL")
+                params.append(f"$.{key}")
+            else:
+                clauses.append("json_extract(record, ?) = ?")
+                params.extend([f"$.{key}", value])
+        return " AND ".join(clauses), params
+
+    def count(self, **fields: Any) -> int:
+        where, params = self._where(fields)
+        return self._connect().execute(f"SELECT COUNT(*) FROM jobs WHERE {where}", params).fetchone()[0]
+
+    def find(self, **fields: Any) -> List[str]:
+        where, params = self._where(fields)
+        return [row[0] for row in self._connect().execute(f"SELECT job_id FROM jobs WHERE {where}", params)]
+
+    def latest(self, **fields: Any) -> Optional[str]:
+        where, params = self._where(fields)
+        row = self._connect().execute(
+            f"SELECT job_id FROM jobs WHERE {where} ORDER BY updated_at DESC LIMIT 1", params
+        ).fetchone()
+        return row[0] if row else None
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM jobs").fetchone()
+        return {'backend': 'sqlite', 'jobs': count, 'bytes': total}
+
+def create_job_store(on_evict: Optional[Callable[[str], None]] = None) -> JobStore:
+    """Build the job store configured by JOB_STORE_BACKEND (memory or sqlite) and related env vars."""
+    backend = os.environ.get('JOB_STORE_BACKEND', 'memory').lower()
+    ttl_seconds = float(os.environ.get('JOB_TTL_SECONDS', 3600))
+    max_jobs = int(os.environ.get('JOB_STORE_MAX_JOBS', 1000))
+    if backend == 'sqlite':
+        path = os.environ.get('JOB_STORE_PATH', 'jobs.db')
+        logger.info(f"Using SQLite job store at {path}")
+        return SQLiteJobStore(path, ttl_seconds=ttl_seconds, max_jobs=max_jobs, on_evict=on_evict)
+    max_bytes = int(os.environ.get('JOB_STORE_MAX_BYTES', 64 * 1024 * 1024))
+    return MemoryJobStore(ttl_seconds=ttl_seconds, max_jobs=max_jobs, max_bytes=max_bytes, on_evict=on_evict)
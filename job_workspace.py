@@ -0,0 +1,105 @@
+# job_workspace.py
+# Per-job workspaces that hold pipeline DataFrames in memory, with optional CSV artifacts
+import pandas as pd
+import game_store
+import team_features
+import logging
+import os
+import shutil
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Artifacts are typed columnar files (parquet, or feather/csv via JOB_ARTIFACT_FORMAT);
+# a CSV copy for spreadsheets and external tools is opt-in with EXPORT_CSV_ARTIFACTS=1
+ARTIFACT_FORMAT = os.environ.get('JOB_ARTIFACT_FORMAT', game_store.STORE_FORMAT)
+EXPORT_CSV_ARTIFACTS = os.environ.get('EXPORT_CSV_ARTIFACTS', '0') == '1'
+
+class JobWorkspace:
+    """
+    DataFrames for one pipeline run, keyed by artifact name (e.g. "TeamGames").
+
+    Frames are passed between stages in memory. When save_artifacts is set,
+    each frame is also written to <directory>/<name>.<artifact_format> (and
+    <name>.csv if export_csv is set); frames missing from memory are read
+    back from that directory. Team key columns stay in memory only and are
+    left out of artifacts.
+    """
+
+    def __init__(self, directory: Optional[str] = None, save_artifacts: bool = True,
+                 artifact_format: Optional[str] = None, export_csv: Optional[bool] = None):
+        self.directory = directory or os.getcwd()
+        self.save_artifacts = save_artifacts
+        self.artifact_format = artifact_format or ARTIFACT_FORMAT
+        self.export_csv = EXPORT_CSV_ARTIFACTS if export_csv is None else export_csv
+        self.frames: Dict[str, pd.DataFrame] = {}
+
+    def path(self, name: str, fmt: Optional[str] = None) -> str:
+        """Return the artifact path for a frame name in the given (default: workspace) format."""
+        return os.path.join(self.directory, f"{name}.{fmt or self.artifact_format}")
+
+    def artifact(self, name: str) -> Optional[str]:
+        """Return the path of an existing artifact, preferring the columnar format over CSV."""
+        for fmt in (self.artifact_format, 'csv'):
+            if os.path.exists(self.path(name, fmt)):
+                return self.path(name, fmt)
+        return None
+
+    def put(self, name: str, df: pd.DataFrame) -> None:
+        """Store a frame and, if enabled, write it as an artifact."""
+        self.frames[name] = df
+        if self.save_artifacts:
+            df = team_features.drop_team_keys(df)
+            try:
+                game_store.write_frame(df, self.path(name))
+            except Exception as e:
+                # Mixed-type object columns can't be stored as columnar; keep a CSV instead
+                logger.warning(f"Could not write {name} as {self.artifact_format}, saving CSV: {str(e)}")
+                if os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+                game_store.write_frame(df, self.path(name, 'csv'))
+            if self.export_csv and self.artifact_format != 'csv':
+                df.to_csv(self.path(name, 'csv'), index=False, date_format=game_store.CSV_DATE_FORMAT)
+            logger.info(f"Saved {name} to {self.directory}")
+
+    def get(self, name: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        Return a copy of a frame, falling back to its artifact; None if neither exists.
+
+        With columns, only those columns (where present) are returned, and an
+        artifact read from disk loads just those columns.
+        """
+        if name in self.frames:
+            df = self.frames[name]
+            if columns is not None:
+                df = df[[c for c in columns if c in df.columns]]
+            return df.copy()
+        path = self.artifact(name)
+        if path is None:
+            return None
+        if columns is not None:
+            try:
+                return game_store.read_frame(path, columns)
+            except (KeyError, ValueError) as e:
+                logger.warning(f"Column-selective read of {path} failed, loading all columns: {str(e)}")
+        df = game_store.read_frame(path)
+        self.frames[name] = df
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        return df.copy()
+
+    def has(self, name: str) -> bool:
+        """Check whether a frame is available in memory or on disk."""
+        return name in self.frames or self.artifact(name) is not None
+
+    def cleanup(self) -> None:
+        """Drop in-memory frames and remove the workspace directory if it is not the CWD."""
+        self.frames.clear()
+        if os.path.abspath(self.directory) != os.path.abspath(os.getcwd()) and os.path.isdir(self.directory):
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+def default_workspace() -> JobWorkspace:
+    """Workspace used when none is given: the CWD, with artifacts enabled."""
+    return JobWorkspace(os.getcwd(), save_artifacts=True)
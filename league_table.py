@@ -1,9 +1,11 @@
 # league_table.py
 # Functions for building league tables and updating team positions
 import pandas as pd
+import numpy as np
 import logging
-import os
-from datetime import datetime
+from typing import Dict, List, Optional
+import game_store
+from job_workspace import JobWorkspace, default_workspace
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +15,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Columns needed to build tables from AllGames; reads load only these
+RESULT_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'Season']
+
 def extract_season_from_date(date_str: str, default_season: str = "2024/2025") -> str:
     """Extract season from a date string."""
     try:
@@ -26,111 +31,140 @@ def extract_season_from_date(date_str: str, default_season: str = "2024/2025") -
         return default_season
 
 def build_league_table_from_games(games_df: pd.DataFrame, league_name: str) -> pd.DataFrame:
-    """Build a league table from game data."""
+    """Build a league table from game data.
+
+    Home and away perspectives are stacked into one long frame and
+    aggregated with a single groupby; ties are ordered by Points, GD, GF.
+    """
     try:
-        teams = set(games_df['HomeTeam']).union(set(games_df['AwayTeam']))
-        table = {
-            'Team': [],
-            'Played': [],
-            'Won': [],
-            'Drawn': [],
-            'Lost': [],
-            'GF': [],
-            'GA': [],
-            'GD': [],
-            'Points': []
-        }
-        
-        for team in teams:
-            home_games = games_df[games_df['HomeTeam'] == team]
-            away_games = games_df[games_df['AwayTeam'] == team]
-            
-            played = len(home_games) + len(away_games)
-            won = len(home_games[home_games['FTR'] == 'H']) + len(away_games[away_games['FTR'] == 'A'])
-            drawn = len(home_games[home_games['FTR'] == 'D']) + len(away_games[away_games['FTR'] == 'D'])
-            lost = played - won - drawn
-            gf = home_games['FTHG'].sum() + away_games['FTAG'].sum()
-            ga = home_games['FTAG'].sum() + away_games['FTHG'].sum()
-            gd = gf - ga
-            points = won * 3 + drawn
-            
-            table['Team'].append(team)
-            table['Played'].append(played)
-            table['Won'].append(won)
-            table['Drawn'].append(drawn)
-            table['Lost'].append(lost)
-            table['GF'].append(gf)
-            table['GA'].append(ga)
-            table['GD'].append(gd)
-            table['Points'].append(points)
-        
-        table_df = pd.DataFrame(table)
-        table_df = table_df.sort_values(by=['Points', 'GD', 'GF'], ascending=[False, False, False]).reset_index(drop=True)
+        home = pd.DataFrame({
+            'Team': games_df['HomeTeam'].to_numpy(),
+            'Won': (games_df['FTR'] == 'H').to_numpy(),
+            'Drawn': (games_df['FTR'] == 'D').to_numpy(),
+            'GF': games_df['FTHG'].to_numpy(),
+            'GA': games_df['FTAG'].to_numpy()
+        })
+        away = pd.DataFrame({
+            'Team': games_df['AwayTeam'].to_numpy(),
+            'Won': (games_df['FTR'] == 'A').to_numpy(),
+            'Drawn': (games_df['FTR'] == 'D').to_numpy(),
+            'GF': games_df['FTAG'].to_numpy(),
+            'GA': games_df['FTHG'].to_numpy()
+        })
+        long_df = pd.concat([home, away], ignore_index=True)
+        
+        table_df = long_df.groupby('Team', sort=True).agg(
+            Played=('Won', 'size'),
+            Won=('Won', 'sum'),
+            Drawn=('Drawn', 'sum'),
+            GF=('GF', 'sum'),
+            GA=('GA', 'sum')
+        ).reset_index()
+        table_df['Lost'] = table_df['Played'] - table_df['Won'] - table_df['Drawn']
+        table_df['GD'] = table_df['GF'] - table_df['GA']
+        table_df['Points'] = table_df['Won'] * 3 + table_df['Drawn']
+        table_df = table_df[['Team', 'Played', 'Won', 'Drawn', 'Lost', 'GF', 'GA', 'GD', 'Points']]
+        
+        table_df = table_df.sort_values(
+            by=['Points', 'GD', 'GF'], ascending=[False, False, False], kind='stable'
+        ).reset_index(drop=True)
         table_df['Position'] = table_df.index + 1
         
-        #logger.info(f"Built league table for {league_name} with {len(teams)} teams")
+        #logger.info(f"Built league table for {league_name} with {len(table_df)} teams")
         return table_df
     except Exception as e:
         logger.error(f"Error building league table: {str(e)}")
         raise
 
+def rank_standings(standings: Dict[str, List[int]]) -> Dict[str, int]:
+    """Map each team to its league position from [points, gd, gf] counters."""
+    ordered = sorted(standings.items(), key=lambda item: (-item[1][0], -item[1][1], -item[1][2], item[0]))
+    return {team: position for position, (team, _) in enumerate(ordered, start=1)}
+
 def add_positions_to_games(games_df: pd.DataFrame, league_name: str) -> pd.DataFrame:
-    """Add HomePosition and AwayPosition columns based on games before each match in the same season."""
+    """Add HomePosition and AwayPosition columns based on games before each match in the same season.
+
+    Matches are replayed in date order while per-team [points, gd, gf]
+    counters are updated in place; positions are snapshotted once per match date.
+    """
     try:
         result_df = games_df.copy()
-        result_df['Date'] = pd.to_datetime(result_df['Date'], dayfirst=True, errors='coerce')
+        result_df['Date'] = game_store.parse_date_column(result_df['Date'])
         result_df = result_df.dropna(subset=['Date', 'Season'])
-        result_df = result_df.sort_values(by=['Season', 'Date'])
-        
-        result_df['HomePosition'] = 0
-        result_df['AwayPosition'] = 0
-        
-        for season, season_games in result_df.groupby('Season'):
-            season_games = season_games.sort_values('Date')
-            prior_games = pd.DataFrame()
+        result_df = result_df.sort_values(by=['Season', 'Date'], kind='stable')
+        
+        seasons = result_df['Season'].to_numpy()
+        dates = result_df['Date'].to_numpy()
+        home_teams = result_df['HomeTeam'].to_numpy()
+        away_teams = result_df['AwayTeam'].to_numpy()
+        home_goals = result_df['FTHG'].to_numpy()
+        away_goals = result_df['FTAG'].to_numpy()
+        results = result_df['FTR'].to_numpy()
+        home_positions = np.zeros(len(result_df), dtype=int)
+        away_positions = np.zeros(len(result_df), dtype=int)
+        
+        standings = {}
+        position_map = {}
+        current_season = None
+        current_date = None
+        for i in range(len(result_df)):
+            if seasons[i] != current_season:
+                current_season = seasons[i]
+                current_date = None
+                standings = {}
+            if dates[i] != current_date:
+                current_date = dates[i]
+                position_map = rank_standings(standings)
+            
+            home, away = home_teams[i], away_teams[i]
+            home_positions[i] = position_map.get(home, 0)
+            away_positions[i] = position_map.get(away, 0)
             
-            for idx, row in season_games.iterrows():
-                match_date = row['Date']
-                prior_games = pd.concat([prior_games, season_games[season_games['Date'] < match_date]])
-                
-                if not prior_games.empty:
-                    table = build_league_table_from_games(prior_games, f"{league_name}_{season}")
-                    position_map = dict(zip(table['Team'], table['Position']))
-                else:
-                    position_map = {team: 0 for team in set(season_games['HomeTeam']).union(set(season_games['AwayTeam']))}
-                
-                result_df.at[idx, 'HomePosition'] = position_map.get(row['HomeTeam'], 0)
-                result_df.at[idx, 'AwayPosition'] = position_map.get(row['AwayTeam'], 0)
-        
-        logger.info("Added position columns to games DataFrame")
+            hg = 0 if pd.isna(home_goals[i]) else int(home_goals[i])
+            ag = 0 if pd.isna(away_goals[i]) else int(away_goals[i])
+            home_row = standings.setdefault(home, [0, 0, 0])
+            away_row = standings.setdefault(away, [0, 0, 0])
+            home_row[0] += 3 if results[i] == 'H' else 1 if results[i] == 'D' else 0
+            away_row[0] += 3 if results[i] == 'A' else 1 if results[i] == 'D' else 0
+            home_row[1] += hg - ag
+            away_row[1] += ag - hg
+            home_row[2] += hg
+            away_row[2] += ag
+        
+        result_df['HomePosition'] = home_positions
+        result_df['AwayPosition'] = away_positions
+        
+        logger.info(f"Added position columns to {len(result_df)} games for {league_name}")
         return result_df
     except Exception as e:
         logger.error(f"Error adding positions to games: {str(e)}")
         raise
 
-def update_all_dataframes_with_positions(league_name: str) -> None:
-    """Update all relevant CSV files with position columns."""
+def update_all_dataframes_with_positions(league_name: str, workspace: Optional[JobWorkspace] = None) -> None:
+    """Update AllGames, TeamGames and OppGames in the workspace with position columns."""
+    workspace = workspace or default_workspace()
     try:
-        for file in ['AllGames.csv', 'TeamGames.csv', 'OppGames.csv']:
-            if os.path.exists(file):
-                df = pd.read_csv(file)
+        for name in ['AllGames', 'TeamGames', 'OppGames']:
+            df = workspace.get(name)
+            if df is not None:
                 df = add_positions_to_games(df, league_name)
-                df.to_csv(file, index=False)
-                logger.info(f"Updated {file} with positions")
+                workspace.put(name, df)
+                logger.info(f"Updated {name} with positions")
             else:
-                logger.warning(f"{file} not found, skipping")
+                logger.warning(f"{name} not found, skipping")
     except Exception as e:
         logger.error(f"Error updating dataframes with positions: {str(e)}")
         raise
 
-def get_current_league_table(league_name: str, season: int) -> pd.DataFrame:
+def get_current_league_table(league_name: str, season: int, workspace: Optional[JobWorkspace] = None) -> pd.DataFrame:
     """Get the current league table for a given season."""
+    workspace = workspace or default_workspace()
     try:
-        if not os.path.exists('AllGames.csv'):
-            logger.error("AllGames.csv not found")
+        games_df = workspace.get('AllGames', columns=RESULT_COLUMNS)
+        if games_df is None:
+            logger.error("AllGames not found")
             return pd.DataFrame()
         
-        games_df = pd.read_csv('AllGames.csv')
         games_df = games_df[games_df['Season'] == f"{season}/{season + 1}"]
         if games_df.empty:
             logger.warning(f"No games found for season {season}/{season + 1}")
@@ -142,15 +176,16 @@ def get_current_league_table(league_name: str, season: int) -> pd.DataFrame:
         logger.error(f"Error getting current league table: {str(e)}")
         return pd.DataFrame()
 
-def update_next_game_with_latest_positions(league_name: str) -> None:
-    """Update NextGame.csv with the latest team positions."""
+def update_next_game_with_latest_positions(league_name: str, workspace: Optional[JobWorkspace] = None) -> None:
+    """Update NextGame with the latest team positions."""
+    workspace = workspace or default_workspace()
     try:
-        if not os.path.exists('NextGame.csv') or not os.path.exists('AllGames.csv'):
-            logger.warning("NextGame.csv or AllGames.csv not found, skipping update")
+        next_game_df = workspace.get('NextGame')
+        games_df = workspace.get('AllGames', columns=RESULT_COLUMNS)
+        if next_game_df is None or games_df is None:
+            logger.warning("NextGame or AllGames not found, skipping update")
             return
         
-        next_game_df = pd.read_csv('NextGame.csv')
-        games_df = pd.read_csv('AllGames.csv')
         table = build_league_table_from_games(games_df, league_name)
         
         position_map = dict(zip(table['Team'], table['Position']))
@@ -158,27 +193,29 @@ def update_next_game_with_latest_positions(league_name: str) -> None:
         next_game_df['HomePosition'] = next_game_df['HomeTeam'].map(position_map).fillna(0).astype(int)
         next_game_df['AwayPosition'] = next_game_df['AwayTeam'].map(position_map).fillna(0).astype(int)
         
-        next_game_df.to_csv('NextGame.csv', index=False)
-        logger.info("Updated NextGame.csv with latest positions")
+        workspace.put('NextGame', next_game_df)
+        logger.info("Updated NextGame with latest positions")
     except Exception as e:
-        logger.error(f"Error updating NextGame.csv: {str(e)}")
+        logger.error(f"Error updating NextGame: {str(e)}")
         raise
 
-def get_team_position_for_matchday(league_name: str, team: str, season: int, matchday: int) -> str:
+def get_team_position_for_matchday(league_name: str, team: str, season: int, matchday: int,
+                                   workspace: Optional[JobWorkspace] = None) -> str:
     """Get team position for a specific matchday in the given season."""
+    workspace = workspace or default_workspace()
     try:
-        if not os.path.exists('AllGames.csv'):
-            logger.error("AllGames.csv not found")
+        games_df = workspace.get('AllGames', columns=RESULT_COLUMNS)
+        if games_df is None:
+            logger.error("AllGames not found")
             return "Unknown"
         
-        games_df = pd.read_csv('AllGames.csv')
         games_df = games_df[games_df['Season'] == f"{season}/{season + 1}"]
         if games_df.empty:
             logger.warning(f"No games found for {league_name} season {season}/{season + 1}")
             return "Unknown"
         
         # Convert dates and sort
-        games_df['Date'] = pd.to_datetime(games_df['Date'], dayfirst=True, errors='coerce')
+        games_df['Date'] = game_store.parse_date_column(games_df['Date'])
         games_df = games_df.dropna(subset=['Date']).sort_values('Date')
         
         # Group by date to estimate matchdays
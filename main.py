@@ -6,8 +6,8 @@ import url
 import league_table
 import weather
 import nextGame
+from job_workspace import default_workspace
 import logging
-import os
 from datetime import datetime
 
 # Configure logging
@@ -78,29 +78,29 @@ def main():
         
         print(f"Processing data for {league} season {season}/{season + 1}...")
         print(f"Clubs: {star_club} vs {opp_club}")
-        error = treatment.handler(season, league, star_club, opp_club)
+        workspace = default_workspace()
+        error = treatment.handler(season, league, star_club, opp_club, workspace=workspace)
         if error:
             print(f"Error processing data: {error}")
             logger.error(f"Error processing data: {error}")
             return
         
-        if not os.path.exists("AllGames.csv"):
-            print("Error: AllGames.csv not found. Cannot proceed.")
-            logger.error("AllGames.csv not found")
+        if not workspace.has("AllGames"):
+            print("Error: AllGames frame not found in the workspace. Cannot proceed.")
+            logger.error("AllGames frame not found in the workspace")
             return
         
         print("Building league table with position information...")
-        league_table.update_all_dataframes_with_positions(league)
+        league_table.update_all_dataframes_with_positions(league, workspace=workspace)
         
         # Load team and opponent games
-        if not os.path.exists("TeamGames.csv") or not os.path.exists("OppGames.csv"):
-            print("Error: TeamGames.csv or OppGames.csv not found.")
-            logger.error("TeamGames.csv or OppGames.csv not found")
+        team_games = workspace.get("TeamGames")
+        opp_games = workspace.get("OppGames")
+        if team_games is None or opp_games is None:
+            print("Error: TeamGames or OppGames frame not found in the workspace.")
+            logger.error("TeamGames or OppGames frame not found in the workspace")
             return
         
-        team_games = pd.read_csv("TeamGames.csv")
-        opp_games = pd.read_csv("OppGames.csv")
-        
         # Add columns
         print("Adding TotalGoals column...")
         team_games = treatment.add_total_goals_column(team_games)
@@ -115,59 +115,53 @@ def main():
         opp_games = treatment.add_Goalsodds_feedback(opp_games)
         
         print("Processing dates...")
-        team_games = treatment.treatment_of_date(team_games)
-        opp_games = treatment.treatment_of_date(opp_games)
+        team_games, opp_games = treatment.treatment_of_dates(team_games, opp_games)
         
-        # Add weather data before saving treated files
+        # Add weather data before storing treated frames
         print("Adding weather data...")
         team_games = weather.enrich_with_weather(team_games, league)
         opp_games = weather.enrich_with_weather(opp_games, league)
         
-        print("Saving treated files...")
-        team_games.to_csv("TeamGamesTreated.csv", index=False)
-        opp_games.to_csv("OppGamesTreated.csv", index=False)
-        logger.info("Saved TeamGamesTreated.csv and OppGamesTreated.csv")
-        
-        # Combine treated files
-        print("Combining treated files...")
-        for col in ['Day', 'Month', 'Year']:
-            team_games[col] = pd.to_numeric(team_games[col], errors='coerce').fillna(0).astype(int)
-            opp_games[col] = pd.to_numeric(opp_games[col], errors='coerce').fillna(0).astype(int)
-            logger.info(f"Column {col} types - TeamGames: {team_games[col].dtype}, OppGames: {opp_games[col].dtype}")
+        print("Storing treated frames...")
+        workspace.put("TeamGamesTreated", team_games)
+        workspace.put("OppGamesTreated", opp_games)
+        logger.info("Stored TeamGamesTreated and OppGamesTreated frames in the workspace")
         
+        # Combine treated frames
+        print("Combining treated frames...")
         combined_df = pd.concat([team_games, opp_games]).drop_duplicates(
             subset=['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'Day', 'Month', 'Year']
         )
         combined_df = weather.enrich_with_weather(combined_df, league)
-        combined_df.to_csv("CombinedGamesTreated.csv", index=False)
-        logger.info(f"Saved CombinedGamesTreated.csv with {len(combined_df)} rows")
+        workspace.put("CombinedGamesTreated", combined_df)
+        logger.info(f"Stored CombinedGamesTreated frame with {len(combined_df)} rows")
         
-        # Generate NextGame.csv using nextGame.py
-        print("Generating/Updating NextGame.csv...")
+        # Generate the NextGame frame using nextGame.py
+        print("Generating/Updating NextGame frame...")
         try:
-            nextGame.create_next_game(star_club, opp_club, league, game_date, season)
-            logger.info("Generated NextGame.csv via nextGame.py")
+            nextGame.create_next_game(star_club, opp_club, league, game_date, season, workspace=workspace)
+            logger.info("Generated NextGame frame via nextGame.py")
             
-            # Add weather data to NextGame.csv
-            if os.path.exists("NextGame.csv"):
-                next_game_df = pd.read_csv("NextGame.csv")
+            # Add weather data to NextGame frame
+            next_game_df = workspace.get("NextGame")
+            if next_game_df is not None:
                 next_game_df = weather.enrich_with_weather(next_game_df, league)
                 if next_game_df[['Temperature', 'Precipitation', 'WeatherCode']].notna().any().any():
-                    next_game_df.to_csv("NextGame.csv", index=False)
-                    logger.info("Added weather data to NextGame.csv")
+                    workspace.put("NextGame", next_game_df)
+                    logger.info("Added weather data to NextGame frame")
                 else:
-                    logger.warning("Weather data not applied to NextGame.csv")
+                    logger.warning("Weather data not applied to NextGame frame")
             
-            # Update NextGame.csv with latest team positions
-            print("Updating NextGame.csv with latest team positions...")
-            league_table.update_next_game_with_latest_positions(league)
+            # Update NextGame frame with latest team positions
+            print("Updating NextGame frame with latest team positions...")
+            league_table.update_next_game_with_latest_positions(league, workspace=workspace)
         except Exception as e:
-            logger.error(f"Failed to generate/update NextGame.csv: {e}")
-            print(f"Warning: Could not generate NextGame.csv: {e}")
+            logger.error(f"Failed to generate/update NextGame frame: {e}")
+            print(f"Warning: Could not generate NextGame frame: {e}")
         
         # Display results
-        if os.path.exists("NextGame.csv"):
-            next_game_df = pd.read_csv("NextGame.csv")
+        next_game_df = workspace.get("NextGame")
+        if next_game_df is not None:
             if not next_game_df.empty:
                 home_team = next_game_df.iloc[0]['HomeTeam']
                 away_team = next_game_df.iloc[0]['AwayTeam']
@@ -176,7 +170,7 @@ def main():
                 print(f"NextGame positions: {home_team}={home_pos}, {away_team}={away_pos}")
         
         print(f"\nLeague Table for Season {season}/{season + 1}:")
-        table_df = league_table.get_current_league_table(league, season)
+        table_df = league_table.get_current_league_table(league, season, workspace=workspace)
         
         if not table_df.empty:
             star_club_row = table_df[table_df['Team'] == star_club]
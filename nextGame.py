@@ -2,10 +2,10 @@
 # Module for handling next game data collection and formatting
 import pandas as pd
 import logging
-import os
-from datetime import datetime
+from typing import Optional
 import url
 import treatment
+from job_workspace import JobWorkspace, default_workspace
 
 # Configure logging
 logging.basicConfig(
@@ -15,9 +15,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def create_next_game(star_club: str, opp_club: str, league: str, game_date: str, season: int) -> None:
+def create_next_game(star_club: str, opp_club: str, league: str, game_date: str, season: int,
+                     workspace: Optional[JobWorkspace] = None) -> None:
     """
-    Create NextGame.csv for the next game between two clubs with odds from OddsPortal.
+    Create NextGame for the next game between two clubs with odds from OddsPortal.
     
     Args:
         star_club (str): Main club to analyze.
@@ -25,7 +26,9 @@ def create_next_game(star_club: str, opp_club: str, league: str, game_date: str,
         league (str): League name.
         game_date (str): Date of the game in DD/MM/YYYY format.
         season (int): Season start year (e.g., 2024 for 2024/2025).
+        workspace (JobWorkspace): Workspace to store NextGame in (default: CWD).
     """
+    workspace = workspace or default_workspace()
     try:
         # Attempt to find the next game with odds
         game_info = url.find_next_game_with_odds(star_club, opp_club, league, game_date)
@@ -75,8 +78,8 @@ def create_next_game(star_club: str, opp_club: str, league: str, game_date: str,
             'Avg>2.5': odds_data.get('Avg>2.5', 1.95),
             'Avg<2.5': odds_data.get('Avg<2.5', 2.15),
             'TotalGoals': None,
-            'FTRodds_feedback': 'NA',
-            'Goalsodds_feedback': 'NA',
+            'FTRodds_feedback': pd.NA,
+            'Goalsodds_feedback': pd.NA,
             'Day': None,
             'Month': None,
             'Year': None,
@@ -92,24 +95,27 @@ def create_next_game(star_club: str, opp_club: str, league: str, game_date: str,
         # Process date components
         next_game_df = treatment.treatment_of_date(next_game_df)
         
-        # Save NextGame.csv
-        next_game_df.to_csv("NextGame.csv", index=False)
-        logger.info(f"Created NextGame.csv for {home_team} vs {away_team} on {date_str}")
+        # Save NextGame
+        workspace.put("NextGame", next_game_df)
+        logger.info(f"Created NextGame for {home_team} vs {away_team} on {date_str}")
     
     except Exception as e:
-        logger.error(f"Error creating NextGame.csv: {str(e)}")
-        create_fallback_next_game_csv(star_club, opp_club, game_date, season)
+        logger.error(f"Error creating NextGame: {str(e)}")
+        create_fallback_next_game_csv(star_club, opp_club, game_date, season, workspace=workspace)
 
-def create_fallback_next_game_csv(star_club: str, opp_club: str, game_date: str, season: int) -> None:
+def create_fallback_next_game_csv(star_club: str, opp_club: str, game_date: str, season: int,
+                                  workspace: Optional[JobWorkspace] = None) -> None:
     """
-    Create a fallback NextGame.csv with minimal data and placeholder odds.
+    Create a fallback NextGame with minimal data and placeholder odds.
     
     Args:
         star_club (str): Main club to analyze.
         opp_club (str): Opponent club to analyze.
         game_date (str): Date of the game in DD/MM/YYYY format.
         season (int): Season start year (e.g., 2024 for 2024/2025).
+        workspace (JobWorkspace): Workspace to store NextGame in (default: CWD).
     """
+    workspace = workspace or default_workspace()
     try:
         columns = [
             'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'Season',
@@ -148,8 +154,8 @@ def create_fallback_next_game_csv(star_club: str, opp_club: str, game_date: str,
             'Avg>2.5': 1.95,
             'Avg<2.5': 2.15,
             'TotalGoals': None,
-            'FTRodds_feedback': 'NA',
-            'Goalsodds_feedback': 'NA',
+            'FTRodds_feedback': pd.NA,
+            'Goalsodds_feedback': pd.NA,
             'Day': None,
             'Month': None,
             'Year': None,
@@ -161,16 +167,19 @@ def create_fallback_next_game_csv(star_club: str, opp_club: str, game_date: str,
             'HomePosition': 0,
             'AwayPosition': 0
         }], columns=columns)
+        # Nullable booleans like the treated frames, so concatenating keeps the dtype
+        for column in ('FTRodds_feedback', 'Goalsodds_feedback'):
+            fallback_df[column] = pd.array([pd.NA] * len(fallback_df), dtype='boolean')
         
         # Process date components
         fallback_df = treatment.treatment_of_date(fallback_df)
         
-        # Save fallback CSV
-        fallback_df.to_csv("NextGame.csv", index=False)
-        logger.info(f"Created fallback NextGame.csv for {star_club} vs {opp_club} on {game_date}")
+        # Save fallback NextGame
+        workspace.put("NextGame", fallback_df)
+        logger.info(f"Created fallback NextGame for {star_club} vs {opp_club} on {game_date}")
     
     except Exception as e:
-        logger.error(f"Error creating fallback NextGame.csv: {str(e)}")
+        logger.error(f"Error creating fallback NextGame: {str(e)}")
 
 def list_upcoming_fixtures(league: str) -> list:
     """
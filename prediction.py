@@ -1,11 +1,20 @@
 
 import pandas as pd
-import requests
+import http_client
 import json
 import logging
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import numpy as np
-import unicodedata
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from job_workspace import default_workspace
+import team_features
+import goals_model
 
 # Configure logging
 logging.basicConfig(
@@ -14,14 +23,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def predict(team_games: pd.DataFrame, opp_games: pd.DataFrame, next_game: pd.DataFrame) -> Dict[str, Any]:
+# LM Studio model and sampling parameters (also part of the prediction cache key)
+LM_STUDIO_URL = "http://localhost:1234/v1/chat/completions"
+LM_STUDIO_MODEL = "meta-llama-3-8b-instruct"
+LM_SAMPLING_PARAMS = {
+    "max_tokens": 1000,  # Increased token limit
+    "temperature": 0.4,  # Lower temperature for more deterministic output
+    "top_p": 0.95,      # Slightly restrict token sampling
+    "stop": ["<think>", "</think>"]  # Stop generation if these tags appear
+}
+
+# Predictor used when a request doesn't choose one: 'llm' (LM Studio) or 'poisson' (goals_model).
+# LLM failures, including LM_STUDIO_TIMEOUT expiring, fall back to the goals model unless disabled.
+DEFAULT_PREDICTOR = os.environ.get('PREDICTOR', 'llm')
+LLM_FALLBACK_TO_BASELINE = os.environ.get('LLM_FALLBACK_TO_BASELINE', '1') == '1'
+PREDICTORS = ('llm', 'poisson')
+
+# Stream completions and stop as soon as the Outcome and Goals lines are complete
+LM_STUDIO_STREAM = os.environ.get('LM_STUDIO_STREAM', '1') == '1'
+PREDICTION_LINE_PREFIXES = {'outcome': 'Outcome:', 'goals': 'Goals:'}
+# Overall time allowed for one LM Studio completion; past it the query is aborted,
+# so a slow model that keeps streaming still falls back to the goals model
+LLM_DEADLINE_SECONDS = float(os.environ.get('LLM_DEADLINE_SECONDS', 120))
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of parsed predictions with a per-entry TTL.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 6 * 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(value)
+    
+    def set(self, key: str, value: Dict[str, str]) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), dict(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get('PREDICTION_CACHE_SIZE', 256)),
+    ttl_seconds=float(os.environ.get('PREDICTION_CACHE_TTL', 6 * 3600))
+)
+
+def prediction_cache_key(team_stats: Dict, opp_stats: Dict, odds_stats: Dict, home_team: str, away_team: str) -> str:
+    """
+    Hash the prompt inputs together with the model name and sampling parameters.
+    """
+    payload = {
+        "team_stats": team_stats,
+        "opp_stats": opp_stats,
+        "odds_stats": odds_stats,
+        "home_team": home_team,
+        "away_team": away_team,
+        "model": LM_STUDIO_MODEL,
+        "sampling": LM_SAMPLING_PARAMS
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def predict(team_games: pd.DataFrame, opp_games: pd.DataFrame, next_game: pd.DataFrame,
+            league: Optional[str] = None, seasons: Optional[Iterable[int]] = None,
+            on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            predictor: Optional[str] = None) -> Dict[str, Any]:
     """
-    Analyze historical data from CSVs using LM Studio model to predict match outcome and goals.
+    Analyze historical match frames using LM Studio model to predict match outcome and goals.
     
     Args:
-        team_games (pd.DataFrame): TeamGamesTreated.csv (home team historical data)
-        opp_games (pd.DataFrame): OppGamesTreated.csv (away team historical data)
-        next_game (pd.DataFrame): NextGame.csv (upcoming match odds and details)
+        team_games (pd.DataFrame): TeamGamesTreated frame (home team historical data)
+        opp_games (pd.DataFrame): OppGamesTreated frame (away team historical data)
+        next_game (pd.DataFrame): NextGame frame (upcoming match odds and details)
+        league (str, optional): League name; with seasons, team stats are read from the feature store
+        seasons (Iterable[int], optional): Season start years the feature store lookup covers
+        on_progress (Callable, optional): Receives partial predictions while the model streams
+        predictor (str, optional): 'llm' or 'poisson' (default: PREDICTOR env var, else 'llm')
     
     Returns:
         Dict containing match details and predictions with explanations
@@ -33,42 +126,19 @@ def predict(team_games: pd.DataFrame, opp_games: pd.DataFrame, next_game: pd.Dat
         match = f"{home_team} vs {away_team}"
         logger.info(f"Analyzing match: {match}")
         
-        # Log CSV contents
-        logger.info(f"TeamGamesTreated.csv columns: {list(team_games.columns)}")
-        logger.info(f"TeamGamesTreated.csv HomeTeam values: {team_games['HomeTeam'].unique().tolist()}")
-        logger.info(f"OppGamesTreated.csv columns: {list(opp_games.columns)}")
-        logger.info(f"OppGamesTreated.csv AwayTeam values: {opp_games['AwayTeam'].unique().tolist()}")
-        logger.info(f"NextGame.csv row: {next_game.to_dict(orient='records')[0]}")
+        # Log frame contents
+        logger.info(f"TeamGamesTreated columns: {list(team_games.columns)}")
+        logger.info(f"TeamGamesTreated HomeTeam values: {team_games['HomeTeam'].unique().tolist()}")
+        logger.info(f"OppGamesTreated columns: {list(opp_games.columns)}")
+        logger.info(f"OppGamesTreated AwayTeam values: {opp_games['AwayTeam'].unique().tolist()}")
+        logger.info(f"NextGame row: {next_game.to_dict(orient='records')[0]}")
         
-        # Summarize team data
-        team_stats = compute_team_stats(team_games, home_team, is_home=True)
-        opp_stats = compute_team_stats(opp_games, away_team, is_home=False)
+        # Summarize team data, from the precomputed feature store when available
+        seasons = list(seasons) if seasons is not None else None
+        team_stats, opp_stats = fixture_team_stats(team_games, opp_games, home_team, away_team, league, seasons)
         odds_stats = compute_odds_stats(next_game)
-        
-        # Convert numpy types to Python types
-        team_stats = convert_numpy_types(team_stats)
-        opp_stats = convert_numpy_types(opp_stats)
-        odds_stats = convert_numpy_types(odds_stats)
-        
-        # Log data summary
-        logger.info(f"Home Team ({home_team}) Stats: {json.dumps(team_stats, indent=2)}")
-        logger.info(f"Away Team ({away_team}) Stats: {json.dumps(opp_stats, indent=2)}")
-        logger.info(f"Odds Stats: {json.dumps(odds_stats, indent=2)}")
-        
-        # Check for empty stats
-        if team_stats['total_games'] == 0 or opp_stats['total_games'] == 0:
-            logger.warning("Empty stats detected. Predictions may be unreliable.")
-        
-        # Create prompt for LM Studio
-        prompt = create_lm_prompt(team_stats, opp_stats, odds_stats, home_team, away_team)
-        logger.info(f"LM Studio Prompt:\n{prompt}")
-        
-        # Query LM Studio model
-        model_response = query_lm_studio(prompt)
-        logger.info(f"LM Studio Response:\n{model_response}")
-        
-        # Parse model response
-        predictions = parse_model_response(model_response, match)
+        predictions = predict_from_stats(team_stats, opp_stats, odds_stats, home_team, away_team,
+                                         on_progress, predictor, league, seasons)
         
         return {
             "match": match,
@@ -84,6 +154,151 @@ def predict(team_games: pd.DataFrame, opp_games: pd.DataFrame, next_game: pd.Dat
             }
         }
 
+def fixture_team_stats(team_games: pd.DataFrame, opp_games: pd.DataFrame, home_team: str, away_team: str,
+                       league: Optional[str] = None,
+                       seasons: Optional[Iterable[int]] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Home stats for home_team and away stats for away_team, from the feature store when available.
+    
+    Args:
+        team_games: Historical games containing the home team's home matches
+        opp_games: Historical games containing the away team's away matches
+        home_team: Home team name
+        away_team: Away team name
+        league: League name for the feature store lookup
+        seasons: Season start years for the feature store lookup
+    
+    Returns:
+        Tuple of (home team stats, away team stats)
+    """
+    team_stats = opp_stats = None
+    if league and seasons is not None:
+        seasons = list(seasons)
+        team_stats = team_features.get_team_stats(league, home_team, True, seasons)
+        opp_stats = team_features.get_team_stats(league, away_team, False, seasons)
+    if team_stats is None or opp_stats is None:
+        logger.info("Team features not available, computing stats from historical rows")
+        team_stats = compute_team_stats(team_games, home_team, is_home=True)
+        opp_stats = compute_team_stats(opp_games, away_team, is_home=False)
+    return team_stats, opp_stats
+
+def predict_from_stats(team_stats: Dict[str, Any], opp_stats: Dict[str, Any], odds_stats: Dict[str, Any],
+                       home_team: str, away_team: str,
+                       on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                       predictor: Optional[str] = None, league: Optional[str] = None,
+                       seasons: Optional[Iterable[int]] = None,
+                       fallback: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    Predict one fixture from its summary stats, using the prediction cache or LM Studio,
+    or the goals model when predictor is 'poisson' or LM Studio fails.
+    
+    Args:
+        team_stats: Home team stats (see compute_team_stats)
+        opp_stats: Away team stats
+        odds_stats: Odds stats (see compute_odds_stats)
+        home_team: Home team name
+        away_team: Away team name
+        on_progress: Receives partial predictions while the model streams
+        predictor: 'llm' or 'poisson' (default: PREDICTOR env var, else 'llm')
+        league: League name; with seasons, the goals model uses the league's fitted strengths
+        seasons: Season start years the fitted goals model covers
+        fallback: Use the goals model when LM Studio fails (default: LLM_FALLBACK_TO_BASELINE);
+            if False the error is raised
+    
+    Returns:
+        Dictionary with outcome and goals predictions
+    """
+    match = f"{home_team} vs {away_team}"
+    
+    # Convert numpy types to Python types
+    team_stats = convert_numpy_types(team_stats)
+    opp_stats = convert_numpy_types(opp_stats)
+    odds_stats = convert_numpy_types(odds_stats)
+    
+    # Log data summary
+    logger.info(f"Home Team ({home_team}) Stats: {json.dumps(team_stats, indent=2)}")
+    logger.info(f"Away Team ({away_team}) Stats: {json.dumps(opp_stats, indent=2)}")
+    logger.info(f"Odds Stats: {json.dumps(odds_stats, indent=2)}")
+    
+    # Check for empty stats
+    if team_stats['total_games'] == 0 or opp_stats['total_games'] == 0:
+        logger.warning("Empty stats detected. Predictions may be unreliable.")
+    
+    predictor = predictor or DEFAULT_PREDICTOR
+    if predictor == 'poisson':
+        return goals_model.predict_fixture(team_stats, opp_stats, home_team, away_team, league, seasons)
+    
+    # Serve repeated requests for the same fixture, stats and odds from cache
+    cache_key = prediction_cache_key(team_stats, opp_stats, odds_stats, home_team, away_team)
+    cached = prediction_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Prediction cache hit for {match} ({cache_key[:12]})")
+        return cached
+    
+    # Create prompt for LM Studio
+    prompt = create_lm_prompt(team_stats, opp_stats, odds_stats, home_team, away_team)
+    logger.info(f"LM Studio Prompt:\n{prompt}")
+    
+    # Query LM Studio model, falling back to the goals model if it is down or times out
+    try:
+        model_response = query_lm_studio(prompt, on_progress)
+    except Exception as e:
+        if not (LLM_FALLBACK_TO_BASELINE if fallback is None else fallback):
+            raise
+        logger.warning(f"LM Studio unavailable for {match}, using goals model: {str(e)}")
+        return goals_model.predict_fixture(team_stats, opp_stats, home_team, away_team, league, seasons)
+    logger.info(f"LM Studio Response:\n{model_response}")
+    
+    # Parse model response
+    predictions = parse_model_response(model_response, match)
+    prediction_cache.set(cache_key, predictions)
+    return predictions
+
+def lm_studio_slots() -> int:
+    """Number of concurrent requests allowed to the LM Studio host by http_client."""
+    return http_client.get_policy(urlparse(LM_STUDIO_URL).netloc)['max_concurrency']
+
+def predict_fixtures(all_games: pd.DataFrame, fixtures: List[Dict[str, Any]], league: Optional[str] = None,
+                     seasons: Optional[Iterable[int]] = None,
+                     max_workers: Optional[int] = None,
+                     predictor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Predict several fixtures of one league from a single historical dataset.
+    
+    Stats for every fixture are computed up front; the model is then queried
+    concurrently, up to the LM Studio host's slot count.
+    
+    Args:
+        all_games: Historical games of the league (e.g. AllGames)
+        fixtures: Dicts with team1 (home), team2 (away) and optional odds keyed like
+            NextGame columns (B365H, B365D, B365A, B365>2.5, B365<2.5)
+        league: League name for the feature store lookup
+        seasons: Season start years for the feature store lookup
+        max_workers: Concurrent model queries (default: lm_studio_slots())
+        predictor: 'llm' or 'poisson' (see predict_from_stats)
+    
+    Returns:
+        List of {"match", "prediction"} dicts in fixture order
+    """
+    seasons = list(seasons) if seasons is not None else None
+    prepared = []
+    for fixture in fixtures:
+        home_team, away_team = fixture['team1'], fixture['team2']
+        team_stats, opp_stats = fixture_team_stats(all_games, all_games, home_team, away_team, league, seasons)
+        odds_stats = compute_odds_stats(pd.DataFrame([fixture.get('odds') or {}]))
+        prepared.append((team_stats, opp_stats, odds_stats, home_team, away_team))
+    
+    def run(args) -> Dict[str, Any]:
+        match = f"{args[3]} vs {args[4]}"
+        try:
+            return {"match": match, "prediction": predict_from_stats(*args, predictor=predictor, league=league, seasons=seasons)}
+        except Exception as e:
+            logger.error(f"Prediction failed for {match}: {str(e)}")
+            return {"match": match, "prediction": {"error": f"Prediction failed: {str(e)}"}}
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers or lm_studio_slots(), len(prepared)))) as executor:
+        return list(executor.map(run, prepared))
+
 def convert_numpy_types(data: Dict) -> Dict:
     """
     Convert numpy types to Python native types for JSON serialization.
@@ -117,25 +332,18 @@ def compute_team_stats(df: pd.DataFrame, team: str, is_home: bool) -> Dict[str,
     """
     stats = {}
     try:
-        # Normalize team name for matching
-        def normalize_team_name(name: str) -> str:
-            # Remove accents, convert to lowercase, strip whitespace
-            name = ''.join(c for c in unicodedata.normalize('NFD', name)
-                          if unicodedata.category(c) != 'Mn')
-            return name.lower().strip()
-        
-        team_norm = normalize_team_name(team)
+        team_norm = team_features.normalize_team_name(team)
         logger.info(f"Searching for team: {team} (normalized: {team_norm})")
         
         # Filter games (home or away)
         if is_home:
-            games = df[df['HomeTeam'].apply(normalize_team_name) == team_norm].copy()
+            games = df[team_features.team_key_mask(df, 'HomeTeam', team)].copy()
             stats['context'] = 'home'
             logger.info(f"Found {len(games)} home games for {team}")
             stats['goals_scored_avg'] = games['FTHG'].mean() if 'FTHG' in games.columns and len(games) > 0 else 0
             stats['goals_conceded_avg'] = games['FTAG'].mean() if 'FTAG' in games.columns and len(games) > 0 else 0
         else:
-            games = df[df['AwayTeam'].apply(normalize_team_name) == team_norm].copy()
+            games = df[team_features.team_key_mask(df, 'AwayTeam', team)].copy()
             stats['context'] = 'away'
             logger.info(f"Found {len(games)} away games for {team}")
             stats['goals_scored_avg'] = games['FTAG'].mean() if 'FTAG' in games.columns and len(games) > 0 else 0
@@ -172,7 +380,7 @@ def compute_team_stats(df: pd.DataFrame, team: str, is_home: bool) -> Dict[str,
 
 def compute_odds_stats(next_game: pd.DataFrame) -> Dict[str, Any]:
     """
-    Extract odds statistics from NextGame.csv.
+    Extract odds statistics from the NextGame frame.
     
     Args:
         next_game: DataFrame with next game data
@@ -199,6 +407,12 @@ def compute_odds_stats(next_game: pd.DataFrame) -> Dict[str, Any]:
             "under_2_5_odds": 0
         }
 
+def form_line(stats: Dict[str, Any], venue: str) -> str:
+    """Prompt line for recent form, or an empty string when stats carry none."""
+    if not stats.get('form'):
+        return ""
+    return f"\n- Recent {venue} Form (oldest first): {stats['form']}"
+
 def create_lm_prompt(team_stats, opp_stats, odds_stats, home_team, away_team):
     prompt = f"""
 I need your help analyzing an upcoming football match between {home_team} (playing at home) and {away_team} (playing away).
@@ -216,7 +430,7 @@ historical performance data from two separate CSV files:
 - Home Win Rate: {team_stats['win_rate']:.2%} 
 - Home Draw Rate: {team_stats['draw_rate']:.2%}
 - Home Loss Rate: {team_stats['loss_rate']:.2%}
-- Average Total Goals per Home Game: {team_stats['avg_total_goals']:.2f}
+- Average Total Goals per Home Game: {team_stats['avg_total_goals']:.2f}{form_line(team_stats, 'Home')}
 
 ### {away_team} Away Performance:
 - Games Played Away: {opp_stats['total_games']}
@@ -225,7 +439,7 @@ historical performance data from two separate CSV files:
 - Away Win Rate: {opp_stats['win_rate']:.2%}
 - Away Draw Rate: {opp_stats['draw_rate']:.2%}
 - Away Loss Rate: {opp_stats['loss_rate']:.2%}
-- Average Total Goals per Away Game: {opp_stats['avg_total_goals']:.2f}
+- Average Total Goals per Away Game: {opp_stats['avg_total_goals']:.2f}{form_line(opp_stats, 'Away')}
 
 ### Betting Odds for Upcoming Match:
 - {home_team} Win: {odds_stats['home_odds']:.2f} (very low odds indicating strong favorite)
@@ -244,12 +458,79 @@ Goals: [Your specific over/under prediction] because [your reasoning based on th
 """
     return prompt
 
-def query_lm_studio(prompt: str) -> str:
+def find_prediction_lines(text: str) -> Dict[str, Optional[str]]:
+    """
+    Find the Outcome and Goals predictions among the complete (newline-terminated) lines of text.
+    
+    Args:
+        text: Response text received so far
+    
+    Returns:
+        Dictionary with outcome and goals, None where the line has not arrived yet
+    """
+    found = {key: None for key in PREDICTION_LINE_PREFIXES}
+    for line in text[:text.rfind('\n') + 1].split('\n'):
+        line = line.strip()
+        for key, prefix in PREDICTION_LINE_PREFIXES.items():
+            if found[key] is None and line.startswith(prefix):
+                found[key] = line[len(prefix):].strip()
+    return found
+
+def lm_studio_timeout() -> Tuple[float, float]:
+    """LM Studio (connect, read) timeout, with the read timeout capped at LLM_DEADLINE_SECONDS."""
+    connect, read = http_client.get_policy(urlparse(LM_STUDIO_URL).netloc)['timeout']
+    return connect, min(read, LLM_DEADLINE_SECONDS)
+
+def stream_lm_studio(payload: Dict[str, Any], on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
+    """
+    Stream a chat completion from LM Studio and return the text received.
+    
+    Stops reading once both prediction lines are complete; closing the stream
+    makes LM Studio cancel the rest of the generation. on_progress is called
+    with the partial predictions each time a line completes. Raises
+    TimeoutError once LLM_DEADLINE_SECONDS have passed, however steadily
+    tokens are still arriving.
+    """
+    text = ""
+    headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
+    with http_client.stream('POST', LM_STUDIO_URL, headers=headers, json={**payload, "stream": True},
+                            timeout=lm_studio_timeout()) as response:
+        if response.status_code == 404:
+            logger.error("LM Studio returned 404: Ensure a model is loaded and the model name is correct.")
+            raise Exception("LM Studio 404: No model loaded or incorrect model name")
+        response.raise_for_status()
+        # Server-sent events default to ISO-8859-1 in requests; LM Studio sends UTF-8
+        response.encoding = 'utf-8'
+        for line in response.iter_lines(decode_unicode=True):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"LM Studio did not finish within {LLM_DEADLINE_SECONDS:.0f}s")
+            if not line or not line.startswith('data:'):
+                continue
+            data = line[len('data:'):].strip()
+            if data == '[DONE]':
+                break
+            choices = json.loads(data).get('choices') or [{}]
+            delta = (choices[0].get('delta') or {}).get('content') or ''
+            text += delta
+            if '\n' not in delta:
+                continue
+            found = find_prediction_lines(text)
+            if on_progress:
+                on_progress({'received_chars': len(text), **found})
+            if all(value is not None for value in found.values()):
+                logger.info("Outcome and Goals received, stopping generation early")
+                break
+    return text.strip()
+
+def query_lm_studio(prompt: str, on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> str:
     """
     Query the LM Studio model via its local API with improved parameters.
+    
+    Streams the response when LM_STUDIO_STREAM is set (the default), see stream_lm_studio.
     """
     try:
-        url = "http://localhost:1234/v1/chat/completions"
+        url = LM_STUDIO_URL
         headers = {"Content-Type": "application/json"}
         
         # More detailed system prompt to enforce output format
@@ -261,19 +542,18 @@ Goals: Over/Under 2.5 goals because [specific reason]
 Never include reasoning tags like <think> in your responses. Always be definitive in your predictions."""
         
         payload = {
-            "model": "meta-llama-3-8b-instruct",
+            "model": LM_STUDIO_MODEL,
             "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
-            "max_tokens": 1000,  # Increased token limit
-            "temperature": 0.4,  # Lower temperature for more deterministic output
-            "top_p": 0.95,      # Slightly restrict token sampling
-            "stop": ["<think>", "</think>"]  # Stop generation if these tags appear
+            **LM_SAMPLING_PARAMS
         }
         
         logger.info(f"Sending request to LM Studio: {json.dumps(payload, indent=2)}")
-        response = requests.post(url, headers=headers, json=payload)
+        if LM_STUDIO_STREAM:
+            return stream_lm_studio(payload, on_progress)
+        response = http_client.post(url, headers=headers, json=payload, timeout=lm_studio_timeout())
         if response.status_code == 404:
             logger.error("LM Studio returned 404: Ensure a model is loaded and the model name is correct.")
             raise Exception("LM Studio 404: No model loaded or incorrect model name")
@@ -353,9 +633,13 @@ def main():
     """
     try:
         # Load dataframes
-        team_games = pd.read_csv("TeamGamesTreated.csv")
-        opp_games = pd.read_csv("OppGamesTreated.csv")
-        next_game = pd.read_csv("NextGame.csv")
+        workspace = default_workspace()
+        team_games = workspace.get("TeamGamesTreated")
+        opp_games = workspace.get("OppGamesTreated")
+        next_game = workspace.get("NextGame")
+        if team_games is None or opp_games is None or next_game is None:
+            print("Error: run main.py first to generate TeamGamesTreated, OppGamesTreated and NextGame")
+            return
         
         # Run prediction
         result = predict(team_games, opp_games, next_game)
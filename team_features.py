@@ -0,0 +1,195 @@
+# team_features.py
+# Precomputed per-team features by league, season and venue, stored alongside the game store
+import pandas as pd
+import numpy as np
+import game_store
+import logging
+import os
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FEATURES_DATASET = 'team_features'
+# Normalized team names stored with every cleaned season as categoricals; the shared
+# categories are the reverse index from team key to code
+TEAM_KEY_COLUMNS = ['HomeTeamKey', 'AwayTeamKey']
+# Number of most recent results kept as form, per venue
+FORM_LENGTH = 5
+
+# Feature partitions kept in memory, keyed by (league, season) and revalidated by file mtime
+_features_cache: Dict[Tuple[str, int], Tuple[float, pd.DataFrame]] = {}
+_features_lock = threading.Lock()
+
+def normalize_team_name(name: str) -> str:
+    """Team key used for matching: accents removed, lowercase, stripped."""
+    name = ''.join(c for c in unicodedata.normalize('NFD', str(name))
+                   if unicodedata.category(c) != 'Mn')
+    return name.lower().strip()
+
+def team_key_map(names: Iterable[str]) -> Dict[str, str]:
+    """Map each distinct team name to its normalized key, normalizing every name only once."""
+    return {name: normalize_team_name(name) for name in pd.unique(pd.Series(list(names)).dropna())}
+
+def add_team_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Add HomeTeamKey and AwayTeamKey: normalized team names as categoricals with shared categories."""
+    key_of = team_key_map(pd.concat([df['HomeTeam'], df['AwayTeam']]))
+    categories = sorted(set(key_of.values()))
+    df['HomeTeamKey'] = pd.Categorical(df['HomeTeam'].map(key_of), categories=categories)
+    df['AwayTeamKey'] = pd.Categorical(df['AwayTeam'].map(key_of), categories=categories)
+    return df
+
+def drop_team_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Return df without the team key columns, which are internal to the pipeline."""
+    return df.drop(columns=TEAM_KEY_COLUMNS, errors='ignore')
+
+def concat_games(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate game frames, keeping team keys categorical over the union of their categories.
+
+    Only categories are merged and codes remapped, so no team name is
+    normalized again. If any frame lacks keys, they are dropped from all.
+    """
+    if all(column in df.columns for df in frames for column in TEAM_KEY_COLUMNS):
+        categories = sorted(set().union(*(pd.unique(df[column].dropna()) for df in frames for column in TEAM_KEY_COLUMNS)))
+        frames = [df.assign(**{column: pd.Categorical(df[column], categories=categories) for column in TEAM_KEY_COLUMNS})
+                  for df in frames]
+    else:
+        frames = [drop_team_keys(df) for df in frames]
+    return pd.concat(frames)
+
+def team_key_mask(df: pd.DataFrame, column: str, team: str) -> np.ndarray:
+    """
+    Boolean mask of rows whose column (HomeTeam or AwayTeam) matches team after normalization.
+
+    Uses the stored <column>Key categorical: the team's code is looked up in
+    the categories and compared with the row codes. Frames without keys (e.g.
+    artifacts read back from disk) are factorized and each distinct name is
+    normalized once.
+    """
+    target = normalize_team_name(team)
+    keys = df.get(f"{column}Key")
+    if keys is not None:
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            code = keys.cat.categories.get_indexer([target])[0]
+            if code < 0:
+                return np.zeros(len(df), dtype=bool)
+            return keys.cat.codes.to_numpy() == code
+        return (keys == target).to_numpy()
+    codes, names = pd.factorize(df[column])
+    matches = np.array([normalize_team_name(name) == target for name in names] + [False])
+    # Missing names have code -1, which indexes the trailing False
+    return matches[codes]
+
+def build_team_features(games: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate one league season of results into one row per team and venue.
+
+    Columns: TeamKey, Team, Venue ('home'/'away'), Games, GoalsFor, GoalsAgainst,
+    Wins, Draws, Losses, Form (last FORM_LENGTH results as W/D/L, oldest first)
+    and LastDate.
+    """
+    games = games.dropna(subset=['HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'])
+    dates = game_store.parse_date_column(games['Date'])
+    home_result = games['FTR'].map({'H': 'W', 'D': 'D', 'A': 'L'})
+    away_result = games['FTR'].map({'H': 'L', 'D': 'D', 'A': 'W'})
+    rows = pd.concat([
+        pd.DataFrame({'Team': games['HomeTeam'], 'Venue': 'home', 'Date': dates,
+                      'GoalsFor': games['FTHG'], 'GoalsAgainst': games['FTAG'], 'Result': home_result}),
+        pd.DataFrame({'Team': games['AwayTeam'], 'Venue': 'away', 'Date': dates,
+                      'GoalsFor': games['FTAG'], 'GoalsAgainst': games['FTHG'], 'Result': away_result}),
+    ], ignore_index=True)
+    rows['TeamKey'] = rows['Team'].map(team_key_map(rows['Team']))
+    rows['Win'] = rows['Result'] == 'W'
+    rows['Draw'] = rows['Result'] == 'D'
+    rows['Loss'] = rows['Result'] == 'L'
+    rows = rows.sort_values('Date', kind='stable')
+
+    grouped = rows.groupby(['TeamKey', 'Venue'], sort=True)
+    features = grouped.agg(
+        Team=('Team', 'last'),
+        Games=('Result', 'size'),
+        GoalsFor=('GoalsFor', 'sum'),
+        GoalsAgainst=('GoalsAgainst', 'sum'),
+        Wins=('Win', 'sum'),
+        Draws=('Draw', 'sum'),
+        Losses=('Loss', 'sum'),
+        LastDate=('Date', 'max'),
+    )
+    features['Form'] = grouped.tail(FORM_LENGTH).groupby(['TeamKey', 'Venue'])['Result'].agg(''.join)
+    return features.reset_index()
+
+def update_team_features(league: str, season: int, games: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Recompute and store the feature partition for one league season; called whenever its results change."""
+    try:
+        features = build_team_features(games)
+        game_store.write_partition(features, league, season, dataset=FEATURES_DATASET)
+        return features
+    except Exception as e:
+        logger.error(f"Error updating team features for {league} {season}/{season + 1}: {str(e)}")
+        return None
+
+def ensure_team_features(league: str, season: int) -> bool:
+    """Build a missing feature partition from the stored games partition. Returns True if features exist."""
+    if game_store.find_partition(league, season, FEATURES_DATASET) is not None:
+        return True
+    games = game_store.read_partition(league, season)
+    if games is None or games.empty:
+        return False
+    return update_team_features(league, season, games) is not None
+
+def load_features(league: str, seasons: List[int]) -> Optional[pd.DataFrame]:
+    """Return the stored feature rows for the given seasons, re-reading only partitions that changed."""
+    frames = []
+    for season in seasons:
+        path = game_store.find_partition(league, season, FEATURES_DATASET)
+        if path is None:
+            continue
+        mtime = os.path.getmtime(path)
+        with _features_lock:
+            cached = _features_cache.get((league, season))
+        if cached is None or cached[0] != mtime:
+            df = game_store.read_partition(league, season, FEATURES_DATASET)
+            if df is None:
+                continue
+            cached = (mtime, df)
+            with _features_lock:
+                _features_cache[(league, season)] = cached
+        frames.append(cached[1])
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True)
+
+def get_team_stats(league: str, team: str, is_home: bool, seasons: Iterable[int]) -> Optional[Dict[str, Any]]:
+    """
+    Look up team statistics for one venue, summed over the given seasons.
+
+    Returns a dict with the same keys as prediction.compute_team_stats plus
+    'form', or None when the store has no features for the team.
+    """
+    features = load_features(league, list(seasons))
+    if features is None:
+        return None
+    venue = 'home' if is_home else 'away'
+    rows = features[(features['TeamKey'] == normalize_team_name(team)) & (features['Venue'] == venue)]
+    if rows.empty:
+        return None
+
+    games = int(rows['Games'].sum())
+    scored = rows['GoalsFor'].sum() / games
+    conceded = rows['GoalsAgainst'].sum() / games
+    form = ''.join(rows.sort_values('LastDate')['Form'].fillna(''))[-FORM_LENGTH:]
+    return {
+        'context': venue,
+        'goals_scored_avg': float(scored),
+        'goals_conceded_avg': float(conceded),
+        'win_rate': float(rows['Wins'].sum() / games),
+        'draw_rate': float(rows['Draws'].sum() / games),
+        'loss_rate': float(rows['Losses'].sum() / games),
+        'total_games': games,
+        'avg_total_goals': float(scored + conceded),
+        'form': form
+    }
@@ -136,7 +136,7 @@ def test_python_api():
     
     try:
         response = requests.post(f"{base_url}/predict", json=prediction_request)
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             job_response = response.json()
             job_id = job_response.get('job_id')
             print(f"  Job started with ID: {job_id}")
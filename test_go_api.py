@@ -142,7 +142,7 @@ def test_go_api():
     
     try:
         response = requests.post(f"{base_url}/predict", json=prediction_request)
-        if response.status_code == 200:
+        if response.status_code in (200, 202):
             job_response = response.json()
             job_id = job_response.get('job_id')
             print(f"  Job started with ID: {job_id}")
@@ -261,7 +261,7 @@ def test_go_api():
                         # Submit new job with selected event
                         print("\n  Submitting new job with selected event...")
                         response = requests.post(f"{base_url}/predict", json=updated_request)
-                        if response.status_code == 200:
+                        if response.status_code in (200, 202):
                             job_response = response.json()
                             job_id = job_response.get('job_id')
                             print(f"  New job started with ID: {job_id}")
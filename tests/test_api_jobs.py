@@ -0,0 +1,62 @@
+# test_api_jobs.py
+# Tests for queueing prediction jobs and recovering jobs left unfinished by stopped workers
+import subprocess
+import sys
+import threading
+import time
+import pandas as pd
+import pytest
+import api_handler
+import team_features
+from job_store import SQLiteJobStore
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    store = SQLiteJobStore(str(tmp_path / 'jobs.db'), on_evict=api_handler.release_workspace)
+    monkeypatch.setattr(api_handler, 'jobs', store)
+    monkeypatch.setattr(api_handler, 'JOB_WORKSPACE_DIR', str(tmp_path / 'job_workspaces'))
+    monkeypatch.setattr(api_handler, 'SAVE_JOB_ARTIFACTS', False)
+    return store
+
+def dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def test_queue_depth_is_enforced(jobs, monkeypatch):
+    monkeypatch.setattr(api_handler, 'MAX_QUEUE_DEPTH', 2)
+    release = threading.Event()
+
+    def process(job_id, data, workspace):
+        release.wait(10)
+        api_handler.jobs.update(job_id, status='completed')
+
+    with api_handler.app.test_request_context():
+        responses = [api_handler.queue_job({}, process) for _ in range(3)]
+        assert [status for _, status in responses] == [202, 202, 503]
+        release.set()
+        for response, _ in responses[:2]:
+            job_id = response.get_json()['job_id']
+            deadline = time.time() + 10
+            while jobs.get(job_id)['finished_at'] is None and time.time() < deadline:
+                time.sleep(0.01)
+        assert api_handler.queue_job({}, process)[1] == 202
+
+def test_recover_jobs_fails_orphaned_jobs(jobs):
+    jobs.create('orphan', {'status': 'processing', 'finished_at': None, 'worker_pid': dead_pid(), 'worker_token': 'x'})
+    jobs.create('restarted', {'status': 'pending', 'finished_at': None,
+                              'worker_pid': api_handler.os.getpid(), 'worker_token': 'previous run'})
+    jobs.create('mine', {'status': 'processing', 'finished_at': None,
+                         'worker_pid': api_handler.os.getpid(), 'worker_token': api_handler.WORKER_TOKEN})
+    api_handler.recover_jobs()
+    assert jobs.get('orphan')['status'] == 'error'
+    assert jobs.get('restarted')['status'] == 'error'
+    assert jobs.get('mine')['status'] == 'processing'
+    assert jobs.count(finished_at=None) == 1
+
+def test_job_frames_are_served_without_team_keys(jobs, monkeypatch):
+    workspace = api_handler.JobWorkspace(save_artifacts=False)
+    workspace.put('TeamGames', team_features.add_team_keys(pd.DataFrame({'HomeTeam': ['Inter'], 'AwayTeam': ['Roma']})))
+    monkeypatch.setitem(api_handler.workspaces, 'job', workspace)
+    jobs.create('job', {'status': 'completed', 'kind': 'match', 'finished_at': 'now'})
+    assert api_handler.get_job_frame('TeamGames').columns.tolist() == ['HomeTeam', 'AwayTeam']
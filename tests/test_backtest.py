@@ -0,0 +1,45 @@
+# test_backtest.py
+# Tests that backtests only ever see results from before each predicted match
+import numpy as np
+import pandas as pd
+import pytest
+import backtest
+
+TEAMS = ['Inter', 'Roma', 'Milan', 'Lazio', 'Napoli', 'Torino']
+
+@pytest.fixture
+def games() -> pd.DataFrame:
+    """Two double round-robins on distinct dates, with dates as day-first strings."""
+    rng = np.random.default_rng(11)
+    rows = []
+    date = pd.Timestamp('2023-08-19')
+    for _ in range(2):
+        for home in TEAMS:
+            for away in TEAMS:
+                if home == away:
+                    continue
+                home_goals, away_goals = rng.poisson(1.5), rng.poisson(1.1)
+                result = 'H' if home_goals > away_goals else 'D' if home_goals == away_goals else 'A'
+                rows.append((date.strftime('%d/%m/%Y'), home, away, home_goals, away_goals, result))
+                date += pd.Timedelta(days=1)
+    return pd.DataFrame(rows, columns=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR'])
+
+def test_history_uses_only_earlier_matches(games):
+    features = backtest.point_in_time_features(backtest.chronological(games))
+    for i, row in features.iterrows():
+        earlier = features.iloc[:i]
+        home = earlier[earlier['HomeTeam'] == row['HomeTeam']]
+        assert row['HomeGames'] == len(home)
+        assert row['HomeGoalsFor'] == home['FTHG'].sum()
+        assert row['AwayGames'] == (earlier['AwayTeam'] == row['AwayTeam']).sum()
+
+def test_unsorted_input_gives_the_same_backtest(games):
+    summary, results = backtest.run_backtest(games, 'poisson', max_workers=1)
+    shuffled = games.sample(frac=1, random_state=5)
+    shuffled_summary, shuffled_results = backtest.run_backtest(shuffled, 'poisson', max_workers=1)
+    # Timings differ between runs; everything else must match
+    pd.testing.assert_frame_equal(shuffled_results.drop(columns='seconds'), results.drop(columns='seconds'))
+    timings = {'seconds', 'mean_prediction_ms', 'matches_per_second'}
+    assert {key: value for key, value in shuffled_summary.items() if key not in timings} == \
+        {key: value for key, value in summary.items() if key not in timings}
+    assert results['MatchDate'].is_monotonic_increasing
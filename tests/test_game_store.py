@@ -0,0 +1,113 @@
+# test_game_store.py
+# Tests for the partitioned game store: round trips, typed dates and concurrent writes
+import pandas as pd
+import os
+import threading
+import pytest
+import game_store
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_store, 'GAME_STORE_DIR', str(tmp_path / 'store'))
+    return tmp_path / 'store'
+
+@pytest.fixture
+def games() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2023-08-19', '2023-08-20', '2023-08-26']),
+        'HomeTeam': ['Inter', 'Roma', 'Milan'],
+        'AwayTeam': ['Monza', 'Salernitana', 'Torino'],
+        'FTHG': [2, 2, 4],
+        'FTAG': [0, 2, 1],
+        'FTR': ['H', 'D', 'H'],
+        'B365H': [1.3, 1.5, 1.6],
+        'Season': ['2023/2024'] * 3,
+    })
+
+@pytest.mark.parametrize('fmt', ['parquet', 'csv'])
+def test_partition_round_trip(games, fmt, monkeypatch):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(game_store, 'STORE_FORMAT', fmt)
+    path = game_store.write_partition(games, 'Serie A', 2023)
+    assert path == os.path.join(game_store.GAME_STORE_DIR, 'games', 'league=Serie_A', 'season=2023', f'part.{fmt}')
+    df = game_store.read_partition('Serie A', 2023)
+    assert pd.api.types.is_datetime64_any_dtype(df['Date'])
+    assert (df['Date'].to_numpy() == games['Date'].to_numpy()).all()
+    pd.testing.assert_frame_equal(df.drop(columns='Date'), games.drop(columns='Date'), check_dtype=False)
+
+@pytest.mark.parametrize('fmt', ['parquet', 'csv'])
+def test_read_partition_columns(games, fmt, monkeypatch):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    monkeypatch.setattr(game_store, 'STORE_FORMAT', fmt)
+    game_store.write_partition(games, 'Serie A', 2023)
+    df = game_store.read_partition('Serie A', 2023, columns=['HomeTeam', 'FTHG'])
+    assert df.columns.tolist() == ['HomeTeam', 'FTHG']
+    assert df['FTHG'].tolist() == [2, 2, 4]
+
+def test_csv_keeps_day_first_dates(games, monkeypatch):
+    monkeypatch.setattr(game_store, 'STORE_FORMAT', 'csv')
+    path = game_store.write_partition(games, 'Serie A', 2023)
+    with open(path) as f:
+        assert f.readlines()[1].startswith('19/08/2023,Inter')
+
+def test_missing_partition(games):
+    assert game_store.find_partition('Serie A', 2019) is None
+    assert game_store.read_partition('Serie A', 2019) is None
+    assert game_store.partition_age('Serie A', 2019) is None
+    assert game_store.read_seasons('Serie A', [2019, 2020]) is None
+
+def test_read_seasons_skips_missing(games):
+    game_store.write_partition(games, 'Serie A', 2022)
+    game_store.write_partition(games.head(1), 'Serie A', 2023)
+    df = game_store.read_seasons('Serie A', [2021, 2022, 2023])
+    assert len(df) == 4
+
+def test_datasets_are_separate(games):
+    game_store.write_partition(games, 'Serie A', 2023)
+    game_store.write_partition(games.head(1), 'Serie A', 2023, dataset='team_features')
+    assert len(game_store.read_partition('Serie A', 2023)) == 3
+    assert len(game_store.read_partition('Serie A', 2023, dataset='team_features')) == 1
+
+def test_concurrent_writes_of_one_partition(games):
+    big = pd.concat([games] * 2000, ignore_index=True)
+    errors = []
+
+    def write():
+        try:
+            for _ in range(5):
+                game_store.write_partition(big, 'Serie A', 2023)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(game_store.read_partition('Serie A', 2023)) == len(big)
+    directory = os.path.dirname(game_store.partition_path('Serie A', 2023))
+    assert os.listdir(directory) == [os.path.basename(game_store.partition_path('Serie A', 2023))]
+
+def test_parse_match_dates_formats():
+    dates = pd.Series(['19/08/2023', '20/08/23', '2023-08-26', 'not a date'])
+    parsed = game_store.parse_match_dates(dates)
+    assert parsed[:3].dt.strftime('%Y-%m-%d').tolist() == ['2023-08-19', '2023-08-20', '2023-08-26']
+    assert pd.isna(parsed[3])
+
+def test_parse_date_column_keeps_parsed_dates(games):
+    dates = games['Date']
+    assert game_store.parse_date_column(dates) is dates
+
+def test_atomic_path_cleans_up_on_error(tmp_path):
+    target = tmp_path / 'index.json'
+    target.write_text('old')
+    with pytest.raises(RuntimeError):
+        with game_store.atomic_path(str(target)) as tmp:
+            with open(tmp, 'w') as f:
+                f.write('partial')
+            raise RuntimeError('write failed')
+    assert target.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['index.json']
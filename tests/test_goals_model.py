@@ -0,0 +1,98 @@
+# test_goals_model.py
+# Tests for the Dixon-Coles goals model on a small synthetic league
+import numpy as np
+import pandas as pd
+import os
+import pytest
+import goals_model
+
+STRENGTHS = {'Alpha': (1.6, 0.7), 'Bravo': (1.2, 0.9), 'Charlie': (1.0, 1.0), 'Delta': (0.8, 1.2), 'Echo': (0.6, 1.4)}
+
+@pytest.fixture
+def games() -> pd.DataFrame:
+    """Four double round-robins with goals drawn from known strengths and a home advantage of 1.3."""
+    rng = np.random.default_rng(7)
+    rows = []
+    date = pd.Timestamp('2023-08-19')
+    for _ in range(4):
+        for home, (home_attack, home_defence) in STRENGTHS.items():
+            for away, (away_attack, away_defence) in STRENGTHS.items():
+                if home == away:
+                    continue
+                rows.append({
+                    'Date': date,
+                    'HomeTeam': home,
+                    'AwayTeam': away,
+                    'FTHG': rng.poisson(1.3 * 1.2 * home_attack * away_defence),
+                    'FTAG': rng.poisson(1.2 * away_attack * home_defence),
+                })
+                date += pd.Timedelta(days=3)
+    return pd.DataFrame(rows)
+
+@pytest.fixture(autouse=True)
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(goals_model, 'MODEL_DIR', str(tmp_path / 'models'))
+    return tmp_path / 'models'
+
+def test_fit_league_model(games):
+    model = goals_model.fit_league_model(games)
+    assert model['matches'] == len(games)
+    assert model['iterations'] < goals_model.FIT_ITERATIONS
+    assert model['home_advantage'] > 1
+    assert goals_model.RHO_GRID.min() <= model['rho'] <= goals_model.RHO_GRID.max()
+    teams = model['teams']
+    assert set(teams) == {name.lower() for name in STRENGTHS}
+    assert np.mean([team['attack'] for team in teams.values()]) == pytest.approx(1)
+    assert np.mean([team['defence'] for team in teams.values()]) == pytest.approx(1)
+    assert teams['alpha']['attack'] > teams['echo']['attack']
+    assert teams['alpha']['defence'] < teams['echo']['defence']
+
+def test_unweighted_fit_matches_goal_totals(games, monkeypatch):
+    # At the maximum likelihood the fitted expected goals add up to the observed goals
+    monkeypatch.setattr(goals_model, 'DECAY_HALF_LIFE_DAYS', 0)
+    model = goals_model.fit_league_model(games)
+    expected = [goals_model.model_expected_goals(model, row.HomeTeam, row.AwayTeam) for row in games.itertuples()]
+    assert sum(home for home, _ in expected) == pytest.approx(games['FTHG'].sum(), rel=1e-4)
+    assert sum(away for _, away in expected) == pytest.approx(games['FTAG'].sum(), rel=1e-4)
+
+def test_fit_accepts_string_dates(games):
+    dated = games.assign(Date=games['Date'].dt.strftime('%d/%m/%Y'))
+    from_strings = goals_model.fit_league_model(dated)
+    from_dates = goals_model.fit_league_model(games)
+    assert from_strings['home_advantage'] == pytest.approx(from_dates['home_advantage'])
+    assert from_strings['teams']['alpha'] == pytest.approx(from_dates['teams']['alpha'])
+
+def test_unknown_team(games):
+    model = goals_model.fit_league_model(games)
+    assert goals_model.model_expected_goals(model, 'Alpha', 'Zulu') is None
+
+def test_score_matrix():
+    matrix = goals_model.score_matrix(1.4, 1.1, rho=-0.1)
+    assert matrix.sum() == pytest.approx(1)
+    independent = np.outer(goals_model.poisson_pmf(1.4), goals_model.poisson_pmf(1.1))
+    independent /= independent.sum()
+    assert goals_model.score_matrix(1.4, 1.1) == pytest.approx(independent)
+    probabilities = goals_model.outcome_probabilities(matrix)
+    assert probabilities['home'] + probabilities['draw'] + probabilities['away'] == pytest.approx(1)
+
+def test_load_or_fit_reuses_artifact(games, monkeypatch):
+    model = goals_model.load_or_fit_league_model('Serie A', games)
+    path = goals_model.model_path('Serie A', model['snapshot'])
+    assert os.path.exists(path)
+
+    def fail(_):
+        raise AssertionError('model refitted')
+    monkeypatch.setattr(goals_model, 'fit_league_model', fail)
+    assert goals_model.load_or_fit_league_model('Serie A', games) == model
+
+def test_old_artifacts_are_pruned(games):
+    paths = []
+    for played in range(len(games) - 5, len(games)):
+        model = goals_model.load_or_fit_league_model('Serie A', games.head(played))
+        path = goals_model.model_path('Serie A', model['snapshot'])
+        # Distinct mtimes so the pruning order does not depend on timer resolution
+        os.utime(path, (played, played))
+        paths.append(path)
+    goals_model.prune_league_models('Serie A')
+    directory = os.path.dirname(paths[-1])
+    assert sorted(os.listdir(directory)) == sorted(os.path.basename(path) for path in paths[-goals_model.MODEL_KEEP:])
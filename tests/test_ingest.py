@@ -0,0 +1,81 @@
+# test_ingest.py
+# Tests for when stored season partitions are trusted, refreshed or re-ingested
+import pandas as pd
+import os
+import pytest
+import game_store
+import goals_model
+import ingest
+import team_features
+import treatment
+from datetime import datetime
+
+GAMES = pd.DataFrame({
+    'Date': pd.to_datetime(['2020-09-19']),
+    'HomeTeam': ['Inter'],
+    'AwayTeam': ['Monza'],
+    'FTHG': [2],
+    'FTAG': [0],
+    'FTR': ['H'],
+    'Season': ['2020/2021'],
+})
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(game_store, 'GAME_STORE_DIR', str(tmp_path / 'store'))
+    monkeypatch.setattr(team_features, 'update_team_features', lambda *args: None)
+    monkeypatch.setattr(team_features, 'ensure_team_features', lambda *args: True)
+    monkeypatch.setattr(goals_model, 'get_league_model', lambda *args: None)
+
+def store_season(league: str, season: int, written_at: datetime) -> None:
+    game_store.write_partition(GAMES, league, season)
+    stamp = written_at.timestamp()
+    os.utime(game_store.find_partition(league, season), (stamp, stamp))
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Replace downloads with one fixed season CSV and record the fetched URLs."""
+    fetched = []
+
+    def fetch_csv(path):
+        fetched.append(path)
+        return pd.DataFrame({'Date': ['19/09/2020', '23/05/2021'], 'HomeTeam': ['Inter', 'Roma'],
+                             'AwayTeam': ['Monza', 'Milan'], 'FTHG': [2, 1], 'FTAG': [0, 1], 'FTR': ['H', 'D']})
+    monkeypatch.setattr(treatment, 'fetch_csv', fetch_csv)
+    return fetched
+
+def test_stored_season_is_final():
+    assert not treatment.stored_season_is_final('Serie A', 2020)
+    store_season('Serie A', 2020, datetime(2021, 3, 1))
+    assert not treatment.stored_season_is_final('Serie A', 2020)
+    store_season('Serie A', 2020, datetime(2021, 7, 2))
+    assert treatment.stored_season_is_final('Serie A', 2020)
+
+def test_load_season_serves_final_partition(fetches):
+    store_season('Serie A', 2020, datetime(2021, 7, 2))
+    dfs = treatment.load_season('Serie A', 2020)
+    assert len(dfs[0]) == 1
+    assert fetches == []
+
+def test_load_season_refreshes_partition_written_mid_season(fetches):
+    store_season('Serie A', 2020, datetime(2021, 3, 1))
+    dfs = treatment.load_season('Serie A', 2020)
+    assert fetches
+    assert sum(len(df) for df in dfs) == 2
+    # The refreshed partition is final, so the next load reads it from the store
+    assert treatment.stored_season_is_final('Serie A', 2020)
+    fetches.clear()
+    assert len(treatment.load_season('Serie A', 2020)[0]) == 2
+    assert fetches == []
+
+def test_ingest_reingests_partitions_written_mid_season(monkeypatch):
+    store_season('Serie A', 2020, datetime(2021, 7, 2))
+    store_season('Serie A', 2021, datetime(2022, 3, 1))
+    loaded = []
+    monkeypatch.setattr(treatment, 'load_season', lambda league, season, use_store: loaded.append(season) or [GAMES])
+    live = treatment.current_season_start()
+    summary = ingest.ingest_all(['Serie A'], season_start=2020, season_end=live, max_workers=1)
+    assert 2020 not in loaded
+    assert 2021 in loaded
+    assert live in loaded
+    assert summary['Serie A'][2021] == 1
@@ -0,0 +1,183 @@
+# test_job_store.py
+# Tests for job status stores: TTL expiry, LRU eviction, size budget and queries
+import pytest
+import job_store
+from job_store import JobStore, MemoryJobStore, SQLiteJobStore
+
+class FakeClock:
+    """Controllable replacement for time.time inside job_store."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def finished(**fields):
+    """A record of a job that has finished, which eviction may drop."""
+    return {'status': 'completed', 'finished_at': '2024-01-01T00:00:00', **fields}
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(job_store.time, 'time', fake)
+    return fake
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_store(request, tmp_path, clock):
+    """Factory for either backend with the given limits and an eviction log."""
+    def make(ttl_seconds: float = 60, max_jobs: int = 10):
+        evicted = []
+        if request.param == 'memory':
+            store = MemoryJobStore(ttl_seconds=ttl_seconds, max_jobs=max_jobs, on_evict=evicted.append)
+        else:
+            store = SQLiteJobStore(str(tmp_path / 'jobs.db'), ttl_seconds=ttl_seconds, max_jobs=max_jobs,
+                                   on_evict=evicted.append)
+        return store, evicted
+    return make
+
+def test_job_store_is_abstract():
+    with pytest.raises(TypeError):
+        JobStore()
+
+def test_create_get_update(make_store):
+    store, _ = make_store()
+    store.create('a', {'status': 'pending'})
+    store.update('a', status='completed', result={'x': 1})
+    assert store.get('a') == {'status': 'completed', 'result': {'x': 1}}
+    assert 'a' in store
+    assert store.get('missing') is None
+
+def test_get_returns_copy(make_store):
+    store, _ = make_store()
+    store.create('a', {'status': 'pending'})
+    store.get('a')['status'] = 'changed'
+    assert store.get('a')['status'] == 'pending'
+
+def test_ttl_expiry(make_store, clock):
+    store, evicted = make_store(ttl_seconds=60)
+    store.create('old', finished())
+    clock.now += 30
+    store.create('new', finished())
+    clock.now += 45
+    assert store.get('old') is None
+    assert store.get('new') is not None
+    # Expired records are deleted (and reported) on the next write
+    store.create('newest', finished())
+    assert 'old' in evicted
+    assert 'new' not in evicted
+
+def test_update_refreshes_ttl(make_store, clock):
+    store, _ = make_store(ttl_seconds=60)
+    store.create('a', finished())
+    clock.now += 50
+    store.update('a', status='error')
+    clock.now += 50
+    assert store.get('a')['status'] == 'error'
+
+def test_lru_eviction_by_count(make_store, clock):
+    store, evicted = make_store(max_jobs=3)
+    for job_id in 'abcd':
+        store.create(job_id, finished())
+        clock.now += 1
+    assert evicted == ['a']
+    assert store.get('a') is None
+    assert all(store.get(job_id) is not None for job_id in 'bcd')
+
+def test_update_keeps_job_from_eviction(make_store, clock):
+    store, evicted = make_store(max_jobs=3)
+    for job_id in 'abc':
+        store.create(job_id, finished())
+        clock.now += 1
+    store.update('a', status='error')
+    clock.now += 1
+    store.create('d', finished())
+    assert evicted == ['b']
+
+def test_memory_get_refreshes_lru_order(clock):
+    evicted = []
+    store = MemoryJobStore(max_jobs=2, on_evict=evicted.append)
+    store.create('a', finished())
+    store.create('b', finished())
+    store.get('a')
+    store.create('c', finished())
+    assert evicted == ['b']
+
+def test_memory_size_budget(clock):
+    evicted = []
+    store = MemoryJobStore(max_bytes=300, on_evict=evicted.append)
+    store.create('a', finished(payload='x' * 150))
+    store.create('b', finished(payload='x' * 150))
+    assert evicted == ['a']
+    assert store.stats()['bytes'] <= 300
+
+def test_count_and_latest(make_store, clock):
+    store, _ = make_store()
+    store.create('a', {'status': 'completed', 'kind': 'match', 'finished_at': 'then'})
+    clock.now += 1
+    store.create('b', {'status': 'completed', 'kind': 'batch', 'finished_at': 'then'})
+    clock.now += 1
+    store.create('c', {'status': 'processing', 'kind': 'match', 'finished_at': None})
+    assert store.count(finished_at=None) == 1
+    assert store.count(status='completed') == 2
+    assert store.latest(status='completed') == 'b'
+    assert store.latest(status='completed', kind='match') == 'a'
+    assert store.latest(status='error') is None
+
+def test_sqlite_shared_between_instances(tmp_path, clock):
+    path = str(tmp_path / 'jobs.db')
+    writer = SQLiteJobStore(path)
+    reader = SQLiteJobStore(path)
+    writer.create('a', {'status': 'pending'})
+    writer.update('a', status='completed')
+    assert reader.get('a') == {'status': 'completed'}
+    assert reader.stats()['jobs'] == 1
+
+def test_unfinished_jobs_are_not_evicted(make_store, clock):
+    store, evicted = make_store(ttl_seconds=60, max_jobs=2)
+    store.create('running', {'status': 'processing', 'finished_at': None})
+    clock.now += 1
+    store.create('a', finished())
+    clock.now += 1
+    store.create('b', finished())
+    assert evicted == ['a']
+    clock.now += 120
+    store.create('c', finished())
+    assert evicted == ['a', 'b']
+    assert store.get('running')['status'] == 'processing'
+    assert store.count(finished_at=None) == 1
+    store.update('running', status='completed', finished_at='now')
+    clock.now += 120
+    store.create('d', finished())
+    assert 'running' in evicted
+
+def test_try_create_respects_limit(make_store):
+    store, _ = make_store()
+    assert store.try_create('a', {'finished_at': None}, 2, finished_at=None)
+    assert store.try_create('b', {'finished_at': None}, 2, finished_at=None)
+    assert not store.try_create('c', {'finished_at': None}, 2, finished_at=None)
+    assert store.get('c') is None
+    store.update('a', finished_at='now')
+    assert store.try_create('c', {'finished_at': None}, 2, finished_at=None)
+    assert sorted(store.find(finished_at=None)) == ['b', 'c']
+
+def create_up_to_limit(path, job_ids, limit, results):
+    store = SQLiteJobStore(path)
+    for job_id in job_ids:
+        results.put(store.try_create(job_id, {'finished_at': None}, limit, finished_at=None))
+
+def test_sqlite_try_create_is_atomic_across_processes(tmp_path):
+    import multiprocessing
+    path = str(tmp_path / 'jobs.db')
+    SQLiteJobStore(path)
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=create_up_to_limit,
+                                       args=(path, [f'{w}-{i}' for i in range(10)], 5, results))
+               for w in range(4)]
+    for worker in workers:
+        worker.start()
+    accepted = sum(results.get(timeout=30) for _ in range(40))
+    for worker in workers:
+        worker.join()
+    assert accepted == 5
+    assert SQLiteJobStore(path).count(finished_at=None) == 5
@@ -0,0 +1,87 @@
+# test_job_workspace.py
+# Tests for per-job workspaces: in-memory frames, artifacts on disk and cleanup
+import pandas as pd
+import os
+import pytest
+import team_features
+from job_workspace import JobWorkspace
+
+@pytest.fixture
+def games() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2023-08-19', '2023-08-20']),
+        'HomeTeam': ['Inter', 'Roma'],
+        'AwayTeam': ['Monza', 'Salernitana'],
+        'FTHG': [2, 2],
+    })
+
+@pytest.fixture(params=['parquet', 'csv'])
+def artifact_format(request):
+    if request.param == 'parquet':
+        pytest.importorskip('pyarrow')
+    return request.param
+
+def test_frames_stay_in_memory_without_artifacts(tmp_path, games):
+    workspace = JobWorkspace(str(tmp_path / 'job'), save_artifacts=False)
+    workspace.put('AllGames', games)
+    assert workspace.has('AllGames')
+    assert not os.path.exists(workspace.directory)
+    assert workspace.artifact('AllGames') is None
+    pd.testing.assert_frame_equal(workspace.get('AllGames'), games)
+    assert workspace.get('TeamGames') is None
+    assert not workspace.has('TeamGames')
+
+def test_get_returns_copy(tmp_path, games):
+    workspace = JobWorkspace(str(tmp_path / 'job'), save_artifacts=False)
+    workspace.put('AllGames', games)
+    df = workspace.get('AllGames')
+    df.loc[0, 'FTHG'] = 9
+    assert workspace.get('AllGames').loc[0, 'FTHG'] == 2
+
+def test_get_columns(tmp_path, games):
+    workspace = JobWorkspace(str(tmp_path / 'job'), save_artifacts=False)
+    workspace.put('AllGames', games)
+    assert workspace.get('AllGames', columns=['HomeTeam', 'Missing']).columns.tolist() == ['HomeTeam']
+
+def test_artifact_round_trip(tmp_path, games, artifact_format):
+    directory = str(tmp_path / 'job')
+    JobWorkspace(directory, artifact_format=artifact_format).put('AllGames', games)
+    reader = JobWorkspace(directory, save_artifacts=False, artifact_format=artifact_format)
+    assert reader.artifact('AllGames') == os.path.join(directory, f'AllGames.{artifact_format}')
+    assert reader.has('AllGames')
+    df = reader.get('AllGames')
+    assert pd.api.types.is_datetime64_any_dtype(df['Date'])
+    assert df['HomeTeam'].tolist() == ['Inter', 'Roma']
+    assert reader.get('AllGames', columns=['FTHG'])['FTHG'].tolist() == [2, 2]
+
+def test_csv_export(tmp_path, games):
+    pytest.importorskip('pyarrow')
+    workspace = JobWorkspace(str(tmp_path / 'job'), artifact_format='parquet', export_csv=True)
+    workspace.put('AllGames', games)
+    assert os.path.exists(workspace.path('AllGames', 'parquet'))
+    with open(workspace.path('AllGames', 'csv')) as f:
+        assert f.readlines()[1].startswith('19/08/2023,Inter')
+    # The columnar artifact is preferred when reading back
+    assert workspace.artifact('AllGames') == workspace.path('AllGames', 'parquet')
+
+def test_cleanup_removes_directory(tmp_path, games, artifact_format):
+    workspace = JobWorkspace(str(tmp_path / 'job'), artifact_format=artifact_format)
+    workspace.put('AllGames', games)
+    workspace.cleanup()
+    assert not os.path.exists(workspace.directory)
+    assert not workspace.has('AllGames')
+
+def test_cleanup_keeps_working_directory(tmp_path, games, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    workspace = JobWorkspace(save_artifacts=True, artifact_format='csv')
+    workspace.put('AllGames', games)
+    workspace.cleanup()
+    assert os.path.exists(tmp_path / 'AllGames.csv')
+    assert workspace.frames == {}
+
+def test_team_keys_stay_out_of_artifacts(tmp_path, games):
+    workspace = JobWorkspace(str(tmp_path / 'job'), artifact_format='csv')
+    workspace.put('AllGames', team_features.add_team_keys(games.copy()))
+    assert 'HomeTeamKey' in workspace.get('AllGames').columns
+    reader = JobWorkspace(workspace.directory, save_artifacts=False, artifact_format='csv')
+    assert reader.get('AllGames').columns.tolist() == games.columns.tolist()
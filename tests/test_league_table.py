@@ -0,0 +1,64 @@
+# test_league_table.py
+# Regression tests for league tables and pre-match positions on a small hand-checked season
+import pandas as pd
+import pytest
+import league_table
+
+@pytest.fixture
+def games() -> pd.DataFrame:
+    """
+    Three matchdays of a four-team season, plus one match of the next season.
+
+    After matchday 1, C and D are level on points, GD and GF (alphabetical
+    order breaks the tie); after matchday 2, C and D are split by GF.
+    """
+    return pd.DataFrame([
+        ('19/08/2023', 'A', 'B', 2, 0, 'H', '2023/2024'),
+        ('19/08/2023', 'C', 'D', 1, 1, 'D', '2023/2024'),
+        ('26/08/2023', 'B', 'C', 3, 1, 'H', '2023/2024'),
+        ('26/08/2023', 'D', 'A', 0, 2, 'A', '2023/2024'),
+        ('02/09/2023', 'A', 'C', 1, 1, 'D', '2023/2024'),
+        ('02/09/2023', 'B', 'D', 0, 0, 'D', '2023/2024'),
+        ('17/08/2024', 'A', 'D', 0, 1, 'A', '2024/2025'),
+    ], columns=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'Season'])
+
+def test_positions_before_each_match(games):
+    df = league_table.add_positions_to_games(games, 'Test League')
+    positions = list(zip(df['HomeTeam'], df['AwayTeam'], df['HomePosition'], df['AwayPosition']))
+    assert positions == [
+        ('A', 'B', 0, 0),
+        ('C', 'D', 0, 0),
+        ('B', 'C', 4, 2),
+        ('D', 'A', 3, 1),
+        ('A', 'C', 1, 3),
+        ('B', 'D', 2, 4),
+        # Standings restart with the new season
+        ('A', 'D', 0, 0),
+    ]
+
+def test_positions_do_not_depend_on_row_order(games):
+    expected = league_table.add_positions_to_games(games, 'Test League').sort_index()
+    shuffled = games.sample(frac=1, random_state=3)
+    df = league_table.add_positions_to_games(shuffled, 'Test League').sort_index()
+    pd.testing.assert_frame_equal(df, expected)
+
+def test_positions_keep_parsed_dates(games):
+    df = league_table.add_positions_to_games(games, 'Test League')
+    assert pd.api.types.is_datetime64_any_dtype(df['Date'])
+    assert df['Date'].iloc[0] == pd.Timestamp('2023-08-19')
+
+def test_league_table(games):
+    season = games[games['Season'] == '2023/2024']
+    table = league_table.build_league_table_from_games(season, 'Test League')
+    assert table.columns.tolist() == ['Team', 'Played', 'Won', 'Drawn', 'Lost', 'GF', 'GA', 'GD', 'Points', 'Position']
+    assert table.values.tolist() == [
+        ['A', 3, 2, 1, 0, 5, 1, 4, 7, 1],
+        ['B', 3, 1, 1, 1, 3, 3, 0, 4, 2],
+        ['C', 3, 0, 2, 1, 3, 5, -2, 2, 3],
+        ['D', 3, 0, 2, 1, 1, 3, -2, 2, 4],
+    ]
+
+def test_league_table_full_tie_is_alphabetical(games):
+    table = league_table.build_league_table_from_games(games.head(2), 'Test League')
+    assert table['Team'].tolist() == ['A', 'C', 'D', 'B']
+    assert table.loc[1, ['Points', 'GD', 'GF']].tolist() == table.loc[2, ['Points', 'GD', 'GF']].tolist()
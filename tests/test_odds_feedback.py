@@ -0,0 +1,62 @@
+# test_odds_feedback.py
+# Regression tests for the favourite-vs-result labels on played and unplayed matches
+import pandas as pd
+import nextGame
+import treatment
+from job_workspace import JobWorkspace
+
+def match_odds(**odds) -> dict:
+    row = {'MaxH': 2.0, 'MaxD': 3.5, 'MaxA': 4.0, 'AvgH': 1.9, 'AvgD': 3.3, 'AvgA': 3.8,
+           'Max>2.5': 1.8, 'Max<2.5': 2.1, 'Avg>2.5': 1.7, 'Avg<2.5': 2.0}
+    row.update(odds)
+    return row
+
+def test_ftr_odds_feedback():
+    df = pd.DataFrame([
+        {'FTR': 'H', **match_odds()},
+        {'FTR': 'D', **match_odds()},
+        # Home and away share the lowest odds, so both count as favourites
+        {'FTR': 'A', **match_odds(MaxH=1.5, MaxA=1.5)},
+        {'FTR': 'D', **match_odds(MaxH=1.5, MaxA=1.5)},
+        {'FTR': 'H', **match_odds(MaxD=None)},
+        {'FTR': None, **match_odds()},
+        {'FTR': 'X', **match_odds()},
+    ])
+    labels = treatment.add_FTRodds_feedback(df)['FTRodds_feedback']
+    assert labels.dtype == 'boolean'
+    assert labels.tolist() == [True, False, True, False, pd.NA, pd.NA, pd.NA]
+
+def test_goals_odds_feedback():
+    df = pd.DataFrame([
+        {'FTHG': 2, 'FTAG': 1, **match_odds()},
+        {'FTHG': 1, 'FTAG': 1, **match_odds()},
+        {'FTHG': 0, 'FTAG': 0, **match_odds(**{'Avg>2.5': 2.2, 'Avg<2.5': 1.6})},
+        # Over and under share the lowest odds
+        {'FTHG': 3, 'FTAG': 0, **match_odds(**{'Max>2.5': 1.6, 'Avg<2.5': 1.6})},
+        {'FTHG': 0, 'FTAG': 0, **match_odds(**{'Max>2.5': 1.6, 'Avg<2.5': 1.6})},
+        {'FTHG': None, 'FTAG': None, **match_odds()},
+        {'FTHG': 1, 'FTAG': 2, **match_odds(**{'Max<2.5': None})},
+    ])
+    labels = treatment.add_Goalsodds_feedback(df)['Goalsodds_feedback']
+    assert labels.dtype == 'boolean'
+    assert labels.tolist() == [True, False, True, True, True, pd.NA, pd.NA]
+
+def test_missing_odds_columns_give_na_labels():
+    df = pd.DataFrame({'FTR': ['H', 'A'], 'FTHG': [1, 0], 'FTAG': [0, 2]})
+    df = treatment.add_Goalsodds_feedback(treatment.add_FTRodds_feedback(df))
+    for column in ('FTRodds_feedback', 'Goalsodds_feedback'):
+        assert df[column].dtype == 'boolean'
+        assert df[column].isna().all()
+
+def test_unplayed_next_game_keeps_boolean_labels(tmp_path):
+    workspace = JobWorkspace(str(tmp_path / 'job'), save_artifacts=False)
+    nextGame.create_fallback_next_game_csv('Inter', 'Roma', '19/08/2024', 2024, workspace=workspace)
+    next_game = workspace.get('NextGame')
+    played = treatment.add_FTRodds_feedback(pd.DataFrame([{'FTR': 'H', 'FTHG': 2, 'FTAG': 1, **match_odds()}]))
+    played = treatment.add_Goalsodds_feedback(played)
+    combined = pd.concat([played, next_game], ignore_index=True)
+    for column in ('FTRodds_feedback', 'Goalsodds_feedback'):
+        assert next_game[column].dtype == 'boolean'
+        assert next_game[column].isna().all()
+        assert combined[column].dtype == 'boolean'
+        assert combined[column].tolist() == [True, pd.NA]
@@ -0,0 +1,93 @@
+# test_season_cache.py
+# Tests for the on-disk season CSV cache in treatment.fetch_csv
+import json
+import os
+import pytest
+import treatment
+from datetime import datetime
+
+SEASON_CSV = b"Div,Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR\nI1,19/08/2020,Inter,Monza,2,0,H\n"
+FINAL_CSV = SEASON_CSV + b"I1,23/05/2021,Roma,Milan,1,1,D\n"
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b'', etag: str = None):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode('latin-1')
+        self.headers = {'ETag': etag} if etag else {}
+
+class FakeServer:
+    """Stands in for treatment.download_csv, recording the validators of each request."""
+
+    def __init__(self, content: bytes, etag: str):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def __call__(self, url_path, validators=None):
+        self.requests.append(validators)
+        if validators and validators.get('etag') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, self.etag)
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(treatment, 'SEASON_CACHE_ENTRIES', str(tmp_path / 'entries'))
+    monkeypatch.setattr(treatment, 'SEASON_CACHE_BLOBS', str(tmp_path / 'blobs'))
+
+def season_url(season: int) -> str:
+    return f"https://www.football-data.co.uk/mmz4281/{season % 100:02d}{(season + 1) % 100:02d}/I1.csv"
+
+def cache_mid_season(season: int, content: bytes, etag: str) -> None:
+    """Write a cache entry as if the season had been fetched while it was still live."""
+    treatment.save_season_cache_entry(f"I1_{season}", {
+        'url': season_url(season),
+        'sha256': treatment.store_season_blob(content),
+        'etag': etag,
+        'last_modified': None,
+        'fetched_at': datetime(season + 1, 3, 1).isoformat()
+    })
+
+def test_fetch_stores_entry_and_blob(monkeypatch):
+    server = FakeServer(FINAL_CSV, '"v2"')
+    monkeypatch.setattr(treatment, 'download_csv', server)
+    df = treatment.fetch_csv(season_url(2020))
+    assert len(df) == 2
+    with open(treatment.season_cache_entry_path('I1_2020')) as f:
+        assert json.load(f)['etag'] == '"v2"'
+    # Fetched after the season ended, so it is final and never requested again
+    assert len(treatment.fetch_csv(season_url(2020))) == 2
+    assert server.requests == [None]
+
+def test_season_cached_while_live_is_refetched(monkeypatch):
+    cache_mid_season(2020, SEASON_CSV, '"v1"')
+    server = FakeServer(FINAL_CSV, '"v2"')
+    monkeypatch.setattr(treatment, 'download_csv', server)
+    assert len(treatment.fetch_csv(season_url(2020))) == 2
+    assert server.requests[0]['etag'] == '"v1"'
+    assert len(treatment.fetch_csv(season_url(2020))) == 2
+    assert len(server.requests) == 1
+
+def test_season_cached_while_live_is_revalidated_once(monkeypatch):
+    cache_mid_season(2020, SEASON_CSV, '"v1"')
+    server = FakeServer(SEASON_CSV, '"v1"')
+    monkeypatch.setattr(treatment, 'download_csv', server)
+    assert len(treatment.fetch_csv(season_url(2020))) == 1
+    assert len(treatment.fetch_csv(season_url(2020))) == 1
+    assert len(server.requests) == 1
+    fetched_at = datetime.fromisoformat(treatment.load_season_cache_entry('I1_2020')['fetched_at'])
+    assert fetched_at >= treatment.season_end(2020)
+
+def test_live_season_served_within_ttl(monkeypatch):
+    season = treatment.current_season_start()
+    server = FakeServer(SEASON_CSV, '"v1"')
+    monkeypatch.setattr(treatment, 'download_csv', server)
+    treatment.fetch_csv(season_url(season))
+    treatment.fetch_csv(season_url(season))
+    assert server.requests == [None]
+
+def test_entries_are_separate_files(monkeypatch):
+    monkeypatch.setattr(treatment, 'download_csv', FakeServer(FINAL_CSV, '"v2"'))
+    treatment.fetch_csv(season_url(2020))
+    treatment.fetch_csv(season_url(2021))
+    assert sorted(os.listdir(treatment.SEASON_CACHE_ENTRIES)) == ['I1_2020.json', 'I1_2021.json']
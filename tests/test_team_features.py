@@ -0,0 +1,37 @@
+# test_team_features.py
+# Tests for stored team keys and categorical team filtering
+import pandas as pd
+import team_features
+
+def season(home, away) -> pd.DataFrame:
+    return team_features.add_team_keys(pd.DataFrame({'HomeTeam': home, 'AwayTeam': away}))
+
+def test_add_team_keys_shares_categories():
+    df = season(['Inter', 'Cômo '], ['Como', 'Roma'])
+    assert df['HomeTeamKey'].tolist() == ['inter', 'como']
+    assert df['AwayTeamKey'].tolist() == ['como', 'roma']
+    assert df['HomeTeamKey'].cat.categories.tolist() == ['como', 'inter', 'roma']
+    assert df['AwayTeamKey'].dtype == df['HomeTeamKey'].dtype
+
+def test_concat_games_merges_categories():
+    df = team_features.concat_games([season(['Inter'], ['Roma']), season(['Lazio'], ['Inter'])])
+    assert isinstance(df['HomeTeamKey'].dtype, pd.CategoricalDtype)
+    assert df['HomeTeamKey'].cat.categories.tolist() == ['inter', 'lazio', 'roma']
+    assert df['HomeTeamKey'].tolist() == ['inter', 'lazio']
+    assert df['AwayTeamKey'].tolist() == ['roma', 'inter']
+
+def test_concat_games_drops_keys_unless_every_frame_has_them():
+    unkeyed = pd.DataFrame({'HomeTeam': ['Lazio'], 'AwayTeam': ['Inter']})
+    df = team_features.concat_games([season(['Inter'], ['Roma']), unkeyed])
+    assert df.columns.tolist() == ['HomeTeam', 'AwayTeam']
+
+def test_team_key_mask_with_and_without_keys():
+    df = season(['Inter', 'Cômo', 'Roma', None], ['Roma', 'Inter', 'Cômo', 'Inter'])
+    for frame in (df, team_features.drop_team_keys(df), df.astype({'HomeTeamKey': object})):
+        assert team_features.team_key_mask(frame, 'HomeTeam', 'como ').tolist() == [False, True, False, False]
+        assert team_features.team_key_mask(frame, 'AwayTeam', 'Inter').tolist() == [False, True, False, True]
+        assert not team_features.team_key_mask(frame, 'HomeTeam', 'Milan').any()
+
+def test_drop_team_keys():
+    df = season(['Inter'], ['Roma'])
+    assert team_features.drop_team_keys(df).columns.tolist() == ['HomeTeam', 'AwayTeam']
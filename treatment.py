@@ -3,12 +3,20 @@
 import pandas as pd
 import numpy as np
 import logging
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta
 import url
 import requests
+import http_client
 import os
-from tenacity import retry, stop_after_attempt, wait_fixed
+import re
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from job_workspace import JobWorkspace, default_workspace
+import game_store
+from game_store import parse_match_dates, parse_date_column
+import team_features
 from io import StringIO
 
 # Configure logging for production
@@ -19,6 +27,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Local cache of football-data.co.uk season CSVs, content-addressed by SHA-256. Each season's
+# entry (digest, validators, fetch time) is its own file, so API workers and ingest.py never
+# rewrite each other's entries.
+SEASON_CACHE_DIR = "season_cache"
+SEASON_CACHE_ENTRIES = os.path.join(SEASON_CACHE_DIR, "entries")
+SEASON_CACHE_BLOBS = os.path.join(SEASON_CACHE_DIR, "blobs")
+LIVE_SEASON_TTL = timedelta(hours=6)
+# Seasons of history used for predictions (start years, inclusive)
+HISTORY_SEASON_START = 2020
+HISTORY_SEASON_END = 2024
+# Seasons are downloaded concurrently; http_client caps requests per host on top of this
+SEASON_FETCH_WORKERS = int(os.environ.get('SEASON_FETCH_WORKERS', 4))
+# Live-season partitions written by ingest.py are trusted for this long before falling back to a fetch
+GAME_STORE_LIVE_MAX_AGE = timedelta(hours=float(os.environ.get('GAME_STORE_LIVE_MAX_AGE_HOURS', 24)))
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+SEASON_URL_PATTERN = re.compile(r'/mmz4281/(\d{2})(\d{2})/([A-Za-z0-9]+)\.csv$')
+
 def validate_club(club: str, league: str) -> bool:
     """Validate if a club exists in the specified league."""
     if league not in url.clubs_by_league or club not in url.clubs_by_league[league]:
@@ -26,25 +51,147 @@ def validate_club(club: str, league: str) -> bool:
         return False
     return True
 
-@retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
-def fetch_csv(url_path: str) -> pd.DataFrame:
-    """Fetch CSV from URL with retry logic."""
-    logger.info(f"Attempting to fetch {url_path}")
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+def parse_season_url(url_path: str) -> Optional[Tuple[str, int]]:
+    """Extract the league code and season start year from a football-data.co.uk CSV URL."""
+    match = SEASON_URL_PATTERN.search(url_path)
+    if not match:
+        return None
+    return match.group(3), 2000 + int(match.group(1))
+
+def current_season_start(now: Optional[datetime] = None) -> int:
+    """Return the start year of the season currently being played."""
+    now = now or datetime.now()
+    return now.year if now.month >= 7 else now.year - 1
+
+def season_end(season: int) -> datetime:
+    """Return when a season (by start year) stops being the current one, matching current_season_start."""
+    return datetime(season + 1, 7, 1)
+
+def season_cache_entry_path(cache_key: str) -> str:
+    """Path of the cache entry file for a season key such as "I1_2023"."""
+    return os.path.join(SEASON_CACHE_ENTRIES, f"{cache_key}.json")
+
+def load_season_cache_entry(cache_key: str) -> Optional[Dict]:
+    """Load one season's cache entry, or None if it is missing or unreadable."""
+    path = season_cache_entry_path(cache_key)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading season cache entry {cache_key}: {str(e)}")
+    return None
+
+def save_season_cache_entry(cache_key: str, entry: Dict) -> None:
+    """Atomically save one season's cache entry."""
     try:
-        response = requests.get(url_path, headers=headers, timeout=10)
-        logger.info(f"Response status for {url_path}: {response.status_code}")
+        with game_store.atomic_path(season_cache_entry_path(cache_key)) as tmp_path:
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f, indent=2)
+    except Exception as e:
+        logger.error(f"Error saving season cache entry {cache_key}: {str(e)}")
+
+def store_season_blob(content: bytes) -> str:
+    """Store CSV bytes under their SHA-256 digest and return the digest."""
+    digest = hashlib.sha256(content).hexdigest()
+    blob_path = os.path.join(SEASON_CACHE_BLOBS, f"{digest}.csv")
+    if not os.path.exists(blob_path):
+        with game_store.atomic_path(blob_path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+    return digest
+
+def read_season_blob(digest: str) -> Optional[pd.DataFrame]:
+    """Read a cached season CSV by digest, or None if the blob is missing."""
+    blob_path = os.path.join(SEASON_CACHE_BLOBS, f"{digest}.csv")
+    if not os.path.exists(blob_path):
+        return None
+    return pd.read_csv(blob_path, encoding='latin-1')
+
+def download_csv(url_path: str, validators: Optional[Dict] = None) -> requests.Response:
+    """Download a CSV through the shared HTTP client, optionally as a conditional request.
+
+    Retries and backoff follow the football-data.co.uk policy in http_client.
+    """
+    logger.info(f"Attempting to fetch {url_path}")
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    response = http_client.get(url_path, headers=headers)
+    logger.info(f"Response status for {url_path}: {response.status_code}")
+    if response.status_code != 304:
         response.raise_for_status()
-        df = pd.read_csv(StringIO(response.text), encoding='latin-1')
-        return df
+    return response
+
+def fetch_csv(url_path: str) -> pd.DataFrame:
+    """Fetch a season CSV, serving it from the local season cache when possible.
+
+    The live season is served from disk for LIVE_SEASON_TTL and then
+    revalidated with ETag/Last-Modified. A completed season is immutable only
+    once it was fetched after the season ended; a copy cached while it was
+    still live is revalidated once more first.
+    """
+    season_key = parse_season_url(url_path)
+    if season_key is None:
+        try:
+            response = download_csv(url_path)
+            return pd.read_csv(StringIO(response.text), encoding='latin-1')
+        except Exception as e:
+            logger.error(f"Error in fetch_csv for {url_path}: {str(e)}")
+            raise
+    
+    league_code, season = season_key
+    cache_key = f"{league_code}_{season}"
+    entry = load_season_cache_entry(cache_key)
+    now = datetime.now()
+    
+    if entry:
+        fetched_at = datetime.fromisoformat(entry['fetched_at'])
+        is_final = fetched_at >= season_end(season)
+        is_live = now < season_end(season)
+        if is_final or (is_live and now - fetched_at < LIVE_SEASON_TTL):
+            df = read_season_blob(entry['sha256'])
+            if df is not None:
+                logger.info(f"Season cache hit for {cache_key}")
+                return df
+            logger.warning(f"Season cache blob missing for {cache_key}, refetching")
+            entry = None
+    
+    try:
+        response = download_csv(url_path, validators=entry)
+        if response.status_code == 304 and entry:
+            df = read_season_blob(entry['sha256'])
+            if df is not None:
+                logger.info(f"Season cache revalidated for {cache_key}")
+                entry['fetched_at'] = now.isoformat()
+                save_season_cache_entry(cache_key, entry)
+                return df
+            response = download_csv(url_path)
+        
+        digest = store_season_blob(response.content)
+        save_season_cache_entry(cache_key, {
+            'url': url_path,
+            'sha256': digest,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now.isoformat()
+        })
+        logger.info(f"Stored {cache_key} in season cache as {digest[:12]}")
+        return read_season_blob(digest)
     except Exception as e:
+        if entry:
+            df = read_season_blob(entry['sha256'])
+            if df is not None:
+                logger.warning(f"Serving stale season cache for {cache_key}: {str(e)}")
+                return df
         logger.error(f"Error in fetch_csv for {url_path}: {str(e)}")
         raise
 
 def cut_useless_rows(df: pd.DataFrame) -> Optional[pd.DataFrame]:
-    """Process a DataFrame to keep only relevant columns and add WeekDay."""
+    """Process a DataFrame to keep only relevant columns and add WeekDay and team keys; rows with unparseable dates are dropped."""
     if not isinstance(df, pd.DataFrame) or df.empty:
         logger.error("Input is not a valid DataFrame or is empty")
         return None
@@ -75,15 +222,20 @@ def cut_useless_rows(df: pd.DataFrame) -> Optional[pd.DataFrame]:
         return None
     
     # Add WeekDay
-    try:
-        df_selected['WeekDay'] = df_selected['Date'].apply(get_day_of_week)
-        if df_selected['WeekDay'].isna().all():
-            logger.warning("Failed to parse any dates")
-            return None
-        logger.debug(f"Processed DataFrame head:\n{df_selected.head().to_string()}")
-    except ValueError as e:
-        logger.error(f"Error processing dates: {e}")
+    parsed = parse_match_dates(df_selected['Date'])
+    if parsed.isna().all():
+        logger.warning("Failed to parse any dates")
         return None
+    if parsed.isna().any():
+        logger.warning(f"Dropping {int(parsed.isna().sum())} rows with unparseable dates")
+        df_selected = df_selected[parsed.notna()].copy()
+        parsed = parsed[parsed.notna()]
+    # Dates are parsed once here and kept as datetime64 in the game store and workspaces
+    df_selected['Date'] = parsed
+    df_selected['WeekDay'] = parsed.dt.weekday
+    # Normalized team keys, stored with the season for categorical team lookups downstream
+    df_selected = team_features.add_team_keys(df_selected)
+    logger.debug(f"Processed DataFrame head:\n{df_selected.head().to_string()}")
     
     return df_selected
 
@@ -94,32 +246,80 @@ def filter_club_games(var_club_name: str, df: pd.DataFrame) -> Optional[pd.DataF
         return None
     return df.loc[(df['HomeTeam'] == var_club_name) | (df['AwayTeam'] == var_club_name)].copy()
 
-def process_all_games(season_start: int, season_end: int, league: str) -> Optional[str]:
-    """Process all matches for a range of seasons and save to AllGames.csv."""
+def stored_season_is_final(league: str, season: int) -> bool:
+    """Whether a season's game store partition was written after the season ended."""
+    age = game_store.partition_age(league, season)
+    if age is None:
+        return False
+    return datetime.now() - timedelta(seconds=age) >= season_end(season)
+
+def load_season(league: str, season: int, use_store: bool = True) -> List[pd.DataFrame]:
+    """Fetch and clean every CSV for one season; failures are logged per file and skipped.
+
+    With use_store, a partition already in the game store is returned
+    instead if it was written after the season ended, or if the season is
+    still live and the partition is younger than GAME_STORE_LIVE_MAX_AGE.
+    A partition written while a now completed season was live is refetched
+    once. Fetched seasons are written to the game store either way.
+    """
+    if use_store:
+        age = game_store.partition_age(league, season)
+        is_live = datetime.now() < season_end(season)
+        if stored_season_is_final(league, season) or (
+                is_live and age is not None and age < GAME_STORE_LIVE_MAX_AGE.total_seconds()):
+            df = game_store.read_partition(league, season)
+            if df is not None and not df.empty:
+                logger.info(f"Loaded {len(df)} rows for {league} {season}/{season + 1} from game store")
+                return [df]
+    
+    dfs = []
+    csvs_path = url.file_path_builder(league, season, season)
+    logger.info(f"Fetching data for season {season}/{season + 1}: {csvs_path}")
+    for path in csvs_path:
+        try:
+            df = fetch_csv(path)
+            logger.info(f"Raw data rows from {path}: {len(df)}")
+            logger.debug(f"Columns: {df.columns.tolist()}")
+            df = cut_useless_rows(df)
+            if df is not None and not df.empty:
+                df['Season'] = f"{season}/{season + 1}"
+                dfs.append(df)
+                logger.info(f"Processed {len(df)} rows for season {season}/{season + 1}")
+            else:
+                logger.warning(f"No valid data from {path}")
+        except Exception as e:
+            logger.error(f"Failed to fetch/process {path}: {e}")
+    
+    if dfs:
+        # Write through to the game store so later jobs read the typed partition,
+        # and refresh the season's team features from the same results
+        season_df = team_features.concat_games(dfs).reset_index(drop=True)
+        try:
+            game_store.write_partition(season_df, league, season)
+        except Exception as e:
+            logger.error(f"Failed to store {league} {season}/{season + 1} in game store: {e}")
+        team_features.update_team_features(league, season, season_df)
+    return dfs
+
+def process_all_games(season_start: int, season_end: int, league: str,
+                      return_frame: bool = False,
+                      workspace: Optional[JobWorkspace] = None) -> Union[pd.DataFrame, str, None]:
+    """Process all matches for a range of seasons and store them as AllGames in the workspace.
+
+    Returns an error string on failure. On success returns None, or the
+    concatenated DataFrame when return_frame is True.
+    """
+    workspace = workspace or default_workspace()
     if league not in url.available_leagues:
         logger.error(f"League {league} not supported")
         return f"Error: League {league} not supported"
     
+    # Download seasons concurrently; map() keeps results in season order
+    seasons = list(range(season_start, season_end + 1))
     dfs = []
-    for season in range(season_start, season_end + 1):
-        csvs_path = url.file_path_builder(league, season, season)
-        logger.info(f"Fetching data for season {season}/{season + 1}: {csvs_path}")
-        
-        # Try fetching from URLs
-        for path in csvs_path:
-            try:
-                df = fetch_csv(path)
-                logger.info(f"Raw data rows from {path}: {len(df)}")
-                logger.debug(f"Columns: {df.columns.tolist()}")
-                df = cut_useless_rows(df)
-                if df is not None and not df.empty:
-                    df['Season'] = f"{season}/{season + 1}"
-                    dfs.append(df)
-                    logger.info(f"Processed {len(df)} rows for season {season}/{season + 1}")
-                else:
-                    logger.warning(f"No valid data from {path}")
-            except Exception as e:
-                logger.error(f"Failed to fetch/process {path}: {e}")
+    with ThreadPoolExecutor(max_workers=max(1, min(SEASON_FETCH_WORKERS, len(seasons)))) as executor:
+        for season_dfs in executor.map(lambda season: load_season(league, season), seasons):
+            dfs.extend(season_dfs)
     
     # Fallback to local file for the latest season
     if not dfs and season_end == 2024:
@@ -146,28 +346,53 @@ def process_all_games(season_start: int, season_end: int, league: str) -> Option
         logger.error(f"No valid games found for {league}")
         return f"Error: No games found"
     
-    df_concatenated = pd.concat(dfs).drop_duplicates(
+    # Seasons have different team sets; concat_games merges their key categories
+    df_concatenated = team_features.concat_games(dfs).drop_duplicates(
         subset=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
     )
     if df_concatenated.empty:
         logger.error("Concatenated DataFrame is empty")
         return f"Error: Concatenated DataFrame is empty"
     
-    output_path = os.path.join(os.getcwd(), "AllGames.csv")
-    df_concatenated.to_csv(output_path, index=False)
-    logger.info(f"Saved {len(df_concatenated)} matches to {output_path}")
-    logger.debug(f"AllGames.csv columns: {df_concatenated.columns.tolist()}")
+    workspace.put("AllGames", df_concatenated)
+    logger.info(f"Stored {len(df_concatenated)} matches as AllGames")
+    logger.debug(f"AllGames columns: {df_concatenated.columns.tolist()}")
+    return df_concatenated if return_frame else None
+
+def split_club_games(all_games: pd.DataFrame, star_club: str, opp_club: str,
+                     workspace: Optional[JobWorkspace] = None) -> Optional[str]:
+    """Slice TeamGames and OppGames out of the in-memory AllGames frame."""
+    workspace = workspace or default_workspace()
+    home = all_games['HomeTeam'].to_numpy()
+    away = all_games['AwayTeam'].to_numpy()
+    df_club = all_games.loc[(home == star_club) | (away == star_club)]
+    df_opp = all_games.loc[(home == opp_club) | (away == opp_club)]
+    
+    if df_club.empty or df_opp.empty:
+        logger.error(f"No games found for {star_club} or {opp_club}")
+        return f"Error: No games found for {star_club} or {opp_club}"
+    
+    workspace.put("TeamGames", df_club)
+    workspace.put("OppGames", df_opp)
+    logger.info(f"Stored TeamGames ({len(df_club)} games) and OppGames ({len(df_opp)} games)")
     return None
 
-def handler(season: int, league: str, star_club: str, opp_club: str) -> Optional[str]:
-    """Process historical match data for two clubs and all matches across multiple seasons."""
+def handler(season: int, league: str, star_club: str, opp_club: str,
+            single_pass: bool = True, workspace: Optional[JobWorkspace] = None) -> Optional[str]:
+    """Process historical match data for two clubs and all matches across multiple seasons.
+
+    With single_pass the club subsets are sliced from the AllGames frame in
+    memory; otherwise every season is fetched and parsed a second time.
+    Results are stored as AllGames, TeamGames and OppGames in the workspace.
+    """
     pd.set_option('display.max_columns', None)
+    workspace = workspace or default_workspace()
     
-    # Process all games for seasons 2020 to 2024
-    error = process_all_games(2020, 2024, league)
-    if error:
-        logger.error(f"Failed to process all games: {error}")
-        return error
+    # Process all games for the history seasons
+    all_games = process_all_games(HISTORY_SEASON_START, HISTORY_SEASON_END, league, return_frame=single_pass, workspace=workspace)
+    if isinstance(all_games, str):
+        logger.error(f"Failed to process all games: {all_games}")
+        return all_games
     
     # Validate clubs
     if not validate_club(star_club, league):
@@ -175,11 +400,14 @@ def handler(season: int, league: str, star_club: str, opp_club: str) -> Optional
     if not validate_club(opp_club, league):
         return f"Error: {opp_club} not found in {league}"
     
+    if single_pass:
+        return split_club_games(all_games, star_club, opp_club, workspace=workspace)
+    
     dfs_club = []
     dfs_opp = []
     
     # Fetch data for each season
-    for var_season in range(2020, 2025):
+    for var_season in range(HISTORY_SEASON_START, HISTORY_SEASON_END + 1):
         csvs_path = url.file_path_builder(league, var_season, var_season)
         logger.info(f"Processing club data for season {var_season}/{var_season + 1}: {csvs_path}")
         
@@ -229,16 +457,16 @@ def handler(season: int, league: str, star_club: str, opp_club: str) -> Optional
         logger.error(f"No games found for {star_club} or {opp_club}")
         return f"Error: No games found for {star_club} or {opp_club}"
     
-    df_club_concatenated = pd.concat(dfs_club).drop_duplicates(
+    df_club_concatenated = team_features.concat_games(dfs_club).drop_duplicates(
         subset=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
     )
-    df_opp_concatenated = pd.concat(dfs_opp).drop_duplicates(
+    df_opp_concatenated = team_features.concat_games(dfs_opp).drop_duplicates(
         subset=['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR']
     )
     
-    df_club_concatenated.to_csv("TeamGames.csv", index=False)
-    df_opp_concatenated.to_csv("OppGames.csv", index=False)
-    logger.info("Saved TeamGames.csv and OppGames.csv")
+    workspace.put("TeamGames", df_club_concatenated)
+    workspace.put("OppGames", df_opp_concatenated)
+    logger.info("Stored TeamGames and OppGames")
     
     return None
 
@@ -260,81 +488,56 @@ def add_total_goals_column(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 def add_FTRodds_feedback(df: pd.DataFrame) -> pd.DataFrame:
-    """Add FTRodds_feedback indicating if the favorite outcome matches the actual outcome."""
+    """Add FTRodds_feedback (nullable boolean) indicating if the favorite outcome matches the actual outcome.
+
+    Every outcome whose Max or Avg odds equal the row minimum counts as a
+    favorite, so ties are kept. Rows with missing odds or an unknown FTR get NA.
+    """
     required_cols = ['FTR', 'MaxH', 'MaxD', 'MaxA', 'AvgH', 'AvgD', 'AvgA']
     if df is None or df.empty or not all(col in df.columns for col in required_cols):
         logger.warning("Missing required columns for FTRodds_feedback, skipping")
-        df['FTRodds_feedback'] = 'NA'
+        df['FTRodds_feedback'] = pd.array([pd.NA] * len(df), dtype='boolean')
         return df
     
-    df['FTRodds_feedback'] = 'NA'
-    valid = (~df[required_cols[1:]].isna().any(axis=1)) & (df['FTR'].isin(['H', 'A', 'D']))
+    # Columns are ordered H, D, A for Max then Avg, so outcome k is columns k and k + 3
+    odds = df[required_cols[1:]].to_numpy(dtype=float)
+    outcome = df['FTR'].map({'H': 0, 'D': 1, 'A': 2}).to_numpy(dtype=float)
+    valid = ~np.isnan(odds).any(axis=1) & ~np.isnan(outcome)
     
-    if valid.any():
-        odds = df.loc[valid, ['MaxH', 'MaxD', 'MaxA', 'AvgH', 'AvgD', 'AvgA']]
-        min_odds = odds.min(axis=1)
-        favorites = odds.eq(min_odds, axis=0).apply(
-            lambda x: [k[-1] for k in x.index[x] if k.startswith(('Max', 'Avg'))], axis=1
-        )
-        df.loc[valid, 'FTRodds_feedback'] = df.loc[valid, 'FTR'].combine(
-            favorites, lambda ftr, fav: str(ftr in fav)
-        )
+    is_min = odds == odds.min(axis=1, keepdims=True)
+    favorite = is_min[:, :3] | is_min[:, 3:]
+    rows = np.arange(len(df))
+    hit = favorite[rows, np.where(valid, outcome, 0).astype(np.intp)]
+    df['FTRodds_feedback'] = pd.arrays.BooleanArray(hit, ~valid)
     
     logger.info("Added FTRodds_feedback column")
     return df
 
 def add_Goalsodds_feedback(df: pd.DataFrame) -> pd.DataFrame:
-    """Add Goalsodds_feedback indicating if the favorite goals outcome matches the actual."""
+    """Add Goalsodds_feedback (nullable boolean) indicating if the favorite goals outcome matches the actual.
+
+    Over and Under both count as favorites on tied odds. Rows with missing
+    goals or odds get NA.
+    """
     required_cols = ['FTHG', 'FTAG', 'Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5']
     if df is None or df.empty or not all(col in df.columns for col in required_cols):
         logger.warning("Missing required columns for Goalsodds_feedback, skipping")
-        df['Goalsodds_feedback'] = 'NA'
+        df['Goalsodds_feedback'] = pd.array([pd.NA] * len(df), dtype='boolean')
         return df
     
-    df['Goalsodds_feedback'] = 'NA'
-    valid = (~df[required_cols].isna().any(axis=1))
-    
-    if valid.any():
-        total_goals = df.loc[valid, 'FTHG'] + df.loc[valid, 'FTAG']
-        actual_outcome = np.where(total_goals > 2.5, 'Over', 'Under')
-        odds = df.loc[valid, ['Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5']]
-        min_odds = odds.min(axis=1)
-        outcome_map = {'Max>2.5': 'Over', 'Avg>2.5': 'Over', 'Max<2.5': 'Under', 'Avg<2.5': 'Under'}
-        favorites = odds.eq(min_odds, axis=0).apply(
-            lambda x: [outcome_map[k] for k in x.index[x]], axis=1
-        )
-        df.loc[valid, 'Goalsodds_feedback'] = [
-            str(outcome in favs) for outcome, favs in zip(actual_outcome, favorites)
-        ]
+    goals = df[['FTHG', 'FTAG']].to_numpy(dtype=float)
+    # Columns are ordered Over, Under for Max then Avg
+    odds = df[['Max>2.5', 'Max<2.5', 'Avg>2.5', 'Avg<2.5']].to_numpy(dtype=float)
+    valid = ~np.isnan(goals).any(axis=1) & ~np.isnan(odds).any(axis=1)
     
-    logger.info("Added Goalsodds_feedback column")
-    return df
-
-def treatment_of_date(df: pd.DataFrame) -> pd.DataFrame:
-    """Convert dates and extract Day, Month, Year, and Day_of_week."""
-    if df is None or 'Date' not in df.columns:
-        logger.error("No Date column found in DataFrame")
-        raise ValueError("No Date column found")
+    is_min = odds == odds.min(axis=1, keepdims=True)
+    over_favorite = is_min[:, 0] | is_min[:, 2]
+    under_favorite = is_min[:, 1] | is_min[:, 3]
+    over = goals.sum(axis=1) > 2.5
+    hit = np.where(over, over_favorite, under_favorite)
+    df['Goalsodds_feedback'] = pd.arrays.BooleanArray(hit, ~valid)
     
-    date_formats = ['%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d']
-    for fmt in date_formats:
-        try:
-            df['Date'] = pd.to_datetime(df['Date'], format=fmt, dayfirst=True, errors='coerce')
-            break
-        except ValueError:
-            continue
-    else:
-        logger.error("Could not parse dates")
-        raise ValueError("Could not parse dates")
-    
-    df = df.dropna(subset=['Date'])
-    df['Day'] = df['Date'].dt.day
-    df['Month'] = df['Date'].dt.month
-    df['Year'] = df['Date'].dt.year
-    df['Day_of_week'] = df['Date'].dt.dayofweek
-    df = df.drop(columns=['Date', 'WeekDay'], errors='ignore')
-    
-    logger.info("Processed dates and added Day, Month, Year, Day_of_week columns")
+    logger.info("Added Goalsodds_feedback column")
     return df
 
 def get_day_of_week(date_str: str) -> int:
@@ -368,32 +571,45 @@ def extract_season_from_date(date_str: str) -> Optional[str]:
         return None
     
     
+def treatment_of_dates(*frames: pd.DataFrame) -> List[pd.DataFrame]:
+    """Parse Date and add Day, Month, Year (int16, 0 if unparseable) and Day_of_week (category) to each frame.
+
+    Stored frames already hold parsed dates; only string Date columns (such
+    as NextGame's) are parsed, per frame, and the date parts of all frames
+    are then derived in one pass. Frames are returned as copies, in the order given.
+    """
+    for df in frames:
+        if df is None or 'Date' not in df.columns:
+            logger.error("No Date column found in DataFrame")
+            raise ValueError("No Date column found")
+    
+    dates = pd.concat([parse_date_column(df['Date']) for df in frames], ignore_index=True)
+    valid = dates.notna()
+    day = dates.dt.day.where(valid, 0).astype(np.int16)
+    month = dates.dt.month.where(valid, 0).astype(np.int16)
+    year = dates.dt.year.where(valid, 0).astype(np.int16)
+    day_of_week = pd.Categorical(dates.dt.day_name(), categories=WEEKDAY_NAMES)
+    
+    results = []
+    offset = 0
+    for df in frames:
+        end = offset + len(df)
+        result_df = df.copy()
+        result_df['Date'] = dates.iloc[offset:end].to_numpy()
+        result_df['Day'] = day.iloc[offset:end].to_numpy()
+        result_df['Month'] = month.iloc[offset:end].to_numpy()
+        result_df['Year'] = year.iloc[offset:end].to_numpy()
+        result_df['Day_of_week'] = day_of_week[offset:end]
+        results.append(result_df)
+        offset = end
+    
+    logger.info("Processed dates and added Day, Month, Year, Day_of_week columns")
+    return results
+
 def treatment_of_date(df: pd.DataFrame) -> pd.DataFrame:
     """Process Date column and add Day, Month, Year, Day_of_week columns."""
     try:
-        result_df = df.copy()
-        result_df['Date'] = pd.to_datetime(result_df['Date'], dayfirst=True, errors='coerce')
-        
-        # Initialize columns
-        result_df['Day'] = None
-        result_df['Month'] = None
-        result_df['Year'] = None
-        result_df['Day_of_week'] = None
-        
-        # Extract components
-        valid_dates = result_df['Date'].notna()
-        result_df.loc[valid_dates, 'Day'] = result_df.loc[valid_dates, 'Date'].dt.day
-        result_df.loc[valid_dates, 'Month'] = result_df.loc[valid_dates, 'Date'].dt.month
-        result_df.loc[valid_dates, 'Year'] = result_df.loc[valid_dates, 'Date'].dt.year
-        result_df.loc[valid_dates, 'Day_of_week'] = result_df.loc[valid_dates, 'Date'].dt.day_name()
-        
-        # Convert to integers, fill NA with 0
-        result_df['Day'] = pd.to_numeric(result_df['Day'], errors='coerce').fillna(0).astype(int)
-        result_df['Month'] = pd.to_numeric(result_df['Month'], errors='coerce').fillna(0).astype(int)
-        result_df['Year'] = pd.to_numeric(result_df['Year'], errors='coerce').fillna(0).astype(int)
-        
-        logger.info("Processed dates and added Day, Month, Year, Day_of_week columns")
-        return result_df
+        return treatment_of_dates(df)[0]
     except Exception as e:
         logger.error(f"Error processing dates: {str(e)}")
         return df
@@ -1,6 +1,6 @@
 # url.py
 # Mapping of local league and club names to data source URLs and utility functions
-import requests
+import http_client
 from bs4 import BeautifulSoup
 import pandas as pd
 import logging
@@ -342,12 +342,9 @@ def fetch_upcoming_fixtures(league: str) -> list:
         raise ValueError(f"League {league} not supported")
     
     url = league_to_fixtures_url[league]
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
     
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
         soup = BeautifulSoup(response.text, 'html.parser')
         fixtures = []
@@ -1,12 +1,16 @@
 # weather.py
 # Module for fetching and caching weather data from Open-Meteo API
 import pandas as pd
-import requests
+import numpy as np
+import http_client
+import game_store
 import logging
 from datetime import datetime, timedelta
 import json
 import os
-from typing import Dict, Optional
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Tuple
 import url
 
 # Configure logging
@@ -17,38 +21,187 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cache file for weather data
-WEATHER_CACHE_FILE = "weather_cache.json"
+# SQLite store for weather data, plus the legacy cache files it replaces
+WEATHER_DB_FILE = "weather_cache.db"
+LEGACY_WEATHER_CACHE_FILE = "weather_cache.json"
+LEGACY_WEATHER_CACHE_CSV = "weather_cache.csv"
+ARCHIVE_API_URL = 'https://archive-api.open-meteo.com/v1/archive'
 
-def load_weather_cache() -> Dict:
-    """Load weather cache from file."""
-    if os.path.exists(WEATHER_CACHE_FILE):
+def weather_key(lat: float, lon: float, date_str: str, time_str: str = "20:00") -> Optional[Tuple[float, float, str, int]]:
+    """Normalize a lookup to the (lat, lon, ISO date, hour) store key, or None if unparseable."""
+    for fmt in ['%d/%m/%Y', '%d/%m/%y', '%Y-%m-%d']:
         try:
-            with open(WEATHER_CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-                logger.info(f"Loaded {len(cache)} valid cache entries")
-                return cache
+            date_iso = datetime.strptime(str(date_str), fmt).strftime('%Y-%m-%d')
+            break
+        except ValueError:
+            continue
+    else:
+        return None
+    try:
+        hour = int(str(time_str).split(':')[0])
+    except ValueError:
+        hour = 20
+    return round(float(lat), 4), round(float(lon), 4), date_iso, hour
+
+class WeatherStore:
+    """SQLite-backed weather cache keyed by (lat, lon, date, hour).
+
+    Each thread and process opens its own connection; WAL mode plus a busy
+    timeout lets several worker processes read and write concurrently.
+    """
+    
+    def __init__(self, path: str = WEATHER_DB_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and getattr(self._local, 'pid', None) == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        with self._init_lock:
+            if not self._initialized:
+                self._create_schema(conn)
+                self._initialized = True
+        return conn
+    
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS weather (
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    date TEXT NOT NULL,
+                    hour INTEGER NOT NULL,
+                    temperature REAL,
+                    precipitation REAL,
+                    weather_code INTEGER,
+                    weather TEXT,
+                    PRIMARY KEY (lat, lon, date, hour)
+                ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        imported = conn.execute("SELECT value FROM meta WHERE key = 'legacy_import'").fetchone()
+        if imported is None:
+            import_legacy_weather_caches(conn, self.path)
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_import', ?)",
+                    (datetime.now().isoformat(),)
+                )
+    
+    def get(self, lat: float, lon: float, date_str: str, time_str: str = "20:00") -> Optional[Dict]:
+        key = weather_key(lat, lon, date_str, time_str)
+        if key is None:
+            return None
+        row = self._connect().execute(
+            "SELECT temperature, precipitation, weather_code, weather FROM weather "
+            "WHERE lat = ? AND lon = ? AND date = ? AND hour = ?", key
+        ).fetchone()
+        return row_to_weather(row) if row else None
+    
+    def get_range(self, lat: float, lon: float, start_date: str, end_date: str) -> Dict[Tuple[str, int], Dict]:
+        """Return all stored hours for one venue between two ISO dates, keyed by (date, hour)."""
+        rows = self._connect().execute(
+            "SELECT date, hour, temperature, precipitation, weather_code, weather FROM weather "
+            "WHERE lat = ? AND lon = ? AND date BETWEEN ? AND ?",
+            (round(float(lat), 4), round(float(lon), 4), start_date, end_date)
+        ).fetchall()
+        return {(row[0], row[1]): row_to_weather(row[2:]) for row in rows}
+    
+    def set(self, lat: float, lon: float, date_str: str, time_str: str, value: Dict) -> None:
+        key = weather_key(lat, lon, date_str, time_str)
+        if key is not None:
+            self.upsert_many([key + weather_to_row(value)])
+    
+    def upsert_many(self, rows: Iterable[Tuple]) -> int:
+        """Bulk upsert (lat, lon, date, hour, temperature, precipitation, weather_code, weather) rows."""
+        return upsert_weather_rows(self._connect(), rows)
+
+def upsert_weather_rows(conn: sqlite3.Connection, rows: Iterable[Tuple]) -> int:
+    """Insert or update weather rows in a single transaction."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    with conn:
+        conn.executemany("""
+            INSERT INTO weather (lat, lon, date, hour, temperature, precipitation, weather_code, weather)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (lat, lon, date, hour) DO UPDATE SET
+                temperature = excluded.temperature,
+                precipitation = excluded.precipitation,
+                weather_code = excluded.weather_code,
+                weather = excluded.weather
+        """, rows)
+    return len(rows)
+
+def row_to_weather(row: Tuple) -> Dict:
+    """Convert a (temperature, precipitation, weather_code, weather) row to a weather dict."""
+    return {
+        'Temperature': row[0],
+        'Precipitation': row[1],
+        'WeatherCode': row[2],
+        'Weather': row[3]
+    }
+
+def weather_to_row(value: Dict) -> Tuple:
+    """Convert a weather dict to a (temperature, precipitation, weather_code, weather) row."""
+    code = value.get('WeatherCode')
+    code = None if code is None or pd.isna(code) else int(code)
+    temperature = value.get('Temperature')
+    precipitation = value.get('Precipitation')
+    return (
+        None if temperature is None or pd.isna(temperature) else float(temperature),
+        None if precipitation is None or pd.isna(precipitation) else float(precipitation),
+        code,
+        value.get('Weather') or map_weather_code(code)
+    )
+
+def import_legacy_weather_caches(conn: sqlite3.Connection, db_path: str = WEATHER_DB_FILE) -> int:
+    """One-time import of weather_cache.json and weather_cache.csv into the SQLite store."""
+    rows = []
+    if os.path.exists(LEGACY_WEATHER_CACHE_FILE):
+        try:
+            with open(LEGACY_WEATHER_CACHE_FILE, 'r') as f:
+                legacy = json.load(f)
+            for cache_key, value in legacy.items():
+                parts = cache_key.split('_')
+                if len(parts) != 4:
+                    continue
+                key = weather_key(*parts)
+                if key is not None:
+                    rows.append(key + weather_to_row(value))
+        except Exception as e:
+            logger.error(f"Error importing {LEGACY_WEATHER_CACHE_FILE}: {str(e)}")
+    if os.path.exists(LEGACY_WEATHER_CACHE_CSV):
+        try:
+            legacy_df = pd.read_csv(LEGACY_WEATHER_CACHE_CSV)
+            for record in legacy_df.to_dict(orient='records'):
+                key = weather_key(record['Latitude'], record['Longitude'], record['Date'], f"{int(record['Hour'])}:00")
+                if key is not None:
+                    rows.append(key + weather_to_row(record))
         except Exception as e:
-            logger.error(f"Error loading weather cache: {str(e)}")
-    return {}
+            logger.error(f"Error importing {LEGACY_WEATHER_CACHE_CSV}: {str(e)}")
+    imported = upsert_weather_rows(conn, rows)
+    if imported:
+        logger.info(f"Imported {imported} legacy weather cache entries into {db_path}")
+    return imported
 
-def save_weather_cache(cache: Dict) -> None:
-    """Save weather cache to file."""
-    try:
-        with open(WEATHER_CACHE_FILE, 'w') as f:
-            json.dump(cache, f)
-        logger.info(f"Saved weather cache with {len(cache)} entries")
-    except Exception as e:
-        logger.error(f"Error saving weather cache: {str(e)}")
+weather_store = WeatherStore()
 
 def get_weather_data(lat: float, lon: float, date_str: str, time_str: str = "20:00") -> Optional[Dict]:
     """Fetch weather data for a specific date, time, and location."""
-    cache = load_weather_cache()
     cache_key = f"{lat}_{lon}_{date_str}_{time_str}"
-    
-    if cache_key in cache:
+    cached = weather_store.get(lat, lon, date_str, time_str)
+    if cached is not None:
         logger.info(f"Cache hit for {cache_key}")
-        return cache[cache_key]
+        return cached
     
     try:
         # Parse date
@@ -77,7 +230,7 @@ def get_weather_data(lat: float, lon: float, date_str: str, time_str: str = "20:
             logger.info(f"Using forecast API for {date_str}")
         else:
             # Use archive API with historical proxy
-            base_url = 'https://archive-api.open-meteo.com/v1/archive'
+            base_url = ARCHIVE_API_URL
             api_date = date_obj.replace(year=current_date.year - 1) if is_future else date_obj
             logger.info(f"Using archive API with proxy date {api_date.strftime('%Y-%m-%d')} for {date_str}")
         
@@ -91,7 +244,7 @@ def get_weather_data(lat: float, lon: float, date_str: str, time_str: str = "20:
             f"hourly=temperature_2m,precipitation,weathercode"
         )
         
-        response = requests.get(api_url, timeout=10)
+        response = http_client.get(api_url)
         response.raise_for_status()
         data = response.json()
         
@@ -121,8 +274,7 @@ def get_weather_data(lat: float, lon: float, date_str: str, time_str: str = "20:
         }
         
         # Cache the result
-        cache[cache_key] = weather_data
-        save_weather_cache(cache)
+        weather_store.set(lat, lon, date_str, time_str, weather_data)
         
         logger.info(f"Fetched weather for {date_str} {time_str} at ({lat}, {lon}): {weather_data}")
         return weather_data
@@ -137,8 +289,7 @@ def get_weather_data(lat: float, lon: float, date_str: str, time_str: str = "20:
             'Weather': 'Clear'
         }
         logger.warning(f"Using default weather data: {default_weather}")
-        cache[cache_key] = default_weather
-        save_weather_cache(cache)
+        weather_store.set(lat, lon, date_str, time_str, default_weather)
         return default_weather
 
 def map_weather_code(code: int) -> str:
@@ -163,43 +314,142 @@ def map_weather_code(code: int) -> str:
     }
     return weather_codes.get(code, "Unknown")
 
+def fetch_hourly_archive(lat: float, lon: float, start_date: str, end_date: str) -> pd.DataFrame:
+    """Fetch hourly archive weather for one venue over a whole date range (YYYY-MM-DD)."""
+    api_url = (
+        f"{ARCHIVE_API_URL}?"
+        f"latitude={lat}&longitude={lon}&"
+        f"start_date={start_date}&end_date={end_date}&"
+        f"hourly=temperature_2m,precipitation,weathercode"
+    )
+    response = http_client.get(api_url)
+    response.raise_for_status()
+    hourly_data = response.json().get('hourly', {})
+    hourly_df = pd.DataFrame({
+        'time': pd.to_datetime(hourly_data.get('time', []), format='%Y-%m-%dT%H:%M'),
+        'Temperature': pd.to_numeric(pd.Series(hourly_data.get('temperature_2m', []), dtype=object), errors='coerce'),
+        'Precipitation': pd.to_numeric(pd.Series(hourly_data.get('precipitation', []), dtype=object), errors='coerce'),
+        'WeatherCode': pd.to_numeric(pd.Series(hourly_data.get('weathercode', []), dtype=object), errors='coerce')
+    })
+    return hourly_df.dropna(subset=['time']).sort_values('time').reset_index(drop=True)
+
+def nearest_hour_indices(hour_times: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """Return, for each target timestamp, the index of the closest hourly timestamp."""
+    if len(hour_times) < 2:
+        return np.zeros(len(targets), dtype=int)
+    idx = np.clip(np.searchsorted(hour_times, targets), 1, len(hour_times) - 1)
+    left = hour_times[idx - 1]
+    right = hour_times[idx]
+    return idx - ((targets - left) <= (right - targets))
+
 def enrich_with_weather(df: pd.DataFrame, league: str) -> pd.DataFrame:
-    """Enrich DataFrame with weather data for each match."""
+    """Enrich DataFrame with weather data for each match.
+
+    Past matches are grouped by venue coordinates and fetched with one
+    archive request per venue spanning its full date range; the hourly
+    values are joined back with a nearest-hour lookup. Future matches go
+    through get_weather_data so they can use the forecast API.
+    """
     if df.empty:
         logger.warning("Input DataFrame is empty")
         return df
     
     result_df = df.copy()
-    result_df['Temperature'] = None
-    result_df['Precipitation'] = None
-    result_df['WeatherCode'] = None
-    result_df['Weather'] = 'Unknown'
-    
-    for idx, row in result_df.iterrows():
-        home_team = row['HomeTeam']
-        date_str = row['Date']
-        time_str = row.get('Time', '20:00')
-        
-        if pd.isna(date_str) or not home_team:
-            logger.warning(f"Missing Date or HomeTeam at index {idx}")
+    n_rows = len(result_df)
+    temperature = np.full(n_rows, np.nan)
+    precipitation = np.full(n_rows, np.nan)
+    weather_code = np.full(n_rows, np.nan)
+    weather = np.full(n_rows, 'Unknown', dtype=object)
+    
+    dates = game_store.parse_date_column(result_df['Date'])
+    if 'Time' in result_df.columns:
+        times = result_df['Time'].fillna('20:00').astype(str)
+    else:
+        times = pd.Series('20:00', index=result_df.index)
+    targets = dates.dt.normalize() + pd.to_timedelta(times + ':00', errors='coerce')
+    
+    lat_map = {club: coords['lat'] for club, coords in url.club_to_city.items()}
+    lon_map = {club: coords['lon'] for club, coords in url.club_to_city.items()}
+    lats = result_df['HomeTeam'].map(lat_map)
+    lons = result_df['HomeTeam'].map(lon_map)
+    
+    missing_coords = result_df['HomeTeam'].notna() & lats.isna()
+    for team in result_df.loc[missing_coords, 'HomeTeam'].unique():
+        logger.warning(f"No coordinates found for {team}")
+    if targets.isna().any():
+        logger.warning(f"Missing or invalid Date for {int(targets.isna().sum())} rows")
+    
+    valid = (targets.notna() & lats.notna()).to_numpy()
+    is_future = (dates.dt.normalize() > pd.Timestamp.now().normalize()).to_numpy()
+    date_strs = dates.dt.strftime('%d/%m/%Y').to_numpy()
+    date_isos = dates.dt.strftime('%Y-%m-%d').to_numpy()
+    hours = targets.dt.hour.to_numpy()
+    time_strs = times.to_numpy()
+    lat_values = lats.to_numpy()
+    lon_values = lons.to_numpy()
+    target_values = targets.to_numpy()
+    
+    # Future matches: forecast API (or proxy archive date) per row
+    for pos in np.flatnonzero(valid & is_future):
+        weather_data = get_weather_data(lat_values[pos], lon_values[pos], date_strs[pos], time_strs[pos])
+        if weather_data:
+            temperature[pos] = weather_data['Temperature']
+            precipitation[pos] = weather_data['Precipitation']
+            weather_code[pos] = weather_data['WeatherCode']
+            weather[pos] = weather_data['Weather']
+    
+    # Past matches: one archive request per venue, served from cache where possible
+    past_positions = np.flatnonzero(valid & ~is_future)
+    venues = pd.DataFrame({'lat': lat_values[past_positions], 'lon': lon_values[past_positions], 'pos': past_positions})
+    for (lat, lon), venue_rows in venues.groupby(['lat', 'lon'], sort=False):
+        venue_positions = venue_rows['pos'].to_numpy()
+        stored = weather_store.get_range(lat, lon, date_isos[venue_positions].min(), date_isos[venue_positions].max())
+        to_fetch = []
+        for pos in venue_positions:
+            cached = stored.get((date_isos[pos], int(hours[pos])))
+            if cached:
+                temperature[pos] = cached['Temperature']
+                precipitation[pos] = cached['Precipitation']
+                weather_code[pos] = cached['WeatherCode']
+                weather[pos] = cached['Weather']
+            else:
+                to_fetch.append(pos)
+        if not to_fetch:
             continue
         
-        # Get coordinates
-        coords = url.club_to_city.get(home_team)
-        if not coords:
-            logger.warning(f"No coordinates found for {home_team}")
+        to_fetch = np.array(to_fetch)
+        venue_targets = target_values[to_fetch]
+        start_date = pd.Timestamp(venue_targets.min()).strftime('%Y-%m-%d')
+        end_date = (pd.Timestamp(venue_targets.max()) + timedelta(days=1)).strftime('%Y-%m-%d')
+        try:
+            hourly_df = fetch_hourly_archive(lat, lon, start_date, end_date)
+            if hourly_df.empty:
+                raise ValueError("No hourly weather data available")
+        except Exception as e:
+            logger.error(f"Error fetching archive weather for ({lat}, {lon}) {start_date}..{end_date}: {str(e)}")
             continue
+        logger.info(f"Fetched {len(hourly_df)} hourly rows for ({lat}, {lon}) {start_date}..{end_date} covering {len(to_fetch)} matches")
         
-        # Fetch weather
-        logger.info(f"Fetching weather for {date_str} {time_str} at ({coords['lat']}, {coords['lon']})")
-        weather_data = get_weather_data(coords['lat'], coords['lon'], date_str, time_str)
-        
-        if weather_data:
-            result_df.at[idx, 'Temperature'] = weather_data['Temperature']
-            result_df.at[idx, 'Precipitation'] = weather_data['Precipitation']
-            result_df.at[idx, 'WeatherCode'] = weather_data['WeatherCode']
-            result_df.at[idx, 'Weather'] = weather_data['Weather']
-            logger.info(f"Applied weather data for {home_team} on {date_str}: {weather_data}")
+        nearest = nearest_hour_indices(hourly_df['time'].to_numpy(), venue_targets)
+        temperature[to_fetch] = hourly_df['Temperature'].to_numpy()[nearest]
+        precipitation[to_fetch] = hourly_df['Precipitation'].to_numpy()[nearest]
+        weather_code[to_fetch] = hourly_df['WeatherCode'].to_numpy()[nearest]
+        new_rows = []
+        for pos in to_fetch:
+            code = None if pd.isna(weather_code[pos]) else int(weather_code[pos])
+            weather[pos] = map_weather_code(code)
+            new_rows.append(weather_key(lat, lon, date_isos[pos], f"{hours[pos]}:00") + weather_to_row({
+                'Temperature': temperature[pos],
+                'Precipitation': precipitation[pos],
+                'WeatherCode': code,
+                'Weather': weather[pos]
+            }))
+        weather_store.upsert_many(new_rows)
+    
+    result_df['Temperature'] = temperature
+    result_df['Precipitation'] = precipitation
+    result_df['WeatherCode'] = weather_code
+    result_df['Weather'] = weather
     
     logger.info(f"Enriched DataFrame with weather data: {len(result_df)} rows")
-    return result_df
\ No newline at end of file
+    return result_df